@@ -24,12 +24,20 @@ import pandas as pd
 import os
 import json
 import spacy
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 
 # Configuration
 INPUT_BOOKS_DIR = "Dataset/Books/"
-INPUT_TRAIN_FILE = "Dataset/train_fixed.csv"
-OUTPUT_FILE = "results.csv"
+INPUT_TRAIN_FILE = os.getenv("INPUT_DATA", "Dataset/train_fixed.csv")
+OUTPUT_FILE = os.getenv("OUTPUT_FILE", "results.csv")
+SMALL_LLM_MODEL = "groq-llama-small"
+RETRIEVAL_K = 20  # Matches per decomposed claim
+
+# Async stage limits: stories in flight per stage, per-request timeout and retry policy
+DECOMPOSE_CAPACITY = int(os.getenv("DECOMPOSE_CAPACITY", "8"))
+JURY_CAPACITY = int(os.getenv("JURY_CAPACITY", "4"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_RETRY_STRATEGY = pw.udfs.ExponentialBackoffRetryStrategy(max_retries=4, initial_delay=1000, backoff_factor=2, jitter_ms=500)
 
 # Global entities/tracker imports for top-level if needed (though we rely on UDF internal imports)
 try:
@@ -40,189 +48,527 @@ except ImportError:
     pass
 
 @pw.udf
-def perform_programmatic_reasoning(backstory: str, chunks: list, metadata: list, book_name: str) -> str:
-    import json
-    import spacy
+def perform_programmatic_reasoning(backstory: str, chunks: list, metadata: list, book_name: str, character: str = "") -> str:
+    return programmatic_reasoning(backstory, chunks, metadata, book_name, character)
+
+def programmatic_reasoning(backstory: str, chunks: list, metadata: list, book_name: str, character: str = "") -> str:
+    """JSON verdict and reason; "seconds" is this UDF's run time, charged to the cascade's programmatic stage."""
+    import json, time
+    started = time.perf_counter()
     print(f"[DEBUG] Programmatic reasoning for a backstory (book: {book_name})")
     try:
-        from src.reasoning.entity_tracker import EntityStateTracker
+        from src.reasoning.entity_tracker import EntityStateTracker, get_entity_manager
         from src.reasoning.timeline_validator import TimelineValidator
-        from src.reasoning.constraint_rules import ConstraintRules
+        from src.reasoning.constraint_rules import ConstraintRules, describe_violation
+        from src.reasoning.multi_pattern import get_matcher
+        from src.reasoning.timeline_store import get_timeline
+        from src.reasoning.plot_facts import get_plot_facts
+        from src.models.nli_judge import get_nlp
         
-        tracker = EntityStateTracker()
+        tracker = EntityStateTracker(get_nlp())
         validator = TimelineValidator()
         rules = ConstraintRules()
         
-        # 1. Claims
-        from src.models.nli_judge import get_nlp
-        nlp = get_nlp()
-        doc = nlp(backstory)
-        backstory_claims = [sent.text for sent in doc.sents]
+        # 1. Claims (years, locations, persons of the whole backstory)
+        backstory_claims = tracker.parse_backstory_claims(backstory)
         
-        # 2. Evidence
+        # 2. Evidence: per-chunk states from the shared index, keyed by chunk id
         valid_chunks = [c.decode('utf-8') if isinstance(c, bytes) else str(c) for c in chunks]
-        narrative_states = []
-        for i, text in enumerate(valid_chunks):
-             meta = metadata[i] if metadata and i < len(metadata) else {}
-             try:
-                  chapter = dict(meta).get("chapter", "Unknown") if meta else "Unknown"
-             except: chapter = "Unknown"
-             narrative_states.append({"text": text, "chapter": chapter})
+        narrative_states = tracker.get_states_from_chunks(valid_chunks, metadata)
              
         # 3. Overlap
-        backstory_ents = tracker.extract_basic_entities(backstory)
-        bs_ents_list = backstory_ents.get("PERSON", []) + backstory_ents.get("GPE", []) + backstory_ents.get("LOC", [])
+        bs_ents_list = backstory_claims["persons"] + backstory_claims["locations"]
         bs_proper_nouns = {w.lower() for w in bs_ents_list if len(w) > 3}
         
-        evidence_text = " ".join(valid_chunks).lower()
-        overlap = any(noun in evidence_text for noun in bs_proper_nouns)
+        # One automaton pass over the evidence instead of a substring scan per entity
+        entity_matcher = get_matcher(bs_proper_nouns)
+        overlap = any(entity_matcher.search(c) for c in valid_chunks)
         
-        all_conflicts = []
-        # Refined Overlap Check: Only flag if many entities and ZERO overlap
+        # Dated deaths and imprisonments from the book's plot facts come first: unlike the
+        # zero-overlap hint they are decisive, and the reason shows the first two conflicts
+        facts = get_plot_facts(book_name)
+        all_conflicts = facts.check(character, backstory_claims, backstory) if facts is not None else []
+        # Refined Overlap Check: Only flag if many entities and ZERO overlap. Names the book's
+        # entity index knows are a retrieval miss, not an invention, so only the unknown ones count
         if len(bs_proper_nouns) >= 3 and not overlap and book_name:
-             all_conflicts.append(f"ZERO ENTITY OVERLAP: {list(bs_proper_nouns)[:3]}")
+            entities = get_entity_manager(INPUT_BOOKS_DIR)
+            unknown = [n for n in bs_proper_nouns if entities is None or not entities.is_known(n, book_name)]
+            if len(unknown) >= 3:
+                all_conflicts.append(f"ZERO ENTITY OVERLAP: {unknown[:3]}")
         
-        all_conflicts.extend(validator.validate_location_consistency(backstory_claims, narrative_states))
-        all_conflicts.extend(rules.check_imprisonment_constraint(backstory_claims, narrative_states))
-        all_conflicts.extend(rules.check_death_constraint(backstory_claims, narrative_states))
+        # The character's whole-book timeline (states that mention them by name part, so aliases
+        # match) is built once from the shared state index and shared by every story about them
+        timeline = get_timeline(book_name, character, get_nlp())
+        all_conflicts.extend(validator.validate_location_consistency(backstory_claims, narrative_states, timeline))
+        all_conflicts.extend(rules.check_all(backstory_claims, narrative_states))
 
         verdict = "Contradictory" if all_conflicts else "Consistent"
-        return json.dumps({"verdict": verdict, "reason": " | ".join(all_conflicts[:2])})
+        return json.dumps({"verdict": verdict, "reason": " | ".join(describe_violation(c) for c in all_conflicts[:2]),
+                           "seconds": time.perf_counter() - started})
     except Exception as e:
-        return json.dumps({"verdict": "Consistent", "reason": f"Programmatic Error: {str(e)}"})
+        return json.dumps({"verdict": "Consistent", "reason": f"Programmatic Error: {str(e)}",
+                           "seconds": time.perf_counter() - started})
+
+def build_identity_prompt(backstory: str, original_label: str) -> str:
+    return f"""Identify the central character described in this backstory. 
+Return ONLY their primary name (e.g., 'Phileas Fogg'). 
+If no clear name is mentioned, return the original label provided.
+Original Label: {original_label}
+Backstory: {backstory}"""
+
+def build_decomposition_prompt(backstory: str) -> str:
+    return f"""Decompose this backstory into 6-8 independent, atomic, and testable claims. 
+        Each claim should be a single, standalone sentence.
+        Format your response as a simple JSON list of strings.
+        
+        Backstory: {backstory}"""
 
-def extract_true_identity(backstory: str, original_label: str) -> str:
+class TransientLLMError(Exception):
+    """429 / 5xx from the rotator; retried by LLM_RETRY_STRATEGY."""
+
+def post_small_llm(messages: list, timeout: float):
+    """One blocking small-model chat call: the reply text, or None on a non-retryable error."""
+    import requests
+    from dotenv import load_dotenv
+    load_dotenv()
+    API_BASE = os.getenv("OPENAI_API_BASE", "http://localhost:8000/v1")
+    DUMMY_KEY = os.environ.get("OPENAI_API_KEY", "sk-dummy")
+    res = requests.post(
+        f"{API_BASE}/chat/completions",
+        json={"model": SMALL_LLM_MODEL, "messages": messages, "temperature": 0.0},
+        headers={"Authorization": f"Bearer {DUMMY_KEY}"},
+        timeout=timeout
+    )
+    if res.status_code == 429 or res.status_code >= 500:
+        raise TransientLLMError(f"{res.status_code}: {res.text[:200]}")
+    if res.status_code != 200:
+        return None
+    return res.json()["choices"][0]["message"]["content"]
+
+def parse_decomposition(content: str):
+    """Claims from the decomposition reply's JSON list, or None if it has none."""
+    import re
+    match = re.search(r'\[.*\]', content, re.DOTALL)
+    if not match:
+        return None
+    # Quality filter: remove very short or trivial claims
+    return [str(c) for c in json.loads(match.group(0)) if len(str(c)) > 15]
+
+def fallback_claims(backstory: str) -> list[str]:
+    return [s.strip() for s in backstory.split('.') if len(s.strip()) > 15]
+
+def decompose_backstory(backstory: str, retries: int = 4) -> list[str]:
+    """
+    Blocking claim decomposition for callers outside the dataflow (scripts/ablation_engine.py):
+    the decompose_claims prompt, parsing and fallback, with LLM_RETRY_STRATEGY's backoff on 429/5xx.
+    """
+    import time
+    messages = [{"role": "user", "content": build_decomposition_prompt(backstory)}]
+    for attempt in range(retries + 1):
+        try:
+            content = post_small_llm(messages, LLM_TIMEOUT_SECONDS)
+            claims = parse_decomposition(content) if content else None
+            if claims is not None:
+                return claims
+            break
+        except TransientLLMError as e:
+            if attempt == retries:
+                print(f"DEBUG: Claim decomposition failed: {e}")
+                break
+            time.sleep(2 ** attempt)
+        except Exception as e:
+            print(f"DEBUG: Claim decomposition failed: {e}")
+            break
+    return fallback_claims(backstory)
+
+def clean_identity_response(content: str, original_label: str) -> str:
+    content = content.strip().strip('"').strip("'")
+    # If the LLM returned too much text, just keep the first few words or fallback
+    if len(content.split()) > 4:
+        return original_label
+    return content
+
+def extract_true_identity(backstory: str, original_label: str, deadline=None, story_id: str = "", checkpoints=None) -> str:
     import requests, os, json, re
     from dotenv import load_dotenv
+    from src.models.batch_jobs import BatchPending, get_batch_store
+    from src.pathway_pipeline.checkpoints import get_checkpoint_store, fingerprint
     load_dotenv()
     API_BASE = os.getenv("OPENAI_API_BASE", "http://localhost:8000/v1")
     DUMMY_KEY = os.environ.get("OPENAI_API_KEY", "sk-dummy")
     
-    prompt = f"""Identify the central character described in this backstory. 
-Return ONLY their primary name (e.g., 'Phileas Fogg'). 
-If no clear name is mentioned, return the original label provided.
-Original Label: {original_label}
-Backstory: {backstory}"""
-    
-    import random, time
-    time.sleep(random.uniform(0.1, 5.0)) # Jitter to prevent burst
+    prompt = build_identity_prompt(backstory, original_label)
+
+    # Offline batch mode: BatchPending propagates so the story is deferred
+    store = get_batch_store()
+    if store is not None:
+        try:
+            content = store.resolve("identity", SMALL_LLM_MODEL, [{"role": "user", "content": prompt}])
+        except BatchPending:
+            raise
+        except Exception as e:
+            print(f"DEBUG: Identity extraction failed: {e}")
+            return original_label
+        return clean_identity_response(content, original_label)
     
+    if checkpoints is None and story_id:
+        checkpoints = get_checkpoint_store()
+    fp = fingerprint(prompt)
+    if checkpoints is not None:
+        cached = checkpoints.get(story_id, "identity", fp)
+        if cached is not None:
+            return cached
+
+    # No jitter: the jury stage's async capacity already bounds concurrent calls
     try:
         res = requests.post(
             f"{API_BASE}/chat/completions",
-             json={"model": "groq-llama-small", "messages": [{"role": "user", "content": prompt}], "temperature": 0.0},
+             json={"model": SMALL_LLM_MODEL, "messages": [{"role": "user", "content": prompt}], "temperature": 0.0},
              headers={"Authorization": f"Bearer {DUMMY_KEY}"},
-             timeout=60
+             timeout=deadline.clamp(60) if deadline is not None else 60
         )
         if res.status_code == 200:
-            content = res.json()["choices"][0]["message"]["content"].strip().strip('"').strip("'")
-            # If the LLM returned too much text, just keep the first few words or fallback
-            if len(content.split()) > 4: 
-                 return original_label
-            return content
+            identity = clean_identity_response(res.json()["choices"][0]["message"]["content"], original_label)
+            if checkpoints is not None:
+                checkpoints.put(story_id, "identity", fp, identity)
+            return identity
     except Exception as e:
         print(f"DEBUG: Identity extraction failed: {e}")
     return original_label
 
+def nli_only_verdict(nli_status: int, nli_rationale: str) -> tuple[str, str, str]:
+    """Last degradation level: the NLI judge's verdict is final."""
+    if nli_status == 0:
+        return "Contradictory", "Medium", f"NLI-ONLY: {nli_rationale}"
+    return "Consistent", "Low", f"NLI-ONLY: {nli_rationale}"
+
+@pw.udf(executor=pw.udfs.async_executor(capacity=JURY_CAPACITY))
+async def run_nli_evaluation(story_id: str, backstory: str, book_character: str, chunks: list, metadata: list, programmatic_results: str, plot_map: str = "", book_name: str = "") -> tuple[str, str, str, str]:
+    """
+    Async wrapper: up to JURY_CAPACITY stories are evaluated at once. The blocking NLI
+    and jury work runs in a worker thread; its time limit is the story deadline.
+    """
+    import asyncio
+    return await asyncio.to_thread(run_story_evaluation, story_id, backstory, book_character, chunks, metadata, programmatic_results, plot_map, book_name)
+
+def run_story_evaluation(story_id: str, backstory: str, book_character: str, chunks: list, metadata: list, programmatic_results: str, plot_map: str = "", book_name: str = "") -> tuple[str, str, str, str]:
+    from src.models.batch_jobs import get_batch_store
+    from src.models.deadline import get_story_deadline, story_stage, LEVEL_NAMES, FULL
+    from src.pathway_pipeline.checkpoints import get_checkpoint_store
+    checkpoints = get_checkpoint_store()
+    # Pin the evidence every stage of this story used; a resumed run reads it back in the
+    # dataflow (checkpointed_evidence) and skips decomposition and retrieval for the story.
+    # Evidence retrieved for fallback claims (LLM error, deadline, pending batch) is not pinned.
+    retrieval_fp = retrieval_fingerprint(story_id, backstory, book_name, checkpoints)
+    if retrieval_fp is not None and checkpoints.get(story_id, "retrieval", retrieval_fp) is None:
+        checkpoints.put(story_id, "retrieval", retrieval_fp, {
+            "chunks": [c.decode('utf-8') if isinstance(c, bytes) else str(c) for c in chunks],
+            "metadata": [checkpoint_metadata(m) for m in metadata],
+        })
+
+    # Batch passes are resumable and never wait on the network, so they run without a deadline
+    deadline = get_story_deadline(story_id) if get_batch_store() is None else None
+    with story_stage(deadline):
+        judgment, confidence, rationale = evaluate_story(backstory, book_character, chunks, metadata, programmatic_results, plot_map, deadline, book_name, story_id)
+    degradation = deadline.applied_name if deadline is not None else LEVEL_NAMES[FULL]
+
+    if checkpoints is not None and checkpointable(rationale):
+        checkpoints.put(story_id, "verdict", verdict_fingerprint(backstory, book_character, book_name),
+                        [judgment, confidence, rationale, degradation])
+    return judgment, confidence, rationale, degradation
+
+def checkpointable(rationale: str) -> bool:
+    """Pending batch rows, pipeline errors and failed jurors are retried on the next run."""
+    from src.models.batch_jobs import PENDING_MARKER
+    return PENDING_MARKER not in rationale and not rationale.startswith("Pipeline error") and "CRITICAL_FAILURE" not in rationale
+
+def checkpoint_metadata(meta) -> list:
+    """Chunk ref as a JSON list in RETRIEVAL_FIELDS order (ref_field reads both forms)."""
+    from src.pathway_pipeline.book_index import RETRIEVAL_FIELDS, ref_field
+    return [ref_field(meta, field) for field in RETRIEVAL_FIELDS]
+
+def verdict_fingerprint(backstory: str, character: str, book_name: str) -> str:
+    from src.pathway_pipeline.checkpoints import fingerprint
+    return fingerprint(backstory, character, book_name)
+
+def retrieval_fingerprint(story_id: str, backstory: str, book_name: str, checkpoints) -> Optional[str]:
+    """
+    Everything a story's fused evidence depends on (its decomposed claims and the retrieval
+    and fusion settings): a change to any of it retrieves again. None when the story has no
+    checkpointed decomposition, i.e. its evidence came from fallback claims.
+    """
+    from src.pathway_pipeline.checkpoints import fingerprint
+    from src.pathway_pipeline.fusion import FUSION_METHOD, FUSION_TOP_N
+    from src.pathway_pipeline.retrieval import RETRIEVAL_SETTINGS
+    if checkpoints is None:
+        return None
+    claims = checkpoints.get(story_id, "claims", fingerprint(build_decomposition_prompt(backstory)))
+    if claims is None:
+        return None
+    return fingerprint(claims, book_name, RETRIEVAL_K, FUSION_METHOD, FUSION_TOP_N, RETRIEVAL_SETTINGS)
+
 @pw.udf
-def run_nli_evaluation(backstory: str, book_character: str, chunks: list, metadata: list, programmatic_results: str, plot_map: str = "") -> tuple[str, str, str]:
-    import json, re
-    # 1. Programmatic Veto
+def checkpointed_evidence(story_id: str, backstory: str, book_name: str) -> str:
+    """JSON {"chunks", "metadata"} pinned by a previous run with the same retrieval settings, or ""."""
+    import json
+    from src.pathway_pipeline.checkpoints import get_checkpoint_store
+    checkpoints = get_checkpoint_store()
+    retrieval_fp = retrieval_fingerprint(story_id, backstory, book_name, checkpoints)
+    if retrieval_fp is None:
+        return ""
+    stored = checkpoints.get(story_id, "retrieval", retrieval_fp)
+    return json.dumps(stored) if stored is not None else ""
+
+@pw.udf
+def checkpointed_verdict(story_id: str, backstory: str, character: str, book_name: str) -> str:
+    """JSON [judgment, confidence, rationale, degradation] from a previous run, or ""."""
+    import json
+    from src.pathway_pipeline.checkpoints import get_checkpoint_store
+    checkpoints = get_checkpoint_store()
+    if checkpoints is None:
+        return ""
+    stored = checkpoints.get(story_id, "verdict", verdict_fingerprint(backstory, character, book_name))
+    return json.dumps(stored) if stored is not None else ""
+
+def format_evidence_chunks(chunks: list, metadata: list) -> list[dict]:
+    from src.pathway_pipeline.book_index import ref_field
+    formatted = []
+    for i, c in enumerate(chunks):
+         text = c.decode('utf-8') if isinstance(c, bytes) else str(c)
+         meta = metadata[i] if metadata and i < len(metadata) else None
+         formatted.append({"text": text, "chapter": ref_field(meta, "chapter", "Unknown"),
+                           "progress_pct": ref_field(meta, "progress_pct")})
+    return formatted
+
+# ============================================================
+# Verification cascade stages (cheapest first, see src/reasoning/cascade.py)
+# Each stage reads the shared story context and returns a result dict.
+# ============================================================
+def year_rules_stage(ctx: dict) -> dict:
+    """Regex year rule: the backstory's years appear nowhere in the retrieved evidence."""
+    from src.models.nli_judge import extract_years
+    b_years = set(extract_years(ctx["backstory"]))
+    e_years = set()
+    for c in ctx["formatted"]:
+        e_years.update(extract_years(c["text"]))
+    hit = bool(b_years and e_years and not (b_years & e_years))
+    return {"hit": hit, "backstory_years": sorted(b_years), "evidence_years": sorted(e_years)}
+
+def year_rules_verdict(result: dict, ctx: dict) -> tuple[str, str, str]:
+    return "Contradictory", "Medium", f"YEAR-RULE: backstory years {result['backstory_years']} absent from evidence years {result['evidence_years'][:5]}"
+
+def programmatic_stage(ctx: dict) -> dict:
+    import json
     try:
-         prog = json.loads(programmatic_results)
-         if prog.get("verdict") == "Contradictory":
-             if "ZERO ENTITY" not in prog.get("reason", ""):
-                return "Contradictory", "High", f"PROG-VETO: {prog.get('reason')}"
-    except: pass
-
-    # 1.1 Strategy 6: Identity Auto-Correction
-    true_identity = extract_true_identity(backstory, book_character)
+        prog = json.loads(ctx["programmatic_results"])
+    except Exception:
+        return {"hit": False}
+    reason = prog.get("reason", "")
+    # Zero entity overlap is only a hint, never a veto. The checks ran earlier in their own
+    # UDF; their time is charged here so the cost report shows more than the JSON parse.
+    return {"hit": prog.get("verdict") == "Contradictory" and "ZERO ENTITY" not in reason, "reason": reason,
+            "upstream_seconds": float(prog.get("seconds", 0.0))}
+
+def programmatic_verdict(result: dict, ctx: dict) -> tuple[str, str, str]:
+    return "Contradictory", "High", f"PROG-VETO: {result['reason']}"
+
+def dossier_character(book_name: str, character: str) -> str:
+    """The plot map's name for a CSV character when it resolves to exactly one, else the CSV name."""
+    from src.reasoning.plot_facts import get_plot_facts
+    facts = get_plot_facts(book_name)
+    names = facts.resolve(character) if facts is not None else []
+    return names[0] if len(names) == 1 else character
+
+def nli_stage(ctx: dict) -> dict:
+    from src.models.nli_judge import evaluate_backstory_nli
+    from src.models.deadline import NLI_ONLY
+    from src.pathway_pipeline.checkpoints import fingerprint
+    backstory, story_id, checkpoints, deadline = ctx["backstory"], ctx["story_id"], ctx["checkpoints"], ctx["deadline"]
+    formatted = ctx["formatted"]
+
+    # Ablation runs switch reranking off through the context (scripts/ablation_engine.py);
+    # the default fingerprint stays unchanged so existing checkpoints remain valid
+    rerank = ctx.get("rerank", True)
+    texts = [c["text"] for c in formatted]
+    nli_fp = fingerprint(backstory, texts) if rerank else fingerprint(backstory, texts, "no-rerank")
+    stored_nli = checkpoints.get(story_id, "nli", nli_fp) if checkpoints is not None else None
+    if stored_nli is not None:
+        nli_status, nli_rationale, reranked_chunks = stored_nli
+    else:
+        # Sentence splits and embeddings are shared by every story about the character. NLI runs
+        # before the identity call, so the key is the CSV character, resolved to the plot map's
+        # name when it names exactly one character ("Dantès" and "Edmond Dantès" share a dossier)
+        from src.models.dossier import get_dossier
+        dossier = get_dossier(ctx["book_name"], dossier_character(ctx["book_name"], ctx["book_character"]))
+        nli_status, nli_rationale, reranked_chunks = evaluate_backstory_nli(backstory, formatted, dossier=dossier, rerank=rerank)
+        if checkpoints is not None:
+            checkpoints.put(story_id, "nli", nli_fp, [nli_status, nli_rationale, reranked_chunks])
+
+    result = {
+        "hit": nli_status == 0, "status": nli_status, "rationale": nli_rationale, "reranked": reranked_chunks,
+        "strength": "strong" if "CONTRADICTED BY" in nli_rationale else "weak",
+        "temporal_clash": "[TEMPORAL CLASH]" in nli_rationale,
+    }
+    # Deadline degradation: with almost no budget left the NLI verdict is final
+    if deadline is not None and not deadline.allows(NLI_ONLY):
+        deadline.degrade(NLI_ONLY)
+        result["final"] = nli_only_verdict(nli_status, nli_rationale)
+    return result
+
+def nli_verdict(result: dict, ctx: dict) -> tuple[str, str, str]:
+    return "Contradictory", "High", f"NLI-DECISIVE: {result['rationale']}"
+
+def identity_stage(ctx: dict) -> dict:
+    """Strategy 6: Identity Auto-Correction (small LLM)."""
+    from src.models.batch_jobs import get_batch_store
+    from src.models.deadline import NLI_ONLY
+    backstory, book_character, deadline = ctx["backstory"], ctx["book_character"], ctx["deadline"]
+    if deadline is not None and not deadline.allows(NLI_ONLY):
+        true_identity = book_character  # No budget for an identity call
+    else:
+        true_identity = extract_true_identity(backstory, book_character, deadline, ctx["story_id"], ctx["checkpoints"])
+    store = get_batch_store()
+    if store is not None:
+        # Jury prompts depend on the decomposed-claim evidence; wait for it first
+        store.require("decompose", SMALL_LLM_MODEL, [{"role": "user", "content": build_decomposition_prompt(backstory)}])
     if true_identity.lower() != book_character.lower():
         print(f"[STRATEGY 6] Identity Mismatch: CSV says '{book_character}', Backstory describes '{true_identity}'")
-
-    # 2. Format chunks for evaluation
+    return {"hit": true_identity.lower() != book_character.lower(), "identity": true_identity}
+
+def jury_stage(ctx: dict) -> dict:
+    import re
+    from src.models.deadline import DeadlineExceeded, NO_RERETRIEVAL, NLI_ONLY
+    from src.pathway_pipeline.checkpoints import fingerprint
+    backstory, story_id, checkpoints, deadline = ctx["backstory"], ctx["story_id"], ctx["checkpoints"], ctx["deadline"]
+    plot_map, chunks, book_name = ctx["plot_map"], ctx["chunks"], ctx["book_name"]
+    nli_status, nli_rationale, reranked_chunks = ctx["nli"]["status"], ctx["nli"]["rationale"], ctx["nli"]["reranked"]
+    true_identity = ctx["identity"]["identity"]
+
+    # 3b. Hierarchical Plot Map context (V5.0): only the sections about this character and the backstory's years
+    from src.reasoning.narrative_state import extract_years
+    from src.reasoning.plot_map_index import PLOT_MAP_CONTEXT, plot_context
+    plot_mode = ctx.get("plot_map_context", PLOT_MAP_CONTEXT)
+    final_plot_context = plot_context(plot_map, true_identity, extract_years(backstory), plot_mode) if len(plot_map) > 50 and plot_mode != "off" else ""
+    if final_plot_context:
+        print(f"[PLOT-MAP] {true_identity}: {len(final_plot_context)}/{len(plot_map)} plot map chars in prompt", flush=True)
+    
+    # 4. LLM Verification — First Pass
+    from src.models.llm_judge import ConsistencyJudge, build_consistency_prompt
+    judge = ConsistencyJudge()
+    evidence_text = "\n".join([f"- [{c['chapter']}] {c['text'][:450]}" for c in reranked_chunks[:20]])
+    prompt = build_consistency_prompt(backstory, true_identity, evidence_text, "", final_plot_context)
+    
+    print(f"DEBUG: Story Verification with Plot Map context... calling LLM Jury.", flush=True)
+    jury_fp = fingerprint(prompt)
+    res = checkpoints.get(story_id, "jury", jury_fp) if checkpoints is not None else None
     try:
-        from src.models.nli_judge import evaluate_backstory_nli
-        formatted = []
-        for i, c in enumerate(chunks):
-             text = c.decode('utf-8') if isinstance(c, bytes) else str(c)
-             meta = metadata[i] if metadata and i < len(metadata) else {}
-             try: chapter = dict(meta).get("chapter", "Unknown") if meta else "Unknown"
-             except: chapter = "Unknown"
-             formatted.append({"text": text, "chapter": chapter})
-
-        # 3. NLI Evaluation (Atomic Claims)
-        nli_status, nli_rationale, reranked_chunks = evaluate_backstory_nli(backstory, formatted)
-        
-        # 3b. Hierarchical Plot Map context (V5.0)
-        final_plot_context = plot_map if len(plot_map) > 50 else ""
-        
-        # 4. LLM Verification — First Pass
-        from src.models.llm_judge import ConsistencyJudge, build_consistency_prompt
-        judge = ConsistencyJudge()
-        evidence_text = "\n".join([f"- [{c['chapter']}] {c['text'][:450]}" for c in reranked_chunks[:20]])
-        prompt = build_consistency_prompt(backstory, true_identity, evidence_text, "", final_plot_context)
-        
-        print(f"DEBUG: Story Verification with Plot Map context... calling LLM Jury.", flush=True)
-        res = judge.judge_single(prompt, plot_map=plot_map)
-        llm_label = res.get("label", 1)
-        llm_rationale = res.get("rationale", "")
-        da_score = res.get("da_score", 5)
-
-        # ============================================================
-        # 5. DA-Guided Targeted Re-Retrieval (V5.0 — Issue #2 Strategy 3)
-        # If DA score is in the ambiguous zone (5-7), find targeted
-        # evidence for the specific claim DA is uncertain about,
-        # then re-judge with augmented evidence.
-        # ============================================================
-        if 5 <= da_score <= 7:
-            print(f"[DA-RERETRIEVAL] Ambiguous DA score ({da_score}). Searching for targeted evidence...", flush=True)
-            try:
-                # Extract the claim DA is uncertain about from its rationale
-                da_claim = ""
-                # Look for DA's direct quote or key claim
-                quote_match = re.search(r'DIRECT_QUOTE:\s*(.+?)(?:\||$)', llm_rationale)
-                if quote_match:
-                    da_claim = quote_match.group(1).strip()
-                if not da_claim or len(da_claim) < 10:
-                    # Fallback: use the first sentence of the backstory that seems most contentious
-                    da_claim = backstory[:300]
-
-                # Use bi-encoder to find the best matching chunks across ALL available evidence
-                from sentence_transformers import SentenceTransformer, util
-                bi_enc = SentenceTransformer('all-MiniLM-L6-v2')
-                all_chunk_texts = [c.decode('utf-8') if isinstance(c, bytes) else str(c) for c in chunks]
+        if res is None:
+            res = judge.judge_single(prompt, deadline=deadline, jitter=False)
+            if checkpoints is not None and checkpointable(res.get("rationale", "")):
+                checkpoints.put(story_id, "jury", jury_fp, res)
+    except DeadlineExceeded as e:
+        print(f"[DEADLINE] Jury ran out of budget ({e}). Falling back to NLI.", flush=True)
+        deadline.degrade(NLI_ONLY)
+        return {"final": nli_only_verdict(nli_status, nli_rationale)}
+    llm_label = res.get("label", 1)
+    llm_rationale = res.get("rationale", "")
+    da_score = res.get("da_score", 5)
+
+    # ============================================================
+    # 5. DA-Guided Targeted Re-Retrieval (V5.0 — Issue #2 Strategy 3)
+    # If DA score is in the ambiguous zone (5-7), find targeted
+    # evidence for the specific claim DA is uncertain about,
+    # then re-judge with augmented evidence.
+    # ============================================================
+    # Ablation runs switch this round off through the context (scripts/ablation_engine.py)
+    ambiguous = ctx.get("da_reretrieval", True) and da_score is not None and 5 <= da_score <= 7
+    if ambiguous and deadline is not None and not deadline.allows(NO_RERETRIEVAL):
+        print(f"[DEADLINE] Skipping DA re-retrieval (ambiguous DA score {da_score}).", flush=True)
+        deadline.degrade(NO_RERETRIEVAL)
+    elif ambiguous:
+        print(f"[DA-RERETRIEVAL] Ambiguous DA score ({da_score}). Searching for targeted evidence...", flush=True)
+        try:
+            # Extract the claim DA is uncertain about from its rationale
+            da_claim = ""
+            # Look for DA's direct quote or key claim
+            quote_match = re.search(r'DIRECT_QUOTE:\s*(.+?)(?:\||$)', llm_rationale)
+            if quote_match:
+                da_claim = quote_match.group(1).strip()
+            if not da_claim or len(da_claim) < 10:
+                # Fallback: use the first sentence of the backstory that seems most contentious
+                da_claim = backstory[:300]
+
+            # Query the whole-book index (cached bi-encoder, embeddings built once per book)
+            from src.pathway_pipeline.book_index import get_book_index
+            hits = get_book_index(INPUT_BOOKS_DIR).search(da_claim, k=8, book=book_name or None, min_score=0.20)
+
+            # Keep the top-5 hits that are not already part of the evidence shown to the jury
+            shown = [c.decode('utf-8') if isinstance(c, bytes) else str(c) for c in chunks]
+            targeted = [h for h in hits if not any(h["text"].strip()[:200] in s or s.strip()[:200] in h["text"] for s in shown)][:5]
+
+            targeted_chunks = [h["text"] for h in targeted]
+            if targeted_chunks:
+                targeted_evidence = "\n".join([f"- [TARGETED {h['chapter']}] {h['text'][:500]}" for h in targeted])
+                augmented_evidence = f"{evidence_text}\n\n### ADDITIONAL TARGETED EVIDENCE (for ambiguous claim) ###\n{targeted_evidence}"
                 
-                if all_chunk_texts:
-                    claim_emb = bi_enc.encode(da_claim, convert_to_tensor=True)
-                    chunk_embs = bi_enc.encode(all_chunk_texts, convert_to_tensor=True)
-                    hits = util.semantic_search(claim_emb, chunk_embs, top_k=5)[0]
-                    
-                    # Get targeted evidence (top-5 most relevant to the ambiguous claim)
-                    targeted_chunks = [all_chunk_texts[hit['corpus_id']] for hit in hits if hit['score'] > 0.20]
-                    
-                    if targeted_chunks:
-                        targeted_evidence = "\n".join([f"- [TARGETED] {tc[:500]}" for tc in targeted_chunks])
-                        augmented_evidence = f"{evidence_text}\n\n### ADDITIONAL TARGETED EVIDENCE (for ambiguous claim) ###\n{targeted_evidence}"
-                        
-                        prompt2 = build_consistency_prompt(backstory, true_identity, augmented_evidence, "", final_plot_context)
-                        print(f"[DA-RERETRIEVAL] Re-judging with {len(targeted_chunks)} additional targeted chunks...", flush=True)
-                        res2 = judge.judge_single(prompt2, plot_map=plot_map)
-                        
-                        # Use the re-retrieval result as final
-                        llm_label = res2.get("label", llm_label)
-                        llm_rationale = f"[RE-RETRIEVAL] {res2.get('rationale', llm_rationale)}"
-                        print(f"[DA-RERETRIEVAL] Final verdict after re-retrieval: {'Contradictory' if llm_label == 0 else 'Consistent'}", flush=True)
-            except Exception as e:
-                print(f"[DA-RERETRIEVAL] Re-retrieval failed: {e}. Keeping original verdict.")
-
-        # Final Verdict
-        if llm_label == 0:
-            return "Contradictory", "High", f"LLM-JURY ({true_identity}): {llm_rationale}"
-        else:
-            confidence = "Medium" if nli_status == 1 else "High"
-            return "Consistent", confidence, f"LLM-JURY ({true_identity}): {llm_rationale}"
+                prompt2 = build_consistency_prompt(backstory, true_identity, augmented_evidence, "", final_plot_context)
+                print(f"[DA-RERETRIEVAL] Re-judging with {len(targeted_chunks)} additional targeted chunks...", flush=True)
+                rerun_fp = fingerprint(prompt2)
+                res2 = checkpoints.get(story_id, "jury_reretrieval", rerun_fp) if checkpoints is not None else None
+                if res2 is None:
+                    res2 = judge.judge_single(prompt2, deadline=deadline, jitter=False)
+                    if checkpoints is not None and checkpointable(res2.get("rationale", "")):
+                        checkpoints.put(story_id, "jury_reretrieval", rerun_fp, res2)
+                
+                # Use the re-retrieval result as final
+                llm_label = res2.get("label", llm_label)
+                llm_rationale = f"[RE-RETRIEVAL] {res2.get('rationale', llm_rationale)}"
+                print(f"[DA-RERETRIEVAL] Final verdict after re-retrieval: {'Contradictory' if llm_label == 0 else 'Consistent'}", flush=True)
+        except DeadlineExceeded as e:
+            print(f"[DEADLINE] Re-retrieval round ran out of budget ({e}). Keeping original verdict.")
+            deadline.degrade(NO_RERETRIEVAL)
+        except Exception as e:
+            print(f"[DA-RERETRIEVAL] Re-retrieval failed: {e}. Keeping original verdict.")
 
+    # Final Verdict
+    if llm_label == 0:
+        verdict = ("Contradictory", "High", f"LLM-JURY ({true_identity}): {llm_rationale}")
+    else:
+        confidence = "Medium" if nli_status == 1 else "High"
+        verdict = ("Consistent", confidence, f"LLM-JURY ({true_identity}): {llm_rationale}")
+    return {"hit": llm_label == 0, "verdict": verdict}
+
+_story_cascade = None
+
+def build_story_cascade(decisive_overrides=None, stats=None):
+    """Stages of cascade.STORY_STAGES; `decisive` is the default early-exit condition (CASCADE_DECISIVE overrides)."""
+    from src.reasoning.cascade import VerificationCascade, build_stages
+    runs = {"year_rules": year_rules_stage, "programmatic": programmatic_stage, "nli": nli_stage,
+            "identity": identity_stage, "jury": jury_stage}
+    verdicts = {"year_rules": year_rules_verdict, "programmatic": programmatic_verdict, "nli": nli_verdict,
+                "jury": lambda result, ctx: result["verdict"]}
+    return VerificationCascade(build_stages(runs, verdicts), stats=stats, decisive_overrides=decisive_overrides)
+
+def get_story_cascade():
+    global _story_cascade
+    if _story_cascade is None:
+        _story_cascade = build_story_cascade()
+    return _story_cascade
+
+def evaluate_story(backstory: str, book_character: str, chunks: list, metadata: list, programmatic_results: str, plot_map: str = "", deadline=None, book_name: str = "", story_id: str = "") -> tuple[str, str, str]:
+    from src.models.batch_jobs import BatchPending
+    from src.pathway_pipeline.checkpoints import get_checkpoint_store
+    ctx = {
+        "backstory": backstory, "book_character": book_character, "chunks": chunks, "metadata": metadata,
+        "programmatic_results": programmatic_results, "plot_map": plot_map, "deadline": deadline,
+        "book_name": book_name, "story_id": story_id,
+        "checkpoints": get_checkpoint_store() if story_id else None,
+        "formatted": format_evidence_chunks(chunks, metadata),
+    }
+    try:
+        return get_story_cascade().run(ctx)
+    except BatchPending as e:
+        return "Consistent", "Low", str(e)
     except Exception as e:
         return "Consistent", "Low", f"Pipeline error: {str(e)}"
 
@@ -231,23 +577,41 @@ def parse_label(judgment: str) -> int:
     return 0 if (judgment and judgment.lower() == "contradictory") else 1
 
 def run_pipeline():
+    # 0. Worker topology: `pathway spawn --processes P --threads T python main.py` runs this
+    # function in every process; process 0 owns the shared output files.
+    from src.models.workers import pathway_topology
+    from src.models.batch_jobs import batch_mode_enabled
+    processes, threads, process_id = pathway_topology()
+    primary = process_id == 0
+    if processes > 1 and batch_mode_enabled():
+        raise SystemExit("[WORKERS] BATCH_MODE writes a single request file; run it with one Pathway process.")
+
     # 1. Lifecycle Check: Resumption / Token Protection
     if os.path.exists(OUTPUT_FILE):
         try:
              # Check if output is already complete
              test_df = pd.read_csv(OUTPUT_FILE)
              train_df = pd.read_csv(INPUT_TRAIN_FILE)
-             if len(test_df) >= len(train_df):
+             from src.models.batch_jobs import PENDING_MARKER
+             batch_pending = test_df["Rationale"].astype(str).str.contains(PENDING_MARKER).any() if "Rationale" in test_df.columns else False
+             if len(test_df) >= len(train_df) and not batch_pending:
                   print(f"[LIFECYCLE] {OUTPUT_FILE} already complete ({len(test_df)} stories). Skipping inference phase.")
                   from scripts.calculate_full_accuracy import calculate_full_accuracy
                   calculate_full_accuracy(OUTPUT_FILE, INPUT_TRAIN_FILE)
                   return
              else:
-                  print(f"[LIFECYCLE] {OUTPUT_FILE} incomplete ({len(test_df)}/{len(train_df)}). Cleaning up to restart.")
-                  os.remove(OUTPUT_FILE)
+                  from src.pathway_pipeline.checkpoints import get_checkpoint_store
+                  checkpoints = get_checkpoint_store()
+                  if checkpoints is not None:
+                       # Finished stories are re-emitted from their checkpoints, not recomputed
+                       print(f"[LIFECYCLE] {OUTPUT_FILE} incomplete ({len(test_df)}/{len(train_df)}). Resuming from checkpoints "
+                             f"({checkpoints.count('verdict')} verdicts stored in {checkpoints.path}).")
+                  else:
+                       print(f"[LIFECYCLE] {OUTPUT_FILE} incomplete ({len(test_df)}/{len(train_df)}). Cleaning up to restart.")
+                  if primary: os.remove(OUTPUT_FILE)
         except: 
-             if os.path.isfile(OUTPUT_FILE): os.remove(OUTPUT_FILE)
-             else: import shutil; shutil.rmtree(OUTPUT_FILE)
+             if primary and os.path.isfile(OUTPUT_FILE): os.remove(OUTPUT_FILE)
+             elif primary and os.path.isdir(OUTPUT_FILE): import shutil; shutil.rmtree(OUTPUT_FILE)
 
     # 2. Load Data (STATIC MODE)
     books_table = pw.io.fs.read(INPUT_BOOKS_DIR, format="binary", with_metadata=True, mode="static")
@@ -289,59 +653,90 @@ def run_pipeline():
     # Use static mode to ensure auto-termination
     train_table = pw.io.csv.read(INPUT_TRAIN_FILE, schema=train_schema, mode="static").rename(csv_id=pw.this.id)
     
-    train_with_names = train_table.select(
+    # Keyed by story id so Pathway shards stories across workers deterministically
+    all_stories = train_table.with_id_from(pw.this.csv_id).select(
         story_id=pw.this.csv_id,
         backstory=pw.this.content,
         character=pw.this.char,
         book_name=pw.this.book_name,
         book_norm=normalize_book_name(pw.this.book_name)
     )
+
+    # 4b. Resume: stories with a checkpointed verdict skip retrieval and inference entirely
+    checkpointed = all_stories.select(
+        *pw.this,
+        stored_verdict=checkpointed_verdict(pw.this.story_id, pw.this.backstory, pw.this.character, pw.this.book_name)
+    )
+    resumed_table = checkpointed.filter(pw.this.stored_verdict != "")
+    unfinished = checkpointed.filter(pw.this.stored_verdict == "").without(pw.this.stored_verdict)
+
+    # 4c. Stories whose evidence a previous run pinned (with the same retrieval settings) skip
+    # decomposition and retrieval; all their stages work from that one evidence set
+    with_evidence = unfinished.select(
+        *pw.this,
+        stored_evidence=checkpointed_evidence(pw.this.story_id, pw.this.backstory, pw.this.book_name)
+    )
+    pinned_table = with_evidence.filter(pw.this.stored_evidence != "")
+    train_with_names = with_evidence.filter(pw.this.stored_evidence == "").without(pw.this.stored_evidence)
     
     # 5. Retrieval (Vector Search)
     from src.pathway_pipeline.retrieval import NarrativeRetriever
     retriever = NarrativeRetriever(books_dir=INPUT_BOOKS_DIR)
 
-    @pw.udf
-    def decompose_claims(backstory: str) -> list[str]:
-        import requests, os, json, re
-        from dotenv import load_dotenv
-        load_dotenv()
-        API_BASE = os.getenv("OPENAI_API_BASE", "http://localhost:8000/v1")
-        DUMMY_KEY = os.environ.get("OPENAI_API_KEY", "sk-dummy")
-        
-        prompt = f"""Decompose this backstory into 6-8 independent, atomic, and testable claims. 
-        Each claim should be a single, standalone sentence.
-        Format your response as a simple JSON list of strings.
-        
-        Backstory: {backstory}"""
+    async def post_decomposition(messages: list, timeout: float):
+        import asyncio
+        return await asyncio.to_thread(post_small_llm, messages, timeout)
+
+    # Timeout per attempt, then exponential backoff on transient failures
+    post_decomposition_with_retry = pw.udfs.with_retry_strategy(
+        pw.udfs.with_timeout(post_decomposition, LLM_TIMEOUT_SECONDS),
+        LLM_RETRY_STRATEGY
+    )
+
+    @pw.udf(executor=pw.udfs.async_executor(capacity=DECOMPOSE_CAPACITY))
+    async def decompose_claims(story_id: str, backstory: str) -> list[str]:
+        from src.models.batch_jobs import BatchPending, get_batch_store
+        from src.models.deadline import get_story_deadline, story_stage
+        from src.pathway_pipeline.checkpoints import get_checkpoint_store, fingerprint
         
-        import random, time
-        time.sleep(random.uniform(0.1, 5.0)) # Jitter to prevent burst
+        prompt = build_decomposition_prompt(backstory)
+        messages = [{"role": "user", "content": prompt}]
+
+        checkpoints = get_checkpoint_store()
+        claims_fp = fingerprint(prompt)
+        if checkpoints is not None:
+            cached = checkpoints.get(story_id, "claims", claims_fp)
+            if cached is not None:
+                return cached
 
+        store = get_batch_store()
         try:
-            res = requests.post(
-                f"{API_BASE}/chat/completions",
-                json={"model": "groq-llama-small", "messages": [{"role": "user", "content": prompt}], "temperature": 0.0},
-                headers={"Authorization": f"Bearer {DUMMY_KEY}"},
-                timeout=60
-            )
-            if res.status_code == 200:
-                content = res.json()["choices"][0]["message"]["content"]
-                match = re.search(r'\[.*\]', content, re.DOTALL)
-                if match:
-                    claims = json.loads(match.group(0))
-                    # Quality filter: remove very short or trivial claims
-                    return [str(c) for c in claims if len(str(c)) > 15]
+            if store is not None:
+                # Pending decompositions fall back to the sentence split; the story is
+                # still deferred at the jury stage until the real claims are ingested.
+                content = store.resolve("decompose", SMALL_LLM_MODEL, messages)
+            else:
+                # The story's deadline clock starts with its first stage
+                deadline = get_story_deadline(story_id)
+                with story_stage(deadline):
+                    timeout = deadline.clamp(LLM_TIMEOUT_SECONDS) if deadline is not None else LLM_TIMEOUT_SECONDS
+                    content = await post_decomposition_with_retry(messages, timeout)
+            claims = parse_decomposition(content) if content else None
+            if claims is not None:
+                if checkpoints is not None:
+                    checkpoints.put(story_id, "claims", claims_fp, claims)
+                return claims
+        except BatchPending:
+            pass
         except Exception as e:
             print(f"DEBUG: Claim decomposition failed: {e}")
         
         # Fallback: simple split if LLM fails
-        return [s.strip() for s in backstory.split('.') if len(s.strip()) > 15]
-        return [backstory]
+        return fallback_claims(backstory)
 
     query_table_lists = train_with_names.select(
         *pw.this,
-        claims=decompose_claims(pw.this.backstory)
+        claims=decompose_claims(pw.this.story_id, pw.this.backstory)
     )
 
     flat_queries = query_table_lists.flatten(pw.this.claims).select(
@@ -358,35 +753,90 @@ def run_pipeline():
             pw.this.book_name, 
             query=pw.this.single_claim
         ), 
-        k=20
+        k=RETRIEVAL_K
+    )
+
+    # 5b. Cross-claim fusion: each claim's ranked matches become (chunk_id, rank, score)
+    # hits; the story groupby carries only these ids, fused into a bounded top-N list.
+    from src.pathway_pipeline.fusion import ranked_ids, fuse
+
+    @pw.udf
+    def claim_hits(ids: tuple, scores: tuple) -> list:
+        return [list(h) for h in ranked_ids(ids, scores)]
+
+    @pw.udf
+    def chunk_entries(chunks: tuple, ids: tuple, books: tuple, chapters: tuple, progress: tuple,
+                      starts: tuple, ends: tuple) -> list:
+        # Chunk ref = the typed RETRIEVAL_FIELDS of one chunk; the score is per query, so it is dropped
+        return [(c, (cid, b, ch, p, s, e, None))
+                for c, cid, b, ch, p, s, e in zip(chunks or (), ids or (), books or (), chapters or (),
+                                                  progress or (), starts or (), ends or ())]
+
+    @pw.udf
+    def fuse_claim_hits(hits_tup: tuple) -> list:
+        # Fused position is carried along so the joined texts can be re-sorted per story
+        return [(cid, pos, score) for pos, (cid, score) in enumerate(fuse([[tuple(h) for h in hits] for hits in hits_tup]))]
+
+    @pw.udf
+    def split_ranked(ranked_tup: tuple) -> tuple[list, list]:
+        ranked = sorted(ranked_tup or (), key=lambda r: r[0])
+        # Ref score = the chunk's fused score for this story
+        return [r[1] for r in ranked], [tuple(r[2][:-1]) + (r[3],) for r in ranked]
+
+    # Unique chunks keyed by their stable id (text travels once, not per story)
+    chunk_table = joined_flat.select(
+        entries=chunk_entries(pw.this.retrieved_chunks, pw.this.chunk_id, pw.this.book, pw.this.chapter,
+                              pw.this.progress_pct, pw.this.start, pw.this.end)
+    ).flatten(pw.this.entries).select(
+        chunk_id=pw.this.entries[1][0],
+        chunk=pw.this.entries[0],
+        chunk_ref=pw.this.entries[1]
+    ).groupby(pw.this.chunk_id).reduce(
+        chunk_id=pw.this.chunk_id,
+        chunk=pw.reducers.any(pw.this.chunk),
+        chunk_ref=pw.reducers.any(pw.this.chunk_ref)
     )
 
-    grouped_table = joined_flat.groupby(pw.this.story_id).reduce(
+    grouped_table = joined_flat.select(
+        *pw.this,
+        hits=claim_hits(pw.this.chunk_id, pw.this.score)
+    ).groupby(pw.this.story_id).reduce(
         story_id=pw.this.story_id,
         backstory=pw.reducers.min(pw.this.backstory),
         character=pw.reducers.min(pw.this.character),
         book_name=pw.reducers.min(pw.this.book_name),
-        metadata_tup=pw.reducers.tuple(pw.this.retrieved_metadata),
-        chunks_tup=pw.reducers.tuple(pw.this.retrieved_chunks)
+        hits_tup=pw.reducers.tuple(pw.this.hits)
     )
 
-    @pw.udf
-    def flatten_retrieved(nested_chunks: tuple, nested_metadata: tuple) -> tuple[list, list]:
-         flat_c, flat_m = [], []
-         seen = set()
-         for t_c, t_m in zip(nested_chunks, nested_metadata):
-              if t_c and t_m:
-                  for c, m in zip(t_c, t_m):
-                       c_str = c.decode('utf-8') if isinstance(c, bytes) else str(c)
-                       if c_str not in seen:
-                            seen.add(c_str)
-                            flat_c.append(c)
-                            flat_m.append(m)
-         return flat_c, flat_m
-
-    joined_table = grouped_table.select(
-        *pw.this,
-        flat_results=flatten_retrieved(pw.this.chunks_tup, pw.this.metadata_tup)
+    fused_rows = grouped_table.select(
+        story_id=pw.this.story_id,
+        fused=fuse_claim_hits(pw.this.hits_tup)
+    ).flatten(pw.this.fused).select(
+        story_id=pw.this.story_id,
+        chunk_id=pw.this.fused[0],
+        position=pw.this.fused[1],
+        fused_score=pw.this.fused[2]
+    )
+
+    evidence_by_story = fused_rows.join(
+        chunk_table, pw.left.chunk_id == pw.right.chunk_id
+    ).select(
+        story_id=pw.left.story_id,
+        ranked=pw.make_tuple(pw.left.position, pw.right.chunk, pw.right.chunk_ref, pw.left.fused_score)
+    ).groupby(pw.this.story_id).reduce(
+        story_id=pw.this.story_id,
+        ranked_tup=pw.reducers.tuple(pw.this.ranked)
+    )
+
+    # Left join: a story without any match still reaches the judge (with no evidence)
+    joined_table = grouped_table.join_left(
+        evidence_by_story, pw.left.story_id == pw.right.story_id
+    ).select(
+        story_id=pw.left.story_id,
+        backstory=pw.left.backstory,
+        character=pw.left.character,
+        book_name=pw.left.book_name,
+        flat_results=split_ranked(pw.right.ranked_tup)
     ).select(
         story_id=pw.this.story_id,
         backstory=pw.this.backstory,
@@ -395,34 +845,48 @@ def run_pipeline():
         metadata=pw.this.flat_results[1],
         chunks=pw.this.flat_results[0]
     )
+
+    @pw.udf
+    def parse_pinned_evidence(stored: str) -> tuple[list, list]:
+        import json
+        evidence = json.loads(stored)
+        return evidence["chunks"], [tuple(m) for m in evidence["metadata"]]
+
+    pinned_evidence = pinned_table.select(
+        story_id=pw.this.story_id,
+        backstory=pw.this.backstory,
+        character=pw.this.character,
+        book_name=pw.this.book_name,
+        evidence=parse_pinned_evidence(pw.this.stored_evidence)
+    ).select(
+        story_id=pw.this.story_id,
+        backstory=pw.this.backstory,
+        character=pw.this.character,
+        book_name=pw.this.book_name,
+        metadata=pw.this.evidence[1],
+        chunks=pw.this.evidence[0]
+    )
+    joined_table = pw.Table.concat_reindex(pinned_evidence, joined_table)
     
     # 6. Load Hierarchical Plot Maps (V5.0 — generated once, cached on disk)
-    plot_maps = {}
+    from src.reasoning.plot_map_index import PlotMapIndex
     plot_maps_dir = "Dataset/PlotMaps/"
+    plot_maps = PlotMapIndex(plot_maps_dir).load()
     if os.path.exists(plot_maps_dir):
-        for pm_file in os.listdir(plot_maps_dir):
-            if pm_file.endswith("_plot_map.txt"):
-                book_key = pm_file.replace("_plot_map.txt", "").lower().strip()
-                with open(os.path.join(plot_maps_dir, pm_file), 'r', encoding='utf-8') as f:
-                    plot_maps[book_key] = f.read()
-        print(f"[V5.0] Loaded {len(plot_maps)} Plot Maps: {list(plot_maps.keys())}")
+        print(f"[V5.0] Loaded {len(plot_maps)} Plot Maps: {list(plot_maps.maps.keys())}")
     else:
         print(f"[V5.0] WARNING: No Plot Maps directory found at {plot_maps_dir}")
 
+    # Entity -> book mention index (cached per book content in .entities_cache.pkl); built here,
+    # before the dataflow starts, so its spaCy worker processes are not forked from UDF threads
+    from src.reasoning.entity_tracker import get_entity_manager
+    entities = get_entity_manager(INPUT_BOOKS_DIR)
+    print(f"[ENTITIES] {len(entities.mentions) if entities else 0} entities indexed across the books")
+
     @pw.udf
     def get_plot_map(book_name: str) -> str:
-        """Look up the pre-generated plot map for a book."""
-        if not book_name:
-            return ""
-        # Normalize: "The Count of Monte Cristo.txt" → "the count of monte cristo"
-        norm = book_name.lower().replace(".txt", "").strip().strip('"').strip("'")
-        # Try direct match first, then substring match
-        if norm in plot_maps:
-            return plot_maps[norm]
-        for key, val in plot_maps.items():
-            if norm in key or key in norm:
-                return val
-        return ""
+        """Look up the pre-generated plot map for a book (exact key, then a cached substring match)."""
+        return plot_maps.text(book_name)
 
     # 7. Reasoning
     reasoning_table = joined_table.select(
@@ -432,25 +896,29 @@ def run_pipeline():
             pw.this.backstory,
             pw.this.chunks,
             pw.this.metadata,
-            pw.this.book_name
+            pw.this.book_name,
+            pw.this.character
         )
     )
 
     judged_table = reasoning_table.select(
         *pw.this,
         judgment_data=run_nli_evaluation(
+            pw.this.story_id,
             pw.this.backstory,
             pw.this.character,
             pw.this.chunks,
             pw.this.metadata,
             pw.this.programmatic_results,
-            pw.this.plot_map  # V5.0: Pass the Hierarchical Plot Map!
+            pw.this.plot_map,  # V5.0: Pass the Hierarchical Plot Map!
+            pw.this.book_name
         )
     ).select(
         *pw.this,
         judgment=pw.this.judgment_data[0],
         confidence=pw.this.judgment_data[1],
-        rationale=pw.this.judgment_data[2]
+        rationale=pw.this.judgment_data[2],
+        degradation=pw.this.judgment_data[3]
     )
 
     # 7. Final Output
@@ -458,24 +926,88 @@ def run_pipeline():
         **{"Story ID": pw.this.story_id},
         Prediction=parse_label(pw.this.judgment),
         Rationale=pw.this.rationale,
-        Confidence=pw.this.confidence
+        Confidence=pw.this.confidence,
+        Degradation=pw.this.degradation
     )
+
+    @pw.udf
+    def parse_stored_verdict(stored: str) -> tuple[str, str, str, str]:
+        import json
+        return tuple(json.loads(stored))
+
+    resumed_output = resumed_table.select(
+        story_id=pw.this.story_id,
+        judgment_data=parse_stored_verdict(pw.this.stored_verdict)
+    ).select(
+        **{"Story ID": pw.this.story_id},
+        Prediction=parse_label(pw.this.judgment_data[0]),
+        Rationale=pw.this.judgment_data[2],
+        Confidence=pw.this.judgment_data[1],
+        Degradation=pw.this.judgment_data[3]
+    )
+    output_table = pw.Table.concat_reindex(resumed_output, output_table)
     
-    pw.io.csv.write(output_table, OUTPUT_FILE)
+    # One row per Story ID, upserted as each story finishes (log: OUTPUT_FILE.log.jsonl).
+    # Secondary processes write their own part file, merged by process 0 after the run.
+    from src.pathway_pipeline.result_sink import ResultSink, RESULT_COLUMNS
+    sink_path = OUTPUT_FILE if primary else f"{OUTPUT_FILE}.part{process_id}"
+    sink = ResultSink(sink_path, RESULT_COLUMNS).attach(output_table)
     print(f"[LIFECYCLE] Executing Ensemble Inference (Static Pass)...")
     
     # In static mode, pw.run() terminates when data flows through
     pw.run()
+
+    if primary and processes > 1:
+        for pid in range(1, processes):
+            part = f"{OUTPUT_FILE}.part{pid}"
+            merged = sink.absorb(f"{part}.log.jsonl")
+            print(f"[WORKERS] Merged {merged} rows from process {pid}")
+            for path in (part, f"{part}.log.jsonl"):
+                if os.path.exists(path): os.remove(path)
+
+    from src.models.batch_jobs import get_batch_store
+    store = get_batch_store()
+    if store is not None:
+        print(store.summary())
+
+    from src.pathway_pipeline.checkpoints import get_checkpoint_store
+    checkpoints = get_checkpoint_store()
+    if checkpoints is not None:
+        print(f"[CHECKPOINT] Stage checkpoints ({checkpoints.path}):\n{checkpoints.summary()}")
+
+    from src.reasoning.cascade import CASCADE_STATS
+    if CASCADE_STATS.stages:
+        print(f"[CASCADE] Per-stage cost and early exits:\n{CASCADE_STATS.report()}")
+
+    from src.models.dossier import DOSSIERS
+    if DOSSIERS.dossiers:
+        print(f"[DOSSIER] Character evidence reuse:\n{DOSSIERS.report()}")
+
+    from src.reasoning.narrative_state import NARRATIVE_STATES
+    if NARRATIVE_STATES.states:
+        print(NARRATIVE_STATES.report())
+
+    from src.reasoning.constraint_rules import RULE_STATS
+    if RULE_STATS.rules:
+        print(f"[RULES] Per-rule cost:\n{RULE_STATS.report()}")
+
+    from src.reasoning.timeline_store import TIMELINES
+    if TIMELINES.timelines:
+        print(f"[TIMELINE] Per-character timelines:\n{TIMELINES.report()}")
+
+    from src.models.streaming import STREAM_STATS
+    if STREAM_STATS.models:
+        print(f"[STREAMING] Early-termination savings per model:\n{STREAM_STATS.report()}")
+
+    from src.models.model_health import get_health_tracker
+    health = get_health_tracker()
+    if health.aliases:
+        print(f"[HEALTH] Jury alias health:\n{health.report()}")
     
     # 8. Post-Run AUTOMATED EVALUATION
     try:
-        if os.path.exists(OUTPUT_FILE):
-             print(f"\n[LIFECYCLE] Inference Complete. Formatting {OUTPUT_FILE}...")
-             # Filter Pathway internal cols
-             df = pd.read_csv(OUTPUT_FILE)
-             cols = ["Story ID", "Prediction", "Rationale", "Confidence"]
-             final_df = df[[c for c in cols if c in df.columns]]
-             final_df.to_csv(OUTPUT_FILE, index=False)
+        if primary and os.path.exists(OUTPUT_FILE):
+             print(f"\n[LIFECYCLE] Inference Complete. {OUTPUT_FILE} is compacted by the result sink.")
              
              # TRIGGER ACCURACY
              from scripts.calculate_full_accuracy import calculate_full_accuracy
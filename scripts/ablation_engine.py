@@ -0,0 +1,289 @@
+"""
+ablation_engine.py — In-process ablation runs that share the index, retrieval and stage results.
+
+run_ablation.py and run_full_ablation.py used to start `python main.py` once
+per configuration, so every configuration re-ingested the books, re-embedded
+the chunks and re-judged every story. Here all configurations run in one
+process, concurrently, and share every artifact whose inputs they agree on:
+
+  index         the whole-book chunk index (get_book_index, embeddings cached on disk)
+  claims        per story: main.py's LLM claim decomposition (decompose_backstory)
+  claim hits    per retrieval query: the top-k chunks of the story's book
+  evidence      per (queries, fusion): fused chunks and chunk refs
+  programmatic  per evidence set: the rule-based conflicts
+  identity, nli, jury
+                the cascade stages, through an in-memory ArtifactStore passed as
+                the story's checkpoint store (keyed by their input fingerprints)
+
+Nothing is read from or written to the on-disk checkpoint database, so a
+production run's state never leaks into an ablation.
+
+A configuration therefore only recomputes from the first stage whose inputs it
+changes: switching reranking off changes the NLI result and, through it, the
+jury prompt; the plot-map mode changes only the jury prompt; identity is shared
+by all. Two configurations that build the same jury prompt share one jury call.
+
+Configuration knobs (DEFAULT_CONFIG):
+
+  expansion     each decomposed claim is retrieved and the lists are fused
+                (off: one query with the whole backstory)
+  rerank        cross-encoder reranking of the evidence before NLI
+  dual_pass     DA-guided re-retrieval and second jury pass
+  plot_map      "targeted" | "full" | "off"
+  programmatic  programmatic conflicts (off: the stage never vetoes)
+  fusion, top_n cross-claim fusion method and evidence size
+  decisive      CASCADE_DECISIVE-style early-exit overrides
+
+The old --use-expansion / --use-rerank / --use-dual-pass flags map onto the
+first three (config_from_flags); "Full Suite" switches on the same stages and
+settings as main.py.
+
+What is approximated: retrieval. main.py searches a Pathway VectorStoreServer
+over chapters split by TokenCountSplitter (200-800 tokens); here each query
+searches the BookChunkIndex, fixed 1500-character windows with 200 characters
+of overlap, embedded with the same model. The evidence, and therefore every
+later stage, can differ from a main.py run, so the accuracies measure this
+approximation of the pipeline. Configurations are compared with each other on
+the same retrieval, not with main.py's results.
+"""
+
+import os
+import sys
+import csv
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.append(os.getcwd())
+
+BOOKS_DIR = "Dataset/Books/"
+PLOT_MAPS_DIR = "Dataset/PlotMaps/"
+RETRIEVAL_K = int(os.getenv("ABLATION_RETRIEVAL_K", "20"))
+ABLATION_WORKERS = int(os.getenv("ABLATION_WORKERS", "4"))
+
+DEFAULT_CONFIG = {
+    "expansion": True,
+    "rerank": True,
+    "dual_pass": True,
+    "plot_map": "targeted",
+    "programmatic": True,
+    "fusion": None,  # None: FUSION_METHOD
+    "top_n": None,  # None: FUSION_TOP_N
+    "decisive": None,  # None: CASCADE_DECISIVE
+}
+
+LEGACY_FLAGS = {"--use-expansion": "expansion", "--use-rerank": "rerank", "--use-dual-pass": "dual_pass"}
+
+DISABLED_PROGRAMMATIC = '{"verdict": "Consistent", "reason": "Programmatic stage disabled"}'
+
+
+def config_from_flags(flags: List[str], **overrides) -> dict:
+    """Configuration for the old main.py flag list: unlisted flags are switched off."""
+    unknown = [f for f in flags if f not in LEGACY_FLAGS]
+    if unknown:
+        raise ValueError(f"Unknown ablation flags: {unknown}")
+    config = dict(DEFAULT_CONFIG, **{knob: False for knob in LEGACY_FLAGS.values()})
+    config.update({LEGACY_FLAGS[f]: True for f in flags})
+    config.update(overrides)
+    return config
+
+
+def label_value(label: str) -> int:
+    return 0 if label.strip().lower() == "contradict" else 1
+
+
+def prediction_value(judgment: str) -> int:
+    return 0 if (judgment and judgment.lower() == "contradictory") else 1
+
+
+def accuracy(predictions: Dict[str, int], labels: Dict[str, int]) -> Tuple[float, int, int]:
+    """(accuracy %, correct, total) over the stories with both a label and a prediction."""
+    scored = [sid for sid in labels if sid in predictions]
+    correct = sum(predictions[sid] == labels[sid] for sid in scored)
+    return (correct / len(scored) * 100 if scored else 0.0), correct, len(scored)
+
+
+class ArtifactStore:
+    """
+    In-memory stand-in for CheckpointStore, shared by every configuration.
+
+    Unlike the SQLite store it keeps every fingerprint of a stage, so
+    configurations that feed a stage different inputs do not evict each other.
+    A miss claims the key for the calling thread: other threads asking for it
+    wait until it is stored (or released), so each result is computed once.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.values: Dict[tuple, object] = {}
+        self.pending: Dict[tuple, int] = {}
+        self.hits: Dict[str, int] = {}
+        self.writes: Dict[str, int] = {}
+
+    def get(self, story_id, stage: str, fp: str):
+        key = (str(story_id), stage, fp)
+        me = threading.get_ident()
+        with self._cond:
+            while key not in self.values and self.pending.get(key, me) != me:
+                self._cond.wait()
+            if key in self.values:
+                self.hits[stage] = self.hits.get(stage, 0) + 1
+                return self.values[key]
+            self.pending[key] = me
+            return None
+
+    def put(self, story_id, stage: str, fp: str, value):
+        key = (str(story_id), stage, fp)
+        with self._cond:
+            self.values[key] = value
+            self.pending.pop(key, None)
+            self.writes[stage] = self.writes.get(stage, 0) + 1
+            self._cond.notify_all()
+
+    def release(self):
+        """Drop the calling thread's claims that were never stored (failed or uncheckpointable results)."""
+        me = threading.get_ident()
+        with self._cond:
+            for key in [k for k, owner in self.pending.items() if owner == me]:
+                del self.pending[key]
+            self._cond.notify_all()
+
+    def compute(self, story_id, stage: str, fp: str, build: Callable[[], object]):
+        value = self.get(story_id, stage, fp)
+        if value is None:
+            try:
+                value = build()
+            except BaseException:
+                self.release()
+                raise
+            self.put(story_id, stage, fp, value)
+        return value
+
+    def report(self) -> str:
+        lines = [f"{'Artifact':<18} {'Built':>6} {'Reused':>7}"]
+        with self._cond:
+            for stage in sorted(set(self.writes) | set(self.hits)):
+                lines.append(f"{stage:<18} {self.writes.get(stage, 0):>6} {self.hits.get(stage, 0):>7}")
+        return "\n".join(lines)
+
+
+class AblationEngine:
+    def __init__(self, input_file: str, books_dir: str = BOOKS_DIR, plot_maps_dir: str = PLOT_MAPS_DIR,
+                 k: int = RETRIEVAL_K, limit: Optional[int] = None):
+        with open(input_file, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        self.stories = [{"id": str(r["id"]), "book": r["book_name"], "character": r["char"],
+                         "backstory": r["content"], "label": r.get("label", "")} for r in rows[:limit]]
+        self.labels = {s["id"]: label_value(s["label"]) for s in self.stories if s["label"]}
+        self.books_dir = books_dir
+        self.plot_maps_dir = plot_maps_dir
+        self.k = k
+        self.store = ArtifactStore()
+        self._index = None
+        self._plot_maps = None
+
+    def prepare(self):
+        """Shared artifacts every configuration needs, built once before the configurations start."""
+        from src.pathway_pipeline.book_index import get_book_index
+        from src.reasoning.plot_map_index import PlotMapIndex
+        import main  # Imported once here, not concurrently from the configuration threads
+        self._index = get_book_index(self.books_dir)
+        self._plot_maps = PlotMapIndex(self.plot_maps_dir).load()
+        for book in sorted({s["book"] for s in self.stories}):
+            key = self._index.resolve_book(book)
+            if key:
+                self._index.book(key)
+        return self
+
+    # ---- shared, configuration-independent artifacts ----
+
+    def claims(self, story: dict) -> List[str]:
+        """main.py's LLM claim decomposition (prompt, parsing, retries and fallback), kept in self.store."""
+        import main
+        # A story whose fallback split yields no claims is still retrieved with one query
+        return main.decompose_backstory(story["backstory"]) or [story["backstory"]]
+
+    def claim_hits(self, story: dict, query: str) -> list:
+        from src.pathway_pipeline.checkpoints import fingerprint
+        return self.store.compute(story["id"], "claim_hits", fingerprint(query, story["book"], self.k),
+                                  lambda: self._index.search(query, k=self.k, book=story["book"] or None))
+
+    def evidence(self, story: dict, config: dict) -> dict:
+        """Fused chunks and RETRIEVAL_FIELDS chunk refs, shaped like main.py's (BookChunkIndex windows, see above)."""
+        from src.pathway_pipeline.checkpoints import fingerprint
+        from src.pathway_pipeline.fusion import FUSION_METHOD, FUSION_TOP_N, chunk_id, fuse, ranked_ids
+        queries = self.store.compute(story["id"], "claims", fingerprint(story["backstory"]),
+                                     lambda: self.claims(story)) if config["expansion"] else [story["backstory"]]
+        method, top_n = config["fusion"] or FUSION_METHOD, config["top_n"] or FUSION_TOP_N
+
+        def build():
+            per_query = [self.claim_hits(story, q) for q in queries]
+            by_id = {chunk_id(h["text"]): h for hits in per_query for h in hits}
+            fused = fuse([ranked_ids([chunk_id(h["text"]) for h in hits], [h["score"] for h in hits])
+                          for hits in per_query], method, top_n)
+            return {
+                "chunks": [by_id[cid]["text"] for cid, _ in fused],
+                "metadata": [[cid, by_id[cid]["book"], by_id[cid]["chapter"], by_id[cid]["progress_pct"],
+                              by_id[cid]["start"], by_id[cid]["end"], score] for cid, score in fused],
+            }
+        return self.store.compute(story["id"], "evidence", fingerprint(queries, method, top_n, self.k), build)
+
+    def programmatic(self, story: dict, evidence: dict) -> str:
+        from src.pathway_pipeline.checkpoints import fingerprint
+        import main
+        fp = fingerprint(story["backstory"], story["character"], story["book"], [m[0] for m in evidence["metadata"]])
+        return self.store.compute(story["id"], "programmatic", fp, lambda: main.programmatic_reasoning(
+            story["backstory"], evidence["chunks"], evidence["metadata"], story["book"], story["character"]))
+
+    # ---- one configuration ----
+
+    def judge(self, story: dict, config: dict, cascade) -> str:
+        import main
+        try:
+            evidence = self.evidence(story, config)
+            programmatic = self.programmatic(story, evidence) if config["programmatic"] else DISABLED_PROGRAMMATIC
+            ctx = {
+                "backstory": story["backstory"], "book_character": story["character"],
+                "chunks": evidence["chunks"], "metadata": evidence["metadata"],
+                "programmatic_results": programmatic, "plot_map": self._plot_maps.text(story["book"]),
+                "deadline": None, "book_name": story["book"], "story_id": story["id"],
+                "checkpoints": self.store,
+                "formatted": main.format_evidence_chunks(evidence["chunks"], evidence["metadata"]),
+                "rerank": config["rerank"], "da_reretrieval": config["dual_pass"],
+                "plot_map_context": config["plot_map"],
+            }
+            judgment, _, _ = cascade.run(ctx)
+            return judgment
+        except Exception as e:
+            print(f"[ABLATION] Story {story['id']} failed: {e}")
+            return "Consistent"
+        finally:
+            self.store.release()
+
+    def run_config(self, name: str, config: dict) -> dict:
+        import main
+        from src.reasoning.cascade import CascadeStats
+        config = dict(DEFAULT_CONFIG, **config)
+        started = time.time()
+        try:
+            # Fresh stages and stats: decisive overrides must not leak into other configurations
+            cascade = main.build_story_cascade(config["decisive"], CascadeStats())
+        except Exception as e:
+            print(f"[ABLATION] {name}: invalid configuration ({e})")
+            return {"name": name, "accuracy": 0.0, "correct": 0, "total": 0, "success": False}
+        predictions = {s["id"]: prediction_value(self.judge(s, config, cascade)) for s in self.stories}
+        acc, correct, total = accuracy(predictions, self.labels)
+        print(f"[ABLATION] {name}: {acc:.2f}% ({correct}/{total}) in {time.time() - started:.1f}s")
+        print(cascade.stats.report())
+        return {"name": name, "accuracy": float(acc), "correct": int(correct), "total": int(total), "success": True}
+
+    def run(self, experiments: List[Tuple[str, dict]], workers: int = ABLATION_WORKERS) -> List[dict]:
+        """Summary rows in experiment order ({"name", "accuracy", "correct", "total", "success"})."""
+        if self._index is None:
+            self.prepare()
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(experiments)))) as pool:
+            futures = [pool.submit(self.run_config, name, config) for name, config in experiments]
+            summary = [f.result() for f in futures]
+        print(self.store.report())
+        return summary
@@ -0,0 +1,392 @@
+"""
+benchmark_stages.py — Per-stage timings on fixed inputs, with a JSON baseline and a regression gate.
+
+Each stage runs in isolation on the same inputs every time: the books in
+Dataset/Books/ and the first --stories rows of the input CSV (by id). Setup
+work such as loading models, building the index the later stages search or
+starting the mock rotator is not timed.
+
+  chapters   split_chapters + window_chunks over every book
+  index      BookChunkIndex embeddings for every book (no disk cache)
+  retrieval  BookChunkIndex whole-book search (1500-character windows) for each
+             backstory sentence + evidence fusion. This times the in-process
+             index, not main.py's Pathway VectorStoreServer, and the sentence
+             split stands in for the LLM claim decomposition
+  rerank     cross-encoder reranking of each story's fused evidence
+  nli        evaluate_backstory_nli on each story's fused evidence
+  prompt     jury prompt building with the targeted plot-map context
+  jury       ConsistencyJudge.judge_single against scripts/mock_llm_server.py
+
+A stage whose dependencies are not installed is reported as skipped. Every
+stage gets --warmup untimed runs and --repeat timed runs; the median is compared.
+
+With --write-baseline the results become the baseline. Otherwise they are
+compared with it, and the exit status is 1 when a stage failed or its median
+is more than its threshold slower than the baseline's (--threshold, per stage
+with BENCH_THRESHOLDS='{"jury": 0.5}'). Differences below --min-delta seconds
+are treated as noise. A baseline taken with other workload settings (input,
+stories, mock time scale) is not compared at all: the exit status is 2.
+
+Usage:
+    python scripts/benchmark_stages.py [--stages chapters,index,...] [--stories 8] [--repeat 5]
+                                       [--baseline stage_benchmark_baseline.json] [--write-baseline]
+                                       [--threshold 0.25] [--time-scale 0.1] [--output stage_benchmark.json]
+"""
+
+import os
+import re
+import sys
+import csv
+import json
+import time
+import argparse
+import platform
+import statistics
+import threading
+import importlib.util
+from datetime import datetime
+
+sys.path.append(os.getcwd())
+
+BOOKS_DIR = "Dataset/Books/"
+PLOT_MAPS_DIR = "Dataset/PlotMaps/"
+MODEL_DEPS = ("torch", "sentence_transformers", "spacy")
+CLAIM_SPLIT = re.compile(r"(?<=[.!?;])\s+")
+STAGE_THRESHOLDS = json.loads(os.getenv("BENCH_THRESHOLDS", "") or "{}")
+# Settings that change what the stages do; timings taken with different values are not comparable
+WORKLOAD_SETTINGS = ("input", "stories", "time_scale")
+
+
+class Fixture:
+    """Fixed benchmark inputs, plus the shared resources later stages build on (created lazily)."""
+
+    def __init__(self, input_file: str, stories: int, books_dir: str = BOOKS_DIR, time_scale: float = 0.1,
+                 port: int = 8102):
+        from src.pathway_pipeline.book_index import BookChunkIndex
+        self.books_dir = books_dir
+        self.time_scale = time_scale
+        self.port = port
+        self.texts = BookChunkIndex(books_dir, cache_dir=None)
+        self.books = {key: self.texts.book_text(key)["text"] for key in self.texts.book_files()}
+        self.stories = self.load_stories(input_file, stories)
+        self._index = None
+        self._evidence = None
+
+    def load_stories(self, input_file: str, limit: int) -> list:
+        with open(input_file, "r", encoding="utf-8") as f:
+            rows = sorted(csv.DictReader(f), key=lambda r: int(r["id"]) if str(r["id"]).isdigit() else 0)
+        stories = []
+        for row in rows:
+            book = self.texts.resolve_book(row.get("book_name", ""))
+            if not book or not row.get("content"):
+                continue
+            claims = [c.strip() for c in CLAIM_SPLIT.split(row["content"]) if len(c.strip()) > 8] or [row["content"]]
+            stories.append({"id": row["id"], "book": book, "character": row.get("char", ""),
+                             "backstory": row["content"], "claims": claims})
+            if len(stories) >= limit:
+                break
+        return stories
+
+    def models(self):
+        from src.models.nli_judge import get_models
+        return get_models()
+
+    def index(self):
+        """Whole-book index with every book's embeddings built (shared by retrieval and later stages)."""
+        if self._index is None:
+            from src.pathway_pipeline.book_index import BookChunkIndex
+            index = BookChunkIndex(self.books_dir, encoder=self.models()[1], cache_dir=None)
+            for key in index.book_files():
+                index.book(key)
+            self._index = index
+        return self._index
+
+    def evidence(self) -> list:
+        """Per story, the fused evidence as formatted chunks ({"text", "chapter", "progress_pct"})."""
+        if self._evidence is None:
+            self._evidence = [retrieve_story(self.index(), s) for s in self.stories]
+        return self._evidence
+
+    def keyword_evidence(self, story: dict, limit: int = 20) -> list:
+        """Model-free evidence: the book's windows that mention the character, in book order."""
+        from src.pathway_pipeline.book_index import window_chunks
+        text = self.books[story["book"]]
+        names = [w for w in re.findall(r"[A-Z][\w'’-]+", story["character"]) if len(w) > 3] or [story["character"]]
+        chunks = []
+        for chapter, start, end in window_chunks(text):
+            if any(n in text[start:end] for n in names):
+                chunks.append({"text": text[start:end], "chapter": chapter,
+                               "progress_pct": round(start / max(len(text), 1) * 100, 1)})
+                if len(chunks) >= limit:
+                    break
+        return chunks
+
+
+def retrieve_story(index, story: dict, k: int = 20) -> list:
+    """A story's claims searched over its book and fused, as the pipeline's retrieval step does."""
+    from src.pathway_pipeline.fusion import chunk_id, fuse, ranked_hits
+    by_text = {}
+    claim_hits = []
+    for claim in story["claims"]:
+        hits = index.search(claim, k=k, book=story["book"])
+        for h in hits:
+            by_text.setdefault(h["text"], h)
+        claim_hits.append(ranked_hits([h["text"] for h in hits], [h["score"] for h in hits]))
+    by_id = {chunk_id(t): h for t, h in by_text.items()}
+    return [{"text": by_id[cid]["text"], "chapter": by_id[cid]["chapter"], "progress_pct": by_id[cid]["progress_pct"]}
+            for cid, _ in fuse(claim_hits) if cid in by_id]
+
+
+# ============================================================
+# Stages: setup(fixture) -> {"run": fn, "items": n, "close": fn (optional)}
+# ============================================================
+
+def setup_chapters(fx: Fixture) -> dict:
+    from src.pathway_pipeline.book_index import split_chapters, window_chunks
+
+    def run():
+        for text in fx.books.values():
+            split_chapters(text)
+            window_chunks(text)
+    return {"run": run, "items": len(fx.books)}
+
+
+def setup_index(fx: Fixture) -> dict:
+    from src.pathway_pipeline.book_index import BookChunkIndex
+    encoder = fx.models()[1]
+
+    def run():
+        index = BookChunkIndex(fx.books_dir, encoder=encoder, cache_dir=None)
+        for key in index.book_files():
+            index.book(key)
+    return {"run": run, "items": len(fx.books)}
+
+
+def setup_retrieval(fx: Fixture) -> dict:
+    # The in-process BookChunkIndex, not the VectorStoreServer main.py queries
+    index = fx.index()
+
+    def run():
+        for story in fx.stories:
+            retrieve_story(index, story)
+    return {"run": run, "items": sum(len(s["claims"]) for s in fx.stories)}
+
+
+def setup_rerank(fx: Fixture) -> dict:
+    _, _, _, reranker = fx.models()
+    pairs = [[(s["backstory"], c["text"]) for c in ev] for s, ev in zip(fx.stories, fx.evidence())]
+
+    def run():
+        for story_pairs in pairs:
+            if story_pairs:
+                reranker.predict(story_pairs)
+    return {"run": run, "items": len(pairs)}
+
+
+def setup_nli(fx: Fixture) -> dict:
+    from src.models.nli_judge import evaluate_backstory_nli
+    fx.models()
+    evidence = fx.evidence()
+
+    def run():
+        for story, chunks in zip(fx.stories, evidence):
+            evaluate_backstory_nli(story["backstory"], chunks)
+    return {"run": run, "items": len(fx.stories)}
+
+
+def build_prompts(fx: Fixture) -> list:
+    from src.models.llm_judge import build_consistency_prompt
+    from src.reasoning.narrative_state import extract_years
+    from src.reasoning.plot_map_index import PlotMapIndex, plot_context
+    plot_maps = PlotMapIndex(PLOT_MAPS_DIR).load()
+    prompts = []
+    for story in fx.stories:
+        evidence = "\n".join(f"- [{c['chapter']}] {c['text'][:450]}" for c in fx.keyword_evidence(story))
+        plot_map = plot_maps.text(story["book"])
+        context = plot_context(plot_map, story["character"], extract_years(story["backstory"])) if len(plot_map) > 50 else ""
+        prompts.append(build_consistency_prompt(story["backstory"], story["character"], evidence, "", context))
+    return prompts
+
+
+def setup_prompt(fx: Fixture) -> dict:
+    return {"run": lambda: build_prompts(fx), "items": len(fx.stories)}
+
+
+def setup_jury(fx: Fixture) -> dict:
+    from scripts.mock_llm_server import serve
+    httpd = serve(fx.port, "", "rule", seed=7, time_scale=fx.time_scale)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    os.environ["OPENAI_API_BASE"] = f"http://127.0.0.1:{httpd.server_address[1]}/v1"
+    os.environ["OPENAI_API_KEY"] = "sk-mock"
+    from src.models.llm_judge import ConsistencyJudge
+    judge = ConsistencyJudge()
+    prompts = build_prompts(fx)
+
+    def run():
+        for prompt in prompts:
+            judge.judge_single(prompt, jitter=False)
+
+    def close():
+        httpd.shutdown()
+        httpd.server_close()
+    return {"run": run, "items": len(prompts), "close": close}
+
+
+# name -> (setup, modules it needs)
+STAGES = {
+    "chapters": (setup_chapters, ()),
+    "index": (setup_index, MODEL_DEPS),
+    "retrieval": (setup_retrieval, MODEL_DEPS),
+    "rerank": (setup_rerank, MODEL_DEPS),
+    "nli": (setup_nli, MODEL_DEPS),
+    "prompt": (setup_prompt, ("pathway",)),
+    "jury": (setup_jury, ("pathway", "openai")),
+}
+
+
+def missing_modules(modules) -> list:
+    return [m for m in modules if importlib.util.find_spec(m) is None]
+
+
+def time_stage(run, repeat: int, warmup: int = 1) -> list:
+    for _ in range(warmup):
+        run()
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def run_stage(name: str, fx: Fixture, repeat: int, warmup: int) -> dict:
+    setup, requires = STAGES[name]
+    missing = missing_modules(requires)
+    if missing:
+        print(f">>> {name}: skipped (missing {', '.join(missing)})", flush=True)
+        return {"status": "skipped", "reason": f"missing {', '.join(missing)}"}
+    print(f">>> {name}", flush=True)
+    stage = None
+    try:
+        stage = setup(fx)
+        seconds = time_stage(stage["run"], repeat, warmup)
+    except Exception as e:
+        print(f"    failed: {e}", flush=True)
+        return {"status": "failed", "reason": str(e)}
+    finally:
+        if stage and stage.get("close"):
+            stage["close"]()
+    median = statistics.median(seconds)
+    items = max(stage["items"], 1)
+    print(f"    median {median:.4f}s over {repeat} runs ({median / items * 1000:.2f} ms per item, {items} items)",
+          flush=True)
+    return {"status": "ok", "median_s": round(median, 6), "min_s": round(min(seconds), 6),
+            "max_s": round(max(seconds), 6), "runs": len(seconds), "items": stage["items"],
+            "per_item_ms": round(median / items * 1000, 4)}
+
+
+def compare(current: dict, baseline: dict, threshold: float, thresholds: dict = None, min_delta: float = 0.0) -> list:
+    """Regressions of `current` stage results against `baseline` ones, as readable lines."""
+    thresholds = thresholds or {}
+    problems = []
+    for name, result in current.items():
+        if result.get("status") == "failed":
+            problems.append(f"{name}: failed ({result.get('reason', '')})")
+            continue
+        base = baseline.get(name, {})
+        if result.get("status") != "ok" or base.get("status") != "ok":
+            continue
+        limit = base["median_s"] * (1 + thresholds.get(name, threshold))
+        if result["median_s"] > limit and result["median_s"] - base["median_s"] > min_delta:
+            change = (result["median_s"] / base["median_s"] - 1) * 100 if base["median_s"] > 0 else float("inf")
+            problems.append(f"{name}: median {result['median_s']:.4f}s vs baseline {base['median_s']:.4f}s "
+                            f"(+{change:.0f}%, limit +{thresholds.get(name, threshold) * 100:.0f}%)")
+    return problems
+
+
+def settings_mismatch(current: dict, baseline: dict) -> list:
+    """Workload settings that differ between a run and its baseline, as readable lines."""
+    return [f"{key}: baseline {baseline.get(key)!r}, this run {current.get(key)!r}"
+            for key in WORKLOAD_SETTINGS if baseline.get(key) != current.get(key)]
+
+
+def environment() -> dict:
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "torch_threads": os.getenv("TORCH_NUM_THREADS", "")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage benchmark with a JSON baseline and regression gate")
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--input", default="Dataset/train_fixed.csv")
+    parser.add_argument("--stories", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--baseline", default="stage_benchmark_baseline.json")
+    parser.add_argument("--write-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown of a stage's median (0.25 = +25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.005, help="slowdowns below this many seconds are noise")
+    parser.add_argument("--port", type=int, default=8102)
+    parser.add_argument("--time-scale", type=float, default=0.1, help="mock rotator delay multiplier")
+    parser.add_argument("--output", default="stage_benchmark.json")
+    args = parser.parse_args()
+
+    names = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in names if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages {unknown} (expected some of {list(STAGES)})")
+
+    fx = Fixture(args.input, args.stories, time_scale=args.time_scale, port=args.port)
+    print(f"Fixture: {len(fx.books)} books, {len(fx.stories)} stories from {args.input}")
+    stages = {name: run_stage(name, fx, args.repeat, args.warmup) for name in names}
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "settings": {"input": args.input, "stories": len(fx.stories), "repeat": args.repeat, "warmup": args.warmup,
+                     "time_scale": args.time_scale},
+        "stages": stages,
+    }
+
+    print("\n" + "=" * 62)
+    print(f"{'Stage':<10} {'Status':<8} {'Median s':>10} {'Min s':>10} {'ms/item':>10} {'Items':>7}")
+    print("-" * 62)
+    for name, r in stages.items():
+        if r["status"] == "ok":
+            print(f"{name:<10} {'ok':<8} {r['median_s']:>10.4f} {r['min_s']:>10.4f} {r['per_item_ms']:>10.2f} {r['items']:>7}")
+        else:
+            print(f"{name:<10} {r['status']:<8} {r.get('reason', '')}")
+    print("=" * 62)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results saved to {args.output}")
+
+    if args.write_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Baseline written to {args.baseline}")
+        sys.exit(1 if any(r["status"] == "failed" for r in stages.values()) else 0)
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --write-baseline first. Nothing to compare.")
+        sys.exit(0)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    mismatched = settings_mismatch(report["settings"], baseline.get("settings", {}))
+    if mismatched:
+        print(f"Baseline {args.baseline} was taken with other settings; refusing to compare:")
+        for m in mismatched:
+            print(f"  {m}")
+        print("Re-run with the baseline's settings, or record a new baseline with --write-baseline.")
+        sys.exit(2)
+    problems = compare(stages, baseline.get("stages", {}), args.threshold, STAGE_THRESHOLDS, args.min_delta)
+    if problems:
+        print("REGRESSIONS:")
+        for p in problems:
+            print(f"  {p}")
+        sys.exit(1)
+    print(f"No stage regressed beyond its threshold (default +{args.threshold * 100:.0f}%).")
+
+
+if __name__ == "__main__":
+    main()
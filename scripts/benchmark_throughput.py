@@ -0,0 +1,130 @@
+"""
+benchmark_throughput.py — End-to-end throughput of main.py against the mock rotator.
+
+Starts scripts/mock_llm_server.py in-process, then runs `python main.py` once per
+combination of the swept settings with OPENAI_API_BASE pointed at the mock and a
+private OUTPUT_FILE, and reports stories per minute. The swept settings are:
+
+  --concurrency         PATHWAY_THREADS (worker threads)
+  --decompose-capacity  DECOMPOSE_CAPACITY (stories in flight in claim decomposition)
+  --jury-capacity       JURY_CAPACITY (stories in flight in the jury stage)
+
+The capacities default to main.py's defaults, so only the thread count varies
+unless they are given as lists.
+
+Usage:
+    python scripts/benchmark_throughput.py [--concurrency 1,2,4] [--jury-capacity 2,4,8]
+                                           [--decompose-capacity 8] [--input Dataset/train_fixed.csv]
+                                           [--mock-config mock.json] [--time-scale 1.0]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import tempfile
+import threading
+import subprocess
+
+sys.path.append(os.getcwd())
+from scripts.mock_llm_server import serve
+
+
+def count_rows(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    import csv
+    with open(path, "r", encoding="utf-8") as f:
+        return sum(1 for _ in csv.DictReader(f))
+
+
+def run_main(label: str, extra_env: dict, port: int, input_file: str, timeout: int, command: list = None) -> dict:
+    """Run main.py (or `command`) once against the mock rotator and time it."""
+    workdir = tempfile.mkdtemp(prefix=f"bench_{label}_")
+    output_file = os.path.join(workdir, "results.csv")
+    log_file = os.path.join(workdir, "main.log")
+
+    env = os.environ.copy()
+    env.update({
+        "OPENAI_API_BASE": f"http://127.0.0.1:{port}/v1",
+        "OPENAI_API_KEY": "sk-mock",
+        "INPUT_DATA": input_file,
+        "OUTPUT_FILE": output_file,
+        # Every run starts cold: no checkpoints carried over from other settings
+        "CHECKPOINT_DB": os.path.join(workdir, "checkpoints.sqlite"),
+    })
+    env.update(extra_env)
+
+    print(f">>> {label} (log: {log_file})", flush=True)
+    start = time.time()
+    ok = True
+    try:
+        with open(log_file, "w") as log:
+            subprocess.run(command or [sys.executable, "main.py"], env=env, stdout=log, stderr=log, check=True, timeout=timeout)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError) as e:
+        print(f"    run failed: {e}")
+        ok = False
+    elapsed = time.time() - start
+
+    stories = count_rows(output_file)
+    per_minute = stories / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"    {stories} stories in {elapsed:.1f}s -> {per_minute:.2f} stories/min", flush=True)
+    return {"stories": stories, "seconds": round(elapsed, 2), "stories_per_minute": round(per_minute, 2), "success": ok}
+
+
+def int_list(value: str) -> list:
+    return [int(x) for x in value.split(",") if x.strip()]
+
+
+def run_once(concurrency: int, port: int, input_file: str, timeout: int, decompose_capacity: int = 8,
+             jury_capacity: int = 4) -> dict:
+    env = {"PATHWAY_THREADS": str(concurrency), "DECOMPOSE_CAPACITY": str(decompose_capacity),
+           "JURY_CAPACITY": str(jury_capacity)}
+    result = run_main(f"c{concurrency}_d{decompose_capacity}_j{jury_capacity}", env, port, input_file, timeout)
+    return {"concurrency": concurrency, "decompose_capacity": decompose_capacity, "jury_capacity": jury_capacity,
+            **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark for main.py")
+    parser.add_argument("--concurrency", default="1,2,4")
+    parser.add_argument("--decompose-capacity", default="8", help="DECOMPOSE_CAPACITY values to sweep")
+    parser.add_argument("--jury-capacity", default="4", help="JURY_CAPACITY values to sweep")
+    parser.add_argument("--input", default="Dataset/train_fixed.csv")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--mock-config", default="")
+    parser.add_argument("--verdict", default="rule", choices=["rule", "consistent", "contradictory"])
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--timeout", type=int, default=3600)
+    parser.add_argument("--output", default="throughput_benchmark.json")
+    args = parser.parse_args()
+
+    httpd = serve(args.port, args.mock_config, args.verdict, seed=7, time_scale=args.time_scale)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    print(f"Mock rotator on http://127.0.0.1:{args.port}/v1")
+
+    results = []
+    try:
+        for c, d, j in itertools.product(int_list(args.concurrency), int_list(args.decompose_capacity),
+                                         int_list(args.jury_capacity)):
+            results.append(run_once(c, args.port, args.input, args.timeout, d, j))
+    finally:
+        httpd.shutdown()
+
+    print("\n" + "=" * 70)
+    print(f"{'Concurrency':<12} {'Decompose':>10} {'Jury':>6} {'Stories':>8} {'Seconds':>10} {'Stories/min':>12}")
+    print("-" * 70)
+    for r in results:
+        print(f"{r['concurrency']:<12} {r['decompose_capacity']:>10} {r['jury_capacity']:>6} {r['stories']:>8} "
+              f"{r['seconds']:>10.1f} {r['stories_per_minute']:>12.2f}")
+    print("=" * 70)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
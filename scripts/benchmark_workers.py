@@ -0,0 +1,74 @@
+"""
+benchmark_workers.py — Scaling of main.py across Pathway workers (offline, mock rotator).
+
+Runs the full pipeline once per worker count against scripts/mock_llm_server.py
+and reports stories per minute and speedup over one worker.
+  --mode threads    one process with PATHWAY_THREADS=N
+  --mode processes  `pathway spawn --processes N --threads 1 python main.py`
+Torch intra-op threads are split across workers by src/models/workers.py.
+
+Usage:
+    python scripts/benchmark_workers.py [--workers 1,2,4,8] [--mode threads|processes]
+                                        [--input Dataset/train_fixed.csv] [--time-scale 1.0]
+"""
+
+import os
+import sys
+import json
+import argparse
+import threading
+
+sys.path.append(os.getcwd())
+from scripts.mock_llm_server import serve
+from scripts.benchmark_throughput import run_main
+
+
+def run_workers(workers: int, mode: str, port: int, input_file: str, timeout: int) -> dict:
+    if mode == "processes":
+        command = ["pathway", "spawn", "--processes", str(workers), "--threads", "1", sys.executable, "main.py"]
+        result = run_main(f"p{workers}", {}, port, input_file, timeout, command=command)
+    else:
+        result = run_main(f"t{workers}", {"PATHWAY_THREADS": str(workers)}, port, input_file, timeout)
+    return {"workers": workers, "mode": mode, **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pathway worker scaling benchmark for main.py")
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--mode", default="threads", choices=["threads", "processes"])
+    parser.add_argument("--input", default="Dataset/train_fixed.csv")
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--mock-config", default="")
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--timeout", type=int, default=3600)
+    parser.add_argument("--output", default="worker_scaling_benchmark.json")
+    args = parser.parse_args()
+
+    httpd = serve(args.port, args.mock_config, "rule", seed=7, time_scale=args.time_scale)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    print(f"Mock rotator on http://127.0.0.1:{args.port}/v1")
+
+    results = []
+    try:
+        for n in [int(x) for x in args.workers.split(",") if x.strip()]:
+            results.append(run_workers(n, args.mode, args.port, args.input, args.timeout))
+    finally:
+        httpd.shutdown()
+
+    base = next((r["stories_per_minute"] for r in results if r["success"] and r["stories_per_minute"] > 0), 0.0)
+    print("\n" + "=" * 60)
+    print(f"{'Workers':<8} {'Mode':<10} {'Stories':>8} {'Seconds':>10} {'Stories/min':>12} {'Speedup':>8}")
+    print("-" * 60)
+    for r in results:
+        r["speedup"] = round(r["stories_per_minute"] / base, 2) if base else 0.0
+        print(f"{r['workers']:<8} {r['mode']:<10} {r['stories']:>8} {r['seconds']:>10.1f} "
+              f"{r['stories_per_minute']:>12.2f} {r['speedup']:>7.2f}x")
+    print("=" * 60)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,16 +9,42 @@ Architecture:
   2. Summarize each window into 2 sentences (Pass 1)
   3. If >15 windows: group summaries into clusters of 8, summarize each cluster (Pass 2)
   4. Synthesize all summaries into a structured 600-word Plot Map (Final Pass)
+
+Window and cluster summaries run concurrently (PLOT_MAP_CONCURRENCY requests
+in flight) under a per-model request rate (PLOT_MAP_RPM, e.g.
+'{"groq-llama-small": 60}', default PLOT_MAP_DEFAULT_RPM), and are reassembled
+in book order. Books are processed in parallel (PLOT_MAP_BOOK_WORKERS).
+
+Window and cluster summaries are cached on disk (PLOT_MAP_CACHE, default
+.cache/plot_maps; empty disables), keyed by the hash of the summarized text,
+the prompt template and the model. Rerunning after a synthesis-prompt change
+only redoes the final pass; after a book edit, only windows whose text changed
+(and the clusters containing them) are summarized again.
+
+Next to each plot map, `<book>_plot_facts.json` holds the map's per-character
+events (years, locations, death / imprisonment / release) for the programmatic
+rules, see src/reasoning/plot_facts.py. `--facts-only` rebuilds those files
+from the existing plot maps without calling the LLM.
 """
 
 import os
+import sys
+import time
+import argparse
+import hashlib
 import requests
 import json
+from collections import Counter
+import threading
+import concurrent.futures
 from tqdm import tqdm
 from dotenv import load_dotenv
 
 load_dotenv()
 
+sys.path.append(os.getcwd())
+from src.reasoning.plot_facts import write_plot_facts
+
 API_BASE = os.getenv("OPENAI_API_BASE", "http://localhost:8000/v1")
 DUMMY_KEY = os.environ.get("OPENAI_API_KEY", "sk-dummy")
 BOOKS_DIR = "Dataset/Books/"
@@ -27,11 +53,137 @@ OUTPUT_DIR = "Dataset/PlotMaps/"
 WINDOW_SIZE = 10000  # characters per window
 OVERLAP = 500        # small overlap to avoid cutting mid-sentence
 
+CONCURRENCY = int(os.getenv("PLOT_MAP_CONCURRENCY", "8"))
+BOOK_WORKERS = int(os.getenv("PLOT_MAP_BOOK_WORKERS", "4"))
+DEFAULT_RPM = float(os.getenv("PLOT_MAP_DEFAULT_RPM", "30"))
+MODEL_RPM = json.loads(os.getenv("PLOT_MAP_RPM", "") or "{}")
+CACHE_DIR = os.getenv("PLOT_MAP_CACHE", ".cache/plot_maps")
+
+WINDOW_MODEL = "groq-llama-small"
+CLUSTER_MODEL = "groq-llama-small"
+
+WINDOW_PROMPT = """Summarize this passage from a novel in exactly 2-3 concise sentences.
+Focus on: key events, character actions, important revelations, and timeline markers (dates, locations).
+
+Passage (section {index} of {total}):
+{passage}"""
+
+CLUSTER_PROMPT = """These are sequential summaries from a novel. Combine them into a single coherent paragraph (100-150 words) that preserves key events, character names, dates, and locations.
+
+Summaries (Group {index}):
+{combined}"""
+
+
+class RateLimiter:
+    """Spaces one model's requests evenly at `rpm` per minute; a 429 pushes every caller back."""
+
+    def __init__(self, rpm: float):
+        self.interval = 60.0 / rpm if rpm > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def back_off(self, seconds: float):
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(model: str) -> RateLimiter:
+    with _limiters_lock:
+        if model not in _limiters:
+            _limiters[model] = RateLimiter(float(MODEL_RPM.get(model, DEFAULT_RPM)))
+        return _limiters[model]
+
+
+# Shared by every book, so PLOT_MAP_CONCURRENCY bounds the requests in flight overall
+_llm_pool = concurrent.futures.ThreadPoolExecutor(max_workers=CONCURRENCY, thread_name_prefix="plot-map")
+
+
+class SummaryCache:
+    """One file per summary under <root>/<kind>/<digest>.txt; failed (empty) calls are not stored."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(template: str, model: str, max_tokens: int, text: str) -> str:
+        # Section/group numbers are left out: a window keeps its summary when earlier windows change
+        payload = json.dumps([hashlib.sha256(template.encode("utf-8")).hexdigest(), model, max_tokens,
+                              hashlib.sha256(text.encode("utf-8")).hexdigest()])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.root, kind, f"{key}.txt")
+
+    def get(self, kind: str, key: str):
+        path = self._path(kind, key)
+        if not os.path.exists(path):
+            with self._lock:
+                self.stats[f"{kind}_misses"] += 1
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            value = f.read()
+        with self._lock:
+            self.stats[f"{kind}_hits"] += 1
+        return value
+
+    def put(self, kind: str, key: str, value: str):
+        if not value:
+            return
+        path = self._path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(tmp_path, path)
+
+    def report(self) -> str:
+        with self._lock:
+            return ", ".join(f"{kind}: {self.stats[kind + '_hits']} cached / {self.stats[kind + '_misses']} new"
+                             for kind in ("window", "cluster"))
+
+
+summary_cache = SummaryCache(CACHE_DIR) if CACHE_DIR else None
+
+
+def cached_summary(kind: str, template: str, model: str, max_tokens: int, text: str, prompt: str) -> str:
+    if summary_cache is None:
+        return llm_call(prompt, model=model, max_tokens=max_tokens)
+    key = SummaryCache.key(template, model, max_tokens, text)
+    value = summary_cache.get(kind, key)
+    if value is None:
+        value = llm_call(prompt, model=model, max_tokens=max_tokens)
+        summary_cache.put(kind, key, value)
+    return value
+
+
+def run_ordered(fn, items: list, desc: str) -> list:
+    """fn(i, item) for every item on the shared pool; results in input order."""
+    futures = {_llm_pool.submit(fn, i, item): i for i, item in enumerate(items)}
+    results = [None] * len(items)
+    for future in tqdm(concurrent.futures.as_completed(futures), total=len(futures), desc=desc):
+        results[futures[future]] = future.result()
+    return results
+
 
 def llm_call(prompt: str, model: str = "groq-llama-small", max_tokens: int = 600, timeout: int = 45) -> str:
-    """Single LLM call with retry logic."""
-    import time
+    """Single LLM call with retry logic, paced by the model's rate limiter."""
+    limiter = get_limiter(model)
     for attempt in range(5):
+        limiter.acquire()
         try:
             res = requests.post(
                 f"{API_BASE}/chat/completions",
@@ -48,8 +200,8 @@ def llm_call(prompt: str, model: str = "groq-llama-small", max_tokens: int = 600
                 return res.json()["choices"][0]["message"]["content"].strip()
             elif res.status_code == 429:
                 wait = (2 ** attempt) + 3
-                print(f"  Rate limited. Waiting {wait}s...")
-                time.sleep(wait)
+                print(f"  Rate limited on {model}. Backing off {wait}s...")
+                limiter.back_off(wait)
             else:
                 print(f"  API error {res.status_code}: {res.text[:200]}")
                 time.sleep(2)
@@ -80,22 +232,20 @@ def slice_into_windows(text: str) -> list[str]:
 
 def summarize_window(window: str, window_idx: int, total: int) -> str:
     """Summarize a single text window into 2-3 concise sentences."""
-    prompt = f"""Summarize this passage from a novel in exactly 2-3 concise sentences.
-Focus on: key events, character actions, important revelations, and timeline markers (dates, locations).
-
-Passage (section {window_idx+1} of {total}):
-{window[:8000]}"""
-    return llm_call(prompt, model="groq-llama-small", max_tokens=200)
+    passage = window[:8000]
+    prompt = WINDOW_PROMPT.format(index=window_idx + 1, total=total, passage=passage)
+    return cached_summary("window", WINDOW_PROMPT, WINDOW_MODEL, 200, passage, prompt)
 
 
 def summarize_cluster(summaries: list[str], cluster_idx: int) -> str:
     """Summarize a cluster of individual summaries into a paragraph."""
     combined = "\n".join(f"- {s}" for s in summaries)
-    prompt = f"""These are sequential summaries from a novel. Combine them into a single coherent paragraph (100-150 words) that preserves key events, character names, dates, and locations.
+    prompt = CLUSTER_PROMPT.format(index=cluster_idx + 1, combined=combined)
+    return cached_summary("cluster", CLUSTER_PROMPT, CLUSTER_MODEL, 300, combined, prompt)
 
-Summaries (Group {cluster_idx+1}):
-{combined}"""
-    return llm_call(prompt, model="groq-llama-small", max_tokens=300)
+
+def summarize_cluster_at(cluster_idx: int, summaries: list[str]) -> str:
+    return summarize_cluster(summaries, cluster_idx)
 
 
 def synthesize_plot_map(summaries: list[str], book_title: str) -> str:
@@ -127,63 +277,84 @@ def process_book(filename: str):
     print(f"\n{'='*60}")
     print(f"Processing: {book_title}")
     print(f"{'='*60}")
+    tag = f"  [{book_title[:24]}]"
 
     path = os.path.join(BOOKS_DIR, filename)
     with open(path, "r", encoding="utf-8") as f:
         content = f.read()
 
-    print(f"  Book length: {len(content):,} characters")
+    print(f"{tag} Book length: {len(content):,} characters")
 
     # Step 1: Slice into windows
     windows = slice_into_windows(content)
-    print(f"  Windows: {len(windows)} (each ~{WINDOW_SIZE:,} chars)")
+    print(f"{tag} Windows: {len(windows)} (each ~{WINDOW_SIZE:,} chars)")
 
-    # Step 2: Summarize each window (Pass 1)
-    window_summaries = []
-    for i, window in enumerate(tqdm(windows, desc="  Pass 1 — Window summaries")):
-        summary = summarize_window(window, i, len(windows))
-        if summary:
-            window_summaries.append(summary)
+    # Step 2: Summarize each window (Pass 1), concurrently, reassembled in book order
+    summaries = run_ordered(lambda i, w: summarize_window(w, i, len(windows)), windows,
+                            desc=f"{tag} Pass 1 — Window summaries")
+    window_summaries = [s for s in summaries if s]
 
-    print(f"  Valid window summaries: {len(window_summaries)}")
+    print(f"{tag} Valid window summaries: {len(window_summaries)}")
 
     if not window_summaries:
-        print(f"  ERROR: No summaries generated for {book_title}. Skipping.")
+        print(f"{tag} ERROR: No summaries generated for {book_title}. Skipping.")
         return
 
     # Step 3: Hierarchical clustering (Pass 2) — only if many windows
     final_summaries = window_summaries
     if len(window_summaries) > 15:
-        print(f"  Pass 2 — Clustering {len(window_summaries)} summaries into groups of 8...")
+        print(f"{tag} Pass 2 — Clustering {len(window_summaries)} summaries into groups of 8...")
         cluster_size = 8
-        clustered = []
-        for i in range(0, len(window_summaries), cluster_size):
-            cluster = window_summaries[i : i + cluster_size]
-            cluster_summary = summarize_cluster(cluster, i // cluster_size)
-            if cluster_summary:
-                clustered.append(cluster_summary)
-        print(f"  Clustered summaries: {len(clustered)}")
+        clusters = [window_summaries[i : i + cluster_size] for i in range(0, len(window_summaries), cluster_size)]
+        clustered = [c for c in run_ordered(summarize_cluster_at, clusters, desc=f"{tag} Pass 2 — Clusters") if c]
+        print(f"{tag} Clustered summaries: {len(clustered)}")
         final_summaries = clustered
 
     # Step 4: Final synthesis (Pass 3)
-    print(f"  Pass 3 — Synthesizing final Plot Map from {len(final_summaries)} summaries...")
+    print(f"{tag} Pass 3 — Synthesizing final Plot Map from {len(final_summaries)} summaries...")
     plot_map = synthesize_plot_map(final_summaries, book_title)
 
     if not plot_map or len(plot_map) < 100:
-        print(f"  WARNING: Plot map too short ({len(plot_map)} chars). Retrying with different model...")
+        print(f"{tag} WARNING: Plot map too short ({len(plot_map)} chars). Retrying with different model...")
         plot_map = synthesize_plot_map(final_summaries, book_title)
 
     # Save
     output_path = os.path.join(OUTPUT_DIR, f"{book_title}_plot_map.txt")
     with open(output_path, "w", encoding="utf-8") as f:
         f.write(plot_map)
-    print(f"  ✓ Saved Plot Map ({len(plot_map):,} chars) → {output_path}")
+    print(f"{tag} ✓ Saved Plot Map ({len(plot_map):,} chars) → {output_path}")
+    facts_path = write_plot_facts(plot_map, book_title, OUTPUT_DIR)
+    print(f"{tag} ✓ Saved Plot Facts → {facts_path}")
+
+
+def rebuild_facts():
+    """Plot facts for every existing plot map (no LLM calls)."""
+    for name in sorted(os.listdir(OUTPUT_DIR)):
+        if name.endswith("_plot_map.txt"):
+            with open(os.path.join(OUTPUT_DIR, name), "r", encoding="utf-8") as f:
+                plot_map = f.read()
+            print(f"✓ Saved Plot Facts → {write_plot_facts(plot_map, name[:-len('_plot_map.txt')], OUTPUT_DIR)}")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate hierarchical plot maps and their plot facts")
+    parser.add_argument("--facts-only", action="store_true", help="only rebuild plot facts from existing plot maps")
+    args = parser.parse_args()
     os.makedirs(OUTPUT_DIR, exist_ok=True)
+    if args.facts_only:
+        rebuild_facts()
+        sys.exit(0)
     books = [b for b in os.listdir(BOOKS_DIR) if b.endswith(".txt")]
     print(f"Found {len(books)} books: {books}")
-    for book in books:
-        process_book(book)
-    print("\n✓ All plot maps generated.")
+    start = time.time()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, BOOK_WORKERS), thread_name_prefix="book") as books_pool:
+        futures = {books_pool.submit(process_book, book): book for book in books}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"  ERROR: {futures[future]} failed: {e}")
+    _llm_pool.shutdown()
+    if summary_cache is not None:
+        print(f"Summary cache ({summary_cache.root}): {summary_cache.report()}")
+    print(f"\n✓ All plot maps generated in {time.time() - start:.0f}s.")
@@ -3,6 +3,8 @@ import json
 import pathway as pw
 import pandas as pd
 from src.pathway_pipeline.retrieval import NarrativeRetriever
+from src.pathway_pipeline.book_index import normalize_book_key, ref_field
+from src.reasoning.multi_pattern import get_matcher
 from src.models.llm_judge import ConsistencyJudge, build_consistency_prompt
 from src.reasoning.entity_tracker import EntityStateTracker
 from src.reasoning.timeline_validator import TimelineValidator
@@ -94,6 +96,17 @@ def main():
         k=calculate_adaptive_k(query_table.backstory)
     )
 
+    @pw.udf
+    def zip_refs(ids: tuple, books: tuple, chapters: tuple, progress: tuple, starts: tuple, ends: tuple, scores: tuple) -> list:
+        """Per-chunk ref tuples (RETRIEVAL_FIELDS order) from the typed retrieval columns."""
+        return list(zip(ids or (), books or (), chapters or (), progress or (), starts or (), ends or (), scores or ()))
+
+    retrieved_results = retrieved_results.select(
+        *pw.this,
+        retrieved_refs=zip_refs(pw.this.chunk_id, pw.this.book, pw.this.chapter, pw.this.progress_pct,
+                                pw.this.start, pw.this.end, pw.this.score)
+    )
+
     # 5. Reranking (Context Optimization)
     @pw.udf
     def rerank_by_contradiction_relevance(chunks: list, metadata: list, character: str, backstory: str) -> tuple:
@@ -108,33 +121,33 @@ def main():
             return ([], [])
             
         scores = []
-        back_lower = backstory.lower()
-        char_lower = character.lower()
+        # Character, backstory keyword fragments and conflict words in one automaton pass per chunk
+        matcher = get_matcher({
+            "character": [character],
+            "keyword": [w for w in backstory.lower().split()[:10] if len(w) > 4],  # first 10 words of backstory
+            "conflict": ["not", "never", "only", "instead", "imprisoned", "died"],
+        })
+        import re
         
         for i, chunk in enumerate(chunks):
             chunk_s = str(chunk).lower()
+            found = matcher.matched(chunk_s)
             score = 0
             
             # Entity match bonus
-            if char_lower in chunk_s:
+            if found.get("character"):
                 score += 5
             
             # Keyword fragments (simple heuristic)
-            for word in back_lower.split()[:10]: # Check first 10 words of backstory
-                if len(word) > 4 and word in chunk_s:
-                    score += 1
+            score += len(found.get("keyword", ()))
             
             # Temporal overlap detection in chunk
-            import re
             years = re.findall(r'\b(17|18|19)\d{2}\b', chunk_s)
             if years:
                 score += 2
                 
             # Conflict keyword bonus
-            conflict_words = ["not", "never", "only", "instead", "imprisoned", "died"]
-            for cw in conflict_words:
-                if cw in chunk_s:
-                    score += 1
+            score += len(found.get("conflict", ()))
             
             scores.append(score)
             
@@ -150,7 +163,7 @@ def main():
         *pw.this,
         reranked_data=rerank_by_contradiction_relevance(
             pw.this.retrieved_chunks, 
-            pw.this.retrieved_metadata,
+            pw.this.retrieved_refs,
             pw.this.character,
             pw.this.backstory
         )
@@ -203,24 +216,15 @@ def main():
             return "No evidence found."
         
         formatted_evidence = []
+        target_key = normalize_book_key(target_book)
         for i, chunk in enumerate(chunks):
-            meta = metadata[i] if i < len(metadata) else {}
-            
-            # Convert Pathway Json object to Python dict
-            if hasattr(meta, 'as_dict'):
-                meta = meta.as_dict()
-            elif hasattr(meta, 'to_dict'):
-                meta = meta.to_dict()
-            
-            chunk_path = str(meta.get("path", "")).lower()
-            source_file = str(meta.get("source_file", "")).lower()
-            target_book_lower = target_book.lower()
+            meta = metadata[i] if i < len(metadata) else None
             
-            if target_book_lower not in chunk_path and target_book_lower not in source_file:
+            if target_key not in ref_field(meta, "book", ""):
                 continue 
             
-            chapter = meta.get("chapter", "Unknown Chapter")
-            progress = meta.get("progress_pct", "?")
+            chapter = ref_field(meta, "chapter", "Unknown Chapter")
+            progress = ref_field(meta, "progress_pct", "?")
             
             entry = f"[{chapter} | {progress}%]\n{str(chunk)}"
             formatted_evidence.append(entry)
@@ -245,19 +249,11 @@ def main():
         # Filter chunks for this book first (same logic as combine_evidence)
         valid_chunks = []
         valid_meta = []
-        target_book_lower = target_book.lower()
+        target_key = normalize_book_key(target_book)
         
         for i, chunk in enumerate(chunks):
-            meta = metadata[i] if i < len(metadata) else {}
-            if hasattr(meta, 'as_dict'): meta = meta.as_dict()
-            elif hasattr(meta, 'to_dict'): meta = meta.to_dict()
-            elif not isinstance(meta, dict):
-                try: meta = dict(meta)
-                except: meta = {}
-            
-            path = str(meta.get("path", "")).lower()
-            source = str(meta.get("source_file", "")).lower()
-            if target_book_lower in path or target_book_lower in source:
+            meta = metadata[i] if i < len(metadata) else None
+            if target_key in ref_field(meta, "book", ""):
                 valid_chunks.append(str(chunk))
                 valid_meta.append(meta)
 
@@ -276,8 +272,7 @@ def main():
         # Run Checks
         conflicts = []
         conflicts.extend(validator.validate_location_consistency(backstory_claims, narrative_states))
-        conflicts.extend(rules.check_imprisonment_constraint(backstory_claims, narrative_states))
-        conflicts.extend(rules.check_death_constraint(backstory_claims, narrative_states))
+        conflicts.extend(rules.check_all(backstory_claims, narrative_states))
 
         return json.dumps({
             "conflicts": conflicts,
@@ -367,57 +362,19 @@ def main():
         return 1 if judgment.lower() == "contradictory" else 0
 
     output_table = judged_table.select(
-        Story_ID=pw.this.query_id,
+        **{"Story ID": pw.this.query_id},
         Prediction=parse_label(pw.this.judgment),
         Rationale=pw.this.rationale,
         Confidence=pw.this.confidence
     )
 
-    # Export to CSV
-    pw.io.csv.write(output_table, OUTPUT_FILE)
+    # Export to CSV: one row per Story ID, compacted as each story finishes
+    from src.pathway_pipeline.result_sink import ResultSink
+    sink = ResultSink(OUTPUT_FILE, ["Story ID", "Prediction", "Rationale", "Confidence"]).attach(output_table)
 
     # Pathway runs everything as a compute graph
     pw.run()
-    
-    # Post-processing: Clean up Pathway's internal columns (time, diff)
-    try:
-        import csv
-        cleaned_rows = []
-        with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            try:
-                header = next(reader)
-            except StopIteration:
-                print("[WARNING] results.csv is empty.")
-                return
-
-            col_map = {col: i for i, col in enumerate(header)}
-            
-            for row in reader:
-                if not row: continue
-                try:
-                    # Robust column mapping
-                    idx_id = col_map.get("Story ID", col_map.get("Story_ID", 0))
-                    idx_pred = col_map.get("Prediction", 1)
-                    idx_rat = col_map.get("Rationale", 2)
-                    idx_conf = col_map.get("Confidence", 3)
-                    
-                    story_id = row[idx_id]
-                    pred = row[idx_pred]
-                    rat = row[idx_rat]
-                    conf = row[idx_conf]
-                    cleaned_rows.append([story_id, pred, rat, conf])
-                except (IndexError, KeyError):
-                    continue
-        
-        if cleaned_rows:
-            df = pd.DataFrame(cleaned_rows, columns=["Story ID", "Prediction", "Rationale", "Confidence"])
-            df.to_csv(OUTPUT_FILE, index=False)
-            print(f"[INFO] Cleaned CSV output: {len(df)} predictions written to {OUTPUT_FILE}")
-        else:
-            print("[WARNING] No valid rows found in CSV.")
-    except Exception as e:
-        print(f"[WARNING] Could not clean CSV: {e}")
+    print(f"[INFO] {len(sink.rows)} predictions written to {OUTPUT_FILE}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,275 @@
+"""
+mock_llm_server.py — Deterministic OpenAI-compatible stand-in for the LiteLLM rotator.
+
+Serves POST /v1/chat/completions (plain and SSE streaming) and GET /v1/models
+so main.py, the jury and the plot-map generator can run fully offline.
+
+Per-model behaviour is configured with a JSON file (see DEFAULT_CONFIG):
+  latency          first-token latency distribution {"dist": "lognormal"|"uniform"|"fixed", ...}
+  tokens_per_second  generation speed used to pace the response body
+  rate_429 / rate_5xx  probability of injecting a rate-limit or server error
+The "*" entry is used for any model without its own entry.
+
+Responses are canned or rule-based:
+  * identity prompts  -> the original label
+  * decomposition     -> JSON list of backstory sentences
+  * jury / DA prompts -> VERDICT (+ CONTRADICTION_SCORE / DIRECT_QUOTE for the DA)
+                         from --verdict {rule,consistent,contradictory}
+  * anything else     -> a short canned summary
+All randomness is seeded from (--seed, model, prompt, attempt), so a rerun with the
+same inputs sees the same latencies, errors and verdicts.
+
+Usage:
+    python scripts/mock_llm_server.py --port 8100 [--config mock.json] [--verdict rule] [--seed 7]
+"""
+
+import re
+import sys
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+DEFAULT_CONFIG = {
+    "*": {"latency": {"dist": "lognormal", "median": 0.8, "sigma": 0.35}, "tokens_per_second": 150,
+          "rate_429": 0.0, "rate_5xx": 0.0},
+    "groq-llama-small": {"latency": {"dist": "lognormal", "median": 0.3, "sigma": 0.25}, "tokens_per_second": 400},
+    "groq-llama": {"latency": {"dist": "lognormal", "median": 0.9, "sigma": 0.4}, "tokens_per_second": 250},
+    "or-trinity": {"latency": {"dist": "lognormal", "median": 2.0, "sigma": 0.6}, "tokens_per_second": 60,
+                   "rate_429": 0.05},
+    "or-nemotron-9b": {"latency": {"dist": "lognormal", "median": 1.5, "sigma": 0.5}, "tokens_per_second": 90,
+                       "rate_5xx": 0.02},
+    "groq-qwen": {"latency": {"dist": "lognormal", "median": 1.2, "sigma": 0.4}, "tokens_per_second": 200},
+}
+
+CONTRADICTION_CUES = ["never", "instead of", "refused", "died in", "executed", "was born in", "for life"]
+
+
+class MockState:
+    def __init__(self, config: dict, verdict_mode: str, seed: int, time_scale: float):
+        self.config = config
+        self.verdict_mode = verdict_mode
+        self.seed = seed
+        self.time_scale = time_scale
+        self.attempts = {}
+        self.stats = {"requests": 0, "429": 0, "5xx": 0, "ok": 0}
+        self.lock = threading.Lock()
+
+    def model_config(self, model: str) -> dict:
+        merged = dict(self.config.get("*", {}))
+        merged.update(self.config.get(model, {}))
+        return merged
+
+    def rng_for(self, model: str, prompt: str) -> random.Random:
+        """Seeded per (model, prompt, attempt) so retries see fresh but reproducible draws."""
+        key = hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest()
+        with self.lock:
+            attempt = self.attempts.get(key, 0)
+            self.attempts[key] = attempt + 1
+            self.stats["requests"] += 1
+        return random.Random(f"{self.seed}:{key}:{attempt}")
+
+
+def sample_latency(spec: dict, rng: random.Random) -> float:
+    dist = spec.get("dist", "fixed")
+    if dist == "lognormal":
+        return rng.lognormvariate(math.log(spec.get("median", 1.0)), spec.get("sigma", 0.3))
+    if dist == "uniform":
+        return rng.uniform(spec.get("low", 0.5), spec.get("high", 1.5))
+    return float(spec.get("value", spec.get("median", 1.0)))
+
+
+def _field(prompt: str, label: str) -> str:
+    match = re.search(rf"{label}:\s*(.+)", prompt)
+    return match.group(1).strip() if match else ""
+
+
+def rule_based_verdict(prompt: str, rng: random.Random, mode: str) -> bool:
+    """True means CONTRADICTORY."""
+    if mode == "consistent":
+        return False
+    if mode == "contradictory":
+        return True
+    backstory = _field(prompt, "Hypothetical Backstory").lower()
+    evidence = prompt.split("Evidence Excerpts", 1)[-1]
+    b_years = set(re.findall(r"\b1[78]\d{2}\b", backstory))
+    e_years = set(re.findall(r"\b1[78]\d{2}\b", evidence))
+    if b_years and e_years and not (b_years & e_years):
+        return True
+    if any(cue in backstory for cue in CONTRADICTION_CUES):
+        return rng.random() < 0.7
+    return rng.random() < 0.25
+
+
+def build_reply(prompt: str, rng: random.Random, mode: str) -> str:
+    if prompt.startswith("Identify the central character"):
+        return _field(prompt, "Original Label") or "Unknown"
+    if "Decompose this backstory" in prompt:
+        backstory = _field(prompt, "Backstory")
+        claims = [s.strip() for s in re.split(r"(?<=[.;])\s+", backstory) if len(s.strip()) > 15]
+        return json.dumps(claims or [backstory])
+    if "VERDICT" in prompt:
+        contradictory = rule_based_verdict(prompt, rng, mode)
+        verdict = "CONTRADICTORY" if contradictory else "CONSISTENT"
+        lines = [
+            "Step 1 - Timeline Check: compared backstory dates against the excerpts.",
+            "Step 2 - Location Check: locations reviewed.",
+            "Step 3 - Character State Check: characterization reviewed.",
+            "Step 4 - Causal Check: downstream events reviewed.",
+        ]
+        if "DEVIL'S ADVOCATE" in prompt:
+            score = rng.randint(7, 9) if contradictory else rng.randint(2, 4)
+            first_excerpt = re.search(r"^- \[[^\]]*\]\s*(.+)$", prompt.split("Evidence Excerpts", 1)[-1], re.MULTILINE)
+            quote = first_excerpt.group(1)[:120] if first_excerpt else "the novel states otherwise"
+            lines += [f"CONTRADICTION_SCORE: {score}", f"DIRECT_QUOTE: \"{quote}\""]
+        lines.append(f"VERDICT: {verdict}")
+        lines.append("Step 5 - Verdict rationale: the decision follows from the checks above.")
+        return "\n".join(lines)
+    return "In this section the protagonist travels, meets allies and learns of a betrayal in 1815."
+
+
+def make_handler(state: MockState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send_json(self, code: int, payload: dict):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                models = [m for m in state.config if m != "*"]
+                self._send_json(200, {"object": "list", "data": [{"id": m, "object": "model"} for m in models]})
+            elif self.path.rstrip("/").endswith("/stats"):
+                self._send_json(200, state.stats)
+            else:
+                self._send_json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            model = request.get("model", "unknown")
+            prompt = "\n".join(str(m.get("content", "")) for m in request.get("messages", []))
+            cfg = state.model_config(model)
+            rng = state.rng_for(model, prompt)
+
+            time.sleep(sample_latency(cfg.get("latency", {}), rng) * state.time_scale)
+
+            roll = rng.random()
+            if roll < cfg.get("rate_429", 0.0):
+                with state.lock:
+                    state.stats["429"] += 1
+                self._send_json(429, {"error": {"message": "429 rate_limit_exceeded (mock)", "type": "rate_limit"}})
+                return
+            if roll < cfg.get("rate_429", 0.0) + cfg.get("rate_5xx", 0.0):
+                with state.lock:
+                    state.stats["5xx"] += 1
+                self._send_json(503, {"error": {"message": "503 upstream unavailable (mock)"}})
+                return
+
+            reply = build_reply(prompt, rng, state.verdict_mode)
+            tokens = re.findall(r"\S+\s*", reply)
+            max_tokens = request.get("max_tokens")
+            if max_tokens:
+                tokens = tokens[:max_tokens]
+            per_token = state.time_scale / max(cfg.get("tokens_per_second", 100), 1)
+            with state.lock:
+                state.stats["ok"] += 1
+
+            created = int(time.time())
+            completion_id = f"chatcmpl-mock-{rng.getrandbits(48):x}"
+            if request.get("stream"):
+                include_usage = (request.get("stream_options") or {}).get("include_usage", False)
+                usage = {"prompt_tokens": len(prompt.split()), "completion_tokens": len(tokens),
+                         "total_tokens": len(prompt.split()) + len(tokens)} if include_usage else None
+                self._stream(completion_id, created, model, tokens, per_token, usage)
+                return
+            time.sleep(per_token * len(tokens))
+            self._send_json(200, {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(tokens),
+                          "total_tokens": len(prompt.split()) + len(tokens)},
+            })
+
+        def _stream(self, completion_id: str, created: int, model: str, tokens: list, per_token: float,
+                    usage: Optional[dict] = None):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                for tok in tokens:
+                    time.sleep(per_token)
+                    chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                             "choices": [{"index": 0, "delta": {"content": tok}, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                if usage is not None:
+                    # stream_options.include_usage: a final chunk with no choices carries the usage
+                    chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                             "choices": [], "usage": usage}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # Client closed the stream early (verdict already received)
+                pass
+
+    return Handler
+
+
+def load_config(path: str) -> dict:
+    config = json.loads(json.dumps(DEFAULT_CONFIG))
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            for model, overrides in json.load(f).items():
+                config.setdefault(model, {}).update(overrides)
+    return config
+
+
+def serve(port: int = 8100, config_path: str = "", verdict_mode: str = "rule", seed: int = 7,
+          time_scale: float = 1.0) -> ThreadingHTTPServer:
+    state = MockState(load_config(config_path), verdict_mode, seed, time_scale)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deterministic OpenAI-compatible mock of the LiteLLM rotator")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--config", default="", help="JSON file with per-model overrides")
+    parser.add_argument("--verdict", default="rule", choices=["rule", "consistent", "contradictory"])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Multiply every simulated delay")
+    args = parser.parse_args()
+
+    httpd = serve(args.port, args.config, args.verdict, args.seed, args.time_scale)
+    print(f"Mock LLM rotator listening on http://127.0.0.1:{args.port}/v1 (verdict={args.verdict}, seed={args.seed})",
+          flush=True)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        sys.exit(0)
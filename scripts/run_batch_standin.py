@@ -0,0 +1,122 @@
+"""
+run_batch_standin.py — Resolve a batch requests JSONL into a results JSONL.
+
+Two modes:
+  * local (default): replay each request against the LiteLLM rotator
+    (OPENAI_API_BASE) with retries and append OpenAI-batch-format output lines.
+  * --openai-batch: upload the file to an OpenAI-compatible /v1/batches
+    endpoint, poll until it finishes and append the downloaded output.
+
+Requests whose custom_id already has a successful result are skipped, so the
+script can be rerun safely after a partial failure.
+
+Usage:
+    python scripts/run_batch_standin.py [requests.jsonl] [results.jsonl] [--openai-batch]
+"""
+
+import os
+import sys
+import json
+import time
+import requests
+from dotenv import load_dotenv
+
+sys.path.append(os.getcwd())
+from src.models.batch_jobs import DEFAULT_REQUESTS_FILE, DEFAULT_RESULTS_FILE, extract_result_content
+
+load_dotenv()
+
+API_BASE = os.getenv("OPENAI_API_BASE", "http://localhost:8000/v1")
+DUMMY_KEY = os.environ.get("OPENAI_API_KEY", "sk-dummy")
+
+
+def load_done_ids(results_path: str) -> set:
+    done = set()
+    if not os.path.exists(results_path):
+        return done
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if extract_result_content(record) is not None:
+                done.add(record.get("custom_id"))
+    return done
+
+
+def replay_request(request: dict, max_retries: int = 6) -> dict:
+    """POST one batch line to the rotator and wrap the reply like a batch output line."""
+    last_error = ""
+    for attempt in range(max_retries):
+        try:
+            res = requests.post(
+                f"{API_BASE}/chat/completions",
+                json=request["body"],
+                headers={"Authorization": f"Bearer {DUMMY_KEY}"},
+                timeout=120,
+            )
+            if res.status_code == 200:
+                return {"custom_id": request["custom_id"], "response": {"status_code": 200, "body": res.json()}, "error": None}
+            last_error = f"{res.status_code}: {res.text[:200]}"
+            wait = (2 ** attempt) + (5 if res.status_code == 429 else 1)
+        except Exception as e:
+            last_error = str(e)
+            wait = (2 ** attempt) + 1
+        print(f"  {request['custom_id']} attempt {attempt+1} failed ({last_error}). Retrying in {wait}s...")
+        time.sleep(wait)
+    return {"custom_id": request["custom_id"], "response": {"status_code": 500, "body": None}, "error": {"message": last_error}}
+
+
+def run_local(requests_path: str, results_path: str):
+    done = load_done_ids(results_path)
+    with open(requests_path, "r", encoding="utf-8") as f:
+        todo = [json.loads(line) for line in f if line.strip()]
+    todo = [r for r in todo if r["custom_id"] not in done]
+    print(f"Replaying {len(todo)} requests against {API_BASE} ({len(done)} already resolved)")
+
+    os.makedirs(os.path.dirname(results_path) or ".", exist_ok=True)
+    for i, request in enumerate(todo):
+        record = replay_request(request)
+        with open(results_path, "a", encoding="utf-8") as out:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        status = "ok" if record["error"] is None else "FAILED"
+        print(f"  [{i+1}/{len(todo)}] {request['custom_id']} {status}")
+
+
+def run_openai_batch(requests_path: str, results_path: str, poll_seconds: int = 30):
+    from openai import OpenAI
+    client = OpenAI(api_key=DUMMY_KEY, base_url=API_BASE)
+
+    with open(requests_path, "rb") as f:
+        batch_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(input_file_id=batch_file.id, endpoint="/v1/chat/completions", completion_window="24h")
+    print(f"Submitted batch {batch.id}")
+
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        time.sleep(poll_seconds)
+        batch = client.batches.retrieve(batch.id)
+        print(f"  status={batch.status} counts={batch.request_counts}")
+
+    if batch.status != "completed" or not batch.output_file_id:
+        print(f"Batch {batch.id} ended with status {batch.status}")
+        return
+
+    output = client.files.content(batch.output_file_id).text
+    os.makedirs(os.path.dirname(results_path) or ".", exist_ok=True)
+    with open(results_path, "a", encoding="utf-8") as out:
+        out.write(output if output.endswith("\n") else output + "\n")
+    print(f"Appended batch output to {results_path}")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    req_path = args[0] if len(args) > 0 else os.getenv("BATCH_REQUESTS_FILE", DEFAULT_REQUESTS_FILE)
+    res_path = args[1] if len(args) > 1 else os.getenv("BATCH_RESULTS_FILE", DEFAULT_RESULTS_FILE)
+    if not os.path.exists(req_path):
+        print(f"No batch requests found at {req_path}. Run `BATCH_MODE=1 python main.py` first.")
+        sys.exit(1)
+    if "--openai-batch" in sys.argv:
+        run_openai_batch(req_path, res_path)
+    else:
+        run_local(req_path, res_path)
@@ -1,64 +1,24 @@
+"""
+Full 80-row feature evaluation, in one process (see scripts/ablation_engine.py).
+
+Usage:
+    python scripts/run_full_ablation.py [--input Dataset/train.csv] [--workers 4]
+"""
 import os
-import subprocess
-import pandas as pd
+import sys
 import json
-import time
+import argparse
 
-def run_experiment(name, flags):
-    print(f"\n{'='*70}")
-    print(f">>> Running Experiment: {name}")
-    print(f"Flags: {flags}")
-    print(f"{'='*70}\n")
-    
-    # Clear previous results
-    if os.path.exists("results.csv"):
-        os.remove("results.csv")
-    
-    # Run the pipeline with dedicated log
-    log_file = f"log_full_{name.replace(' ', '_').lower()}.txt"
-    env = os.environ.copy()
-    env["INPUT_DATA"] = "Dataset/train.csv"  # Full 80-row dataset
-    env["USE_CLOUD"] = "True"
-    
-    cmd = ["python", "main.py"] + flags
-    try:
-        print(f"Executing: {' '.join(cmd)}")
-        with open(log_file, "w") as f:
-            subprocess.run(cmd, env=env, stdout=f, stderr=f, check=True, timeout=900)  # 15 min timeout
-        print(f"✅ Experiment completed successfully")
-        return True
-    except subprocess.TimeoutExpired:
-        print(f"⏱️ Experiment timed out after 15 minutes")
-        return False
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Experiment failed: {e}")
-        return False
+sys.path.append(os.getcwd())
 
-def calculate_accuracy():
-    try:
-        train_df = pd.read_csv('Dataset/train.csv')
-        train_df['label_num'] = train_df['label'].map({'consistent': 1, 'contradict': 0})
-        
-        if not os.path.exists('results.csv'):
-            return 0, 0, 0
-             
-        pred_df = pd.read_csv('results.csv')
-        
-        train_df['id_str'] = train_df['id'].astype(str)
-        pred_df['Story_ID_str'] = pred_df['Story ID'].astype(str)
-        
-        results = pd.merge(train_df, pred_df, left_on='id_str', right_on='Story_ID_str')
-        results['Prediction'] = pd.to_numeric(results['Prediction'], errors='coerce').fillna(1).astype(int)
-        
-        correct = (results['label_num'] == results['Prediction']).sum()
-        total = len(results)
-        accuracy = (correct / total) * 100 if total > 0 else 0
-        return float(accuracy), int(correct), int(total)
-    except Exception as e:
-        print(f"⚠️ Accuracy calculation error: {e}")
-        return 0, 0, 0
+from scripts.ablation_engine import ABLATION_WORKERS, AblationEngine, config_from_flags
 
 def main():
+    parser = argparse.ArgumentParser(description="Run the ablation experiments on the full training set")
+    parser.add_argument("--input", default="Dataset/train.csv")  # Full 80-row dataset
+    parser.add_argument("--workers", type=int, default=ABLATION_WORKERS, help="Configurations run concurrently")
+    args = parser.parse_args()
+
     print("="*70)
     print("FULL 80-ROW FEATURE EVALUATION")
     print("="*70)
@@ -75,27 +35,8 @@ def main():
         ("Full Suite", ["--use-expansion", "--use-rerank", "--use-dual-pass"])
     ]
     
-    summary = []
-    for name, flags in experiments:
-        success = run_experiment(name, flags)
-        
-        if success:
-            # Wait for file to stabilize
-            time.sleep(2)
-            acc, corr, tot = calculate_accuracy()
-            print(f"\n📊 Result: {acc:.2f}% ({corr}/{tot})")
-        else:
-            acc, corr, tot = 0, 0, 0
-            print(f"\n❌ Experiment failed - no accuracy")
-        
-        summary.append({
-            "name": name,
-            "accuracy": float(acc),
-            "correct": int(corr),
-            "total": int(tot),
-            "success": success
-        })
-        print()
+    engine = AblationEngine(args.input)
+    summary = engine.run([(name, config_from_flags(flags)) for name, flags in experiments], workers=args.workers)
     
     print("\n" + "="*70)
     print("FINAL RESULTS")
@@ -0,0 +1,146 @@
+"""
+Offline batch-job mode for the LLM stages (identity, decomposition, jury, DA).
+
+With BATCH_MODE=1 no chat call reaches the rotator. Every request is resolved
+against a results JSONL (OpenAI batch output format, or the simpler
+{"custom_id", "content"} stand-in format). Requests without a result are
+written to a requests JSONL with a stable, content-derived custom id and the
+caller receives BatchPending, so the story is deferred to the next pass.
+
+Typical loop:
+    BATCH_MODE=1 python main.py                       # emits batch/requests.jsonl
+    python scripts/run_batch_standin.py               # or submit to a batch endpoint
+    BATCH_MODE=1 python main.py                       # resumes from batch/results.jsonl
+"""
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+DEFAULT_REQUESTS_FILE = "batch/requests.jsonl"
+DEFAULT_RESULTS_FILE = "batch/results.jsonl"
+PENDING_MARKER = "BATCH-PENDING"
+
+
+class BatchPending(Exception):
+    """Raised when a stage's response is not yet available in the results file."""
+    def __init__(self, custom_id: str, count: int = 1):
+        super().__init__(f"{PENDING_MARKER}: {custom_id}" + (f" (+{count - 1} more)" if count > 1 else ""))
+        self.custom_id = custom_id
+        self.count = count
+
+
+def make_custom_id(stage: str, model: str, messages: List[Dict]) -> str:
+    """Stable id: identical stage/model/prompt always maps to the same request."""
+    payload = json.dumps({"model": model, "messages": messages}, sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+    return f"{stage}-{model}-{digest}"
+
+
+def extract_result_content(record: dict) -> Optional[str]:
+    """Pull the assistant text out of a results line; None for failed requests."""
+    if "content" in record:
+        return record["content"]
+    response = record.get("response") or {}
+    if response.get("status_code", 200) != 200:
+        return None
+    body = response.get("body") or {}
+    try:
+        return body["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+class BatchJobStore:
+    """Append-only request log plus an in-memory view of the ingested results."""
+
+    def __init__(self, requests_path: str = DEFAULT_REQUESTS_FILE, results_path: str = DEFAULT_RESULTS_FILE):
+        self.requests_path = requests_path
+        self.results_path = results_path
+        self.results: Dict[str, str] = {}
+        self.failed: Dict[str, str] = {}
+        self.emitted: set = set()
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._truncated = False
+        self._load_results()
+
+    def _load_results(self):
+        if not os.path.exists(self.results_path):
+            return
+        with open(self.results_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                cid = record.get("custom_id")
+                if not cid:
+                    continue
+                content = extract_result_content(record)
+                if content is None:
+                    self.failed[cid] = json.dumps(record.get("error") or record.get("response", {}))[:300]
+                else:
+                    self.results[cid] = content
+
+    def _emit(self, custom_id: str, model: str, messages: List[Dict], max_tokens: Optional[int]):
+        body = {"model": model, "messages": messages, "temperature": 0.0}
+        if max_tokens:
+            body["max_tokens"] = max_tokens
+        line = {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+        os.makedirs(os.path.dirname(self.requests_path) or ".", exist_ok=True)
+        # Each pass writes a fresh file holding only the requests still outstanding
+        mode = "a" if self._truncated else "w"
+        with open(self.requests_path, mode, encoding="utf-8") as f:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self._truncated = True
+        self.emitted.add(custom_id)
+
+    def resolve(self, stage: str, model: str, messages: List[Dict], max_tokens: Optional[int] = None) -> str:
+        """Return the ingested response, or emit the request and raise BatchPending."""
+        cid = make_custom_id(stage, model, messages)
+        with self._lock:
+            if cid in self.results:
+                self.hits += 1
+                return self.results[cid]
+            if cid in self.failed:
+                # Behave like a live call that exhausted its retries
+                raise Exception(f"Batch request {cid} failed: {self.failed[cid]}")
+            if cid not in self.emitted:
+                self._emit(cid, model, messages, max_tokens)
+        raise BatchPending(cid)
+
+    def require(self, stage: str, model: str, messages: List[Dict]):
+        """Raise BatchPending if an upstream stage's response has not been ingested yet."""
+        cid = make_custom_id(stage, model, messages)
+        if cid not in self.results and cid not in self.failed:
+            raise BatchPending(cid)
+
+    def summary(self) -> str:
+        return (f"[BATCH] {self.hits} responses served from {self.results_path}, "
+                f"{len(self.emitted)} requests pending in {self.requests_path}")
+
+
+# Global instance shared by all UDFs in the process
+_batch_store = None
+
+
+def batch_mode_enabled() -> bool:
+    return os.getenv("BATCH_MODE", "").lower() in ("1", "true", "yes")
+
+
+def get_batch_store() -> Optional[BatchJobStore]:
+    """Return the process-wide store when BATCH_MODE is enabled, else None."""
+    global _batch_store
+    if not batch_mode_enabled():
+        return None
+    if _batch_store is None:
+        _batch_store = BatchJobStore(
+            requests_path=os.getenv("BATCH_REQUESTS_FILE", DEFAULT_REQUESTS_FILE),
+            results_path=os.getenv("BATCH_RESULTS_FILE", DEFAULT_RESULTS_FILE),
+        )
+    return _batch_store
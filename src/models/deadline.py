@@ -0,0 +1,123 @@
+"""
+Per-story latency deadlines with graceful degradation.
+
+Each story gets a time budget (STORY_DEADLINE_SECONDS, default 600s). Only the
+time the story spends inside its own stages counts against it, so queueing
+behind other stories in a static Pathway run does not eat the budget. As the
+budget runs out the pipeline degrades in a fixed order:
+
+    0 full            everything runs
+    1 no_reretrieval  skip DA-guided re-retrieval
+    2 no_da           skip the Devil's Advocate
+    3 reduced_jury    a single juror instead of the full ensemble
+    4 nli_only        no LLM calls; the NLI verdict is final
+"""
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+LEVEL_NAMES = ["full", "no_reretrieval", "no_da", "reduced_jury", "nli_only"]
+FULL, NO_RERETRIEVAL, NO_DA, REDUCED_JURY, NLI_ONLY = range(len(LEVEL_NAMES))
+
+# A level applies once the remaining fraction of the budget drops below its threshold
+DEFAULT_THRESHOLDS = {NO_RERETRIEVAL: 0.50, NO_DA: 0.30, REDUCED_JURY: 0.20, NLI_ONLY: 0.10}
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage cannot start or continue within the story's remaining budget."""
+
+
+class StoryDeadline:
+    def __init__(self, budget_seconds: float, thresholds: Optional[Dict[int, float]] = None):
+        self.budget = budget_seconds
+        self.thresholds = dict(DEFAULT_THRESHOLDS if thresholds is None else thresholds)
+        self.spent = 0.0
+        self.applied = FULL
+        self._active_since = None
+        self._depth = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def running(self):
+        """Count wall-clock time inside the block against this story's budget."""
+        with self._lock:
+            if self._depth == 0:
+                self._active_since = time.time()
+            self._depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.spent += time.time() - self._active_since
+                    self._active_since = None
+
+    def elapsed(self) -> float:
+        with self._lock:
+            active = time.time() - self._active_since if self._active_since is not None else 0.0
+            return self.spent + active
+
+    def remaining(self) -> float:
+        return max(0.0, self.budget - self.elapsed())
+
+    def level(self) -> int:
+        fraction = self.remaining() / self.budget if self.budget > 0 else 0.0
+        current = FULL
+        for lvl, threshold in sorted(self.thresholds.items()):
+            if fraction < threshold:
+                current = max(current, lvl)
+        return current
+
+    def allows(self, level: int) -> bool:
+        """True if the stage that is dropped at `level` may still run."""
+        return self.level() < level
+
+    def degrade(self, level: int):
+        """Record that the story was answered at (at least) this degradation level."""
+        with self._lock:
+            self.applied = max(self.applied, level)
+
+    def clamp(self, timeout: float) -> float:
+        """Bound a timeout or sleep by the remaining budget; raise if nothing is left."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Story budget of {self.budget:.0f}s exhausted")
+        return min(timeout, remaining)
+
+    @property
+    def applied_name(self) -> str:
+        return LEVEL_NAMES[self.applied]
+
+
+# Process-wide registry; the clock for a story starts at its first stage
+_deadlines: Dict[str, StoryDeadline] = {}
+_registry_lock = threading.Lock()
+
+
+def deadline_budget() -> float:
+    return float(os.getenv("STORY_DEADLINE_SECONDS", "600"))
+
+
+def get_story_deadline(story_id) -> Optional[StoryDeadline]:
+    """Return the story's deadline, or None when deadlines are disabled (budget 0)."""
+    budget = deadline_budget()
+    if budget <= 0:
+        return None
+    key = str(story_id)
+    with _registry_lock:
+        if key not in _deadlines:
+            _deadlines[key] = StoryDeadline(budget)
+        return _deadlines[key]
+
+
+@contextmanager
+def story_stage(deadline: Optional[StoryDeadline]):
+    """`with story_stage(deadline):` that also accepts None (deadlines disabled)."""
+    if deadline is None:
+        yield None
+    else:
+        with deadline.running():
+            yield deadline
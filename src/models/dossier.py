@@ -0,0 +1,106 @@
+"""
+Character dossiers: evidence work shared by stories about the same character.
+
+The datasets contain many backstories for the same (book, character) pair, and
+their retrieved chunks overlap heavily. A dossier is keyed by the book and the
+character (main.dossier_character: the CSV name, resolved to the plot map's
+name when unambiguous, since NLI runs before the small-LLM identity call), and
+keeps everything about that character's evidence that does not depend on the
+individual backstory:
+
+  * the spaCy sentence split of each evidence chunk
+  * bi-encoder embeddings of every evidence sentence
+
+Entities are not kept here: the programmatic stage already reuses per-chunk
+entity states through NarrativeStateIndex (src/reasoning/narrative_state.py).
+Retrieved chunks are not kept either: retrieval searches each decomposed claim
+inside the Pathway dataflow, before the NLI stage, so a story's chunk list is
+claim-specific. What repeats across stories is the chunk text, and its parse
+and embeddings are what the dossier caches.
+
+The NLI stage then only does claim-specific work (reranking against the
+backstory, claim encoding, cross-encoder scoring) on top of the dossier.
+"""
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+
+
+def normalize_key(book: str, identity: str) -> Tuple[str, str]:
+    book = str(book or "").split("/")[-1].lower().replace(".txt", "").strip().strip('"').strip("'").strip()
+    return book, " ".join(str(identity or "").lower().split())
+
+
+class CharacterDossier:
+    def __init__(self, book: str, identity: str):
+        self.book = book
+        self.identity = identity
+        self.sentences: Dict[str, List[str]] = {}
+        self.embeddings: Dict[str, object] = {}
+        self.stories = 0
+        self.stats = Counter()
+        self._lock = threading.RLock()
+
+    def add_story(self):
+        with self._lock:
+            self.stories += 1
+
+    def split(self, chunk_text: str, nlp, min_len: int = 12) -> List[str]:
+        """Evidence sentences of a chunk (cached)."""
+        with self._lock:
+            cached = self.sentences.get(chunk_text)
+            self.stats["split_hits" if cached is not None else "split_misses"] += 1
+        if cached is not None:
+            return cached
+        doc = nlp(chunk_text)
+        sents = [s.text.strip() for s in doc.sents if len(s.text.strip()) > min_len]
+        with self._lock:
+            self.sentences[chunk_text] = sents
+        return sents
+
+    def embed(self, sentences: List[str], encoder):
+        """Row-aligned embedding matrix for `sentences`; only unseen sentences are encoded."""
+        import numpy as np
+        with self._lock:
+            missing = list(dict.fromkeys(s for s in sentences if s not in self.embeddings))
+            self.stats["embed_hits"] += len(sentences) - len(missing)
+            self.stats["embed_misses"] += len(missing)
+        if missing:
+            vectors = np.asarray(encoder.encode(missing), dtype=np.float32)
+            with self._lock:
+                for sent, vec in zip(missing, vectors):
+                    self.embeddings[sent] = vec
+        with self._lock:
+            return np.vstack([self.embeddings[s] for s in sentences])
+
+
+class DossierRegistry:
+    def __init__(self):
+        self.dossiers: Dict[Tuple[str, str], CharacterDossier] = {}
+        self._lock = threading.Lock()
+
+    def get(self, book: str, identity: str) -> CharacterDossier:
+        key = normalize_key(book, identity)
+        with self._lock:
+            if key not in self.dossiers:
+                self.dossiers[key] = CharacterDossier(*key)
+            return self.dossiers[key]
+
+    def report(self) -> str:
+        lines = [f"{'Book':<28} {'Character':<22} {'Stories':>7} {'Chunks':>7} {'Split hit%':>10} {'Embed hit%':>10}"]
+        with self._lock:
+            for (book, identity), d in sorted(self.dossiers.items()):
+                split_total = d.stats["split_hits"] + d.stats["split_misses"]
+                embed_total = d.stats["embed_hits"] + d.stats["embed_misses"]
+                lines.append(f"{book[:28]:<28} {identity[:22]:<22} {d.stories:>7} {len(d.sentences):>7} "
+                             f"{100 * d.stats['split_hits'] / max(split_total, 1):>9.0f}% "
+                             f"{100 * d.stats['embed_hits'] / max(embed_total, 1):>9.0f}%")
+        return "\n".join(lines)
+
+
+# Global registry shared by all stories in the process
+DOSSIERS = DossierRegistry()
+
+
+def get_dossier(book: str, identity: str) -> CharacterDossier:
+    return DOSSIERS.get(book, identity)
@@ -6,30 +6,109 @@ import threading
 import time
 import requests
 import re
+from src.models.batch_jobs import BatchPending, get_batch_store
+from src.models.streaming import DA_FIELDS, JURY_FIELDS, stream_completion
+from src.models.model_health import CircuitOpen, get_health_tracker
+from src.models.deadline import DeadlineExceeded, FULL, NO_DA, REDUCED_JURY
+import concurrent.futures
 
 # Global lock to ensure strictly sequential API calls if needed
 api_lock = threading.Lock()
 
-def _call_with_retry(client, model: str, messages: list, max_retries: int = 10) -> str:
-    """Call LLM with exponential backoff retry logic for 429s and other transient errors."""
+# Shared pool for hedged requests; a losing stream is closed, a losing plain request is ignored
+_hedge_pool = concurrent.futures.ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+
+def _request(client, model: str, messages: list, stream: bool, required_fields: tuple,
+             timeout: Optional[float] = None, cancel: Optional[threading.Event] = None) -> str:
+    """One chat completion request, no retries."""
+    if stream:
+        # Early-terminating stream: stops once the verdict fields are complete (or on cancel)
+        return stream_completion(client, model, messages, required_fields, max_tokens=800,
+                                 timeout=timeout, cancel=cancel)
+    response = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=0.0,
+        max_tokens=800,
+        **({"timeout": timeout} if timeout is not None else {})
+    )
+    return response.choices[0].message.content
+
+def _hedged_request(request, delay: float, on_hedge=None) -> str:
+    """
+    Run `request(cancel)` once; if it outlives `delay` seconds, send a single duplicate
+    and return the first success. The loser's cancel event is set, which closes a
+    streaming request; a plain request cannot be aborted and its result is dropped.
+    Either way a hedge costs at most one extra request.
+    """
+    cancels = {}
+    primary_cancel = threading.Event()
+    primary = _hedge_pool.submit(request, primary_cancel)
+    cancels[primary] = primary_cancel
+    done, _ = concurrent.futures.wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+
+    if on_hedge is not None:
+        on_hedge()
+    backup_cancel = threading.Event()
+    backup = _hedge_pool.submit(request, backup_cancel)
+    cancels[backup] = backup_cancel
+    pending = {primary, backup}
+    error = None
+    while pending:
+        done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            try:
+                content = future.result()
+            except Exception as e:
+                error = e
+                continue
+            for loser in pending:
+                cancels[loser].set()
+            return content
+    raise error
+
+def _call_with_retry(client, model: str, messages: list, max_retries: int = 10, stage: str = "jury",
+                     stream: bool = False, required_fields: tuple = JURY_FIELDS, tracker=None,
+                     deadline=None, hedge_delay: Optional[float] = None, on_hedge=None) -> str:
+    """Call LLM with exponential backoff retry logic for 429s and other transient errors.
+
+    When a health tracker is given, every attempt is recorded against the alias and the
+    retry loop is abandoned with CircuitOpen as soon as the alias circuit opens.
+    With a story deadline, request timeouts and backoff sleeps are bounded by the
+    remaining budget and DeadlineExceeded is raised once it cannot cover another attempt.
+    With a hedge delay, each attempt is hedged on its own (see _hedged_request).
+    """
     import time
     from datetime import datetime
+
+    # Offline batch mode: serve from the ingested results file or defer the story
+    store = get_batch_store()
+    if store is not None:
+        return store.resolve(stage, model, messages, max_tokens=800)
     
     for attempt in range(max_retries):
+        if tracker is not None and not tracker.allow(model):
+            raise CircuitOpen(model)
+        timeout = deadline.clamp(120.0) if deadline is not None else None
+        started = time.time()
         try:
             timestamp = datetime.now().strftime("%H:%M:%S")
             print(f"[{timestamp}] [LLM-CALL START] Model: {model} | Attempt: {attempt+1}", flush=True)
             
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.0,
-                max_tokens=800
-            )
-            content = response.choices[0].message.content
+            def request(cancel=None):
+                return _request(client, model, messages, stream, required_fields, timeout, cancel)
+
+            if hedge_delay is not None:
+                content = _hedged_request(request, hedge_delay, on_hedge)
+            else:
+                content = request()
             
             timestamp_end = datetime.now().strftime("%H:%M:%S")
             print(f"[{timestamp_end}] [LLM-CALL END] Model: {model} | Success", flush=True)
+            if tracker is not None:
+                tracker.record(model, time.time() - started, ok=True)
             
             if content:
                 return content
@@ -37,11 +116,18 @@ def _call_with_retry(client, model: str, messages: list, max_retries: int = 10)
             err_msg = str(e)
             timestamp_err = datetime.now().strftime("%H:%M:%S")
             print(f"[{timestamp_err}] [LLM-CALL ERROR] Model: {model} | Error: {err_msg}", flush=True)
+            if tracker is not None:
+                tracker.record(model, time.time() - started, ok=False)
+                if tracker.is_open(model):
+                    raise CircuitOpen(model)
             
             if "429" in err_msg or "rate_limit" in err_msg.lower():
                 wait_time = (2 ** attempt) + 5
             else:
                 wait_time = (2 ** attempt) + 1
+
+            if deadline is not None and wait_time >= deadline.remaining():
+                raise DeadlineExceeded(f"No budget left to retry {model} (needs {wait_time}s)")
             
             print(f"DEBUG: Attempt {attempt+1} failed for {model}. Retrying in {wait_time}s...")
             time.sleep(wait_time)
@@ -90,7 +176,8 @@ VERDICT: CONTRADICTORY
 """
 
 class ConsistencyJudge:
-    def __init__(self, use_cloud: Optional[bool] = None, model_name: Optional[str] = None, use_dual_pass: bool = False):
+    def __init__(self, use_cloud: Optional[bool] = None, model_name: Optional[str] = None, use_dual_pass: bool = False,
+                 use_streaming: Optional[bool] = None):
         from dotenv import load_dotenv
         load_dotenv()
         
@@ -98,6 +185,11 @@ class ConsistencyJudge:
         self.use_cloud = True 
         self.model_name = model_name or os.getenv("LLM_MODEL") or "groq-llama"
         self.use_dual_pass = use_dual_pass
+        if use_streaming is None:
+            use_streaming = os.getenv("LLM_STREAMING", "").lower() in ("1", "true", "yes")
+        self.use_streaming = use_streaming
+        self.use_hedging = os.getenv("LLM_HEDGING", "1").lower() in ("1", "true", "yes")
+        self.health = get_health_tracker()
         
         self.api_key = os.environ.get("OPENAI_API_KEY") or "sk-dummy"
         self.base_url = os.getenv("OPENAI_API_BASE") or "http://localhost:8000/v1"
@@ -132,7 +224,31 @@ class ConsistencyJudge:
 
         return {"label": label, "rationale": text.strip()[:600], "score": score, "evidence": evidence}
 
-    def _call_model(self, model: str, prompt: str) -> dict:
+    def _hedged_call(self, client, model: str, messages: list, stage: str, deadline=None) -> str:
+        """
+        Run the retry loop with each attempt hedged: an attempt that outlives the
+        alias's p95 latency gets one duplicate request, and the first success wins.
+        """
+        delay = self.health.hedge_delay(model) if self.use_hedging else None
+
+        def on_hedge():
+            print(f"DEBUG: {model} exceeded p95 ({delay:.1f}s). Sending hedged duplicate.", flush=True)
+            self.health.note_hedge(model)
+
+        return _call_with_retry(
+            client,
+            model=model,
+            messages=messages,
+            stage=stage,
+            stream=self.use_streaming,
+            required_fields=DA_FIELDS if stage == "da" else JURY_FIELDS,
+            tracker=self.health,
+            deadline=deadline,
+            hedge_delay=delay,
+            on_hedge=on_hedge
+        )
+
+    def _call_model(self, model: str, prompt: str, stage: str = "jury", deadline=None) -> dict:
         """Call a specific model via the LiteLLM rotator with automatic retries."""
         from openai import OpenAI
         try:
@@ -140,29 +256,46 @@ class ConsistencyJudge:
             # However, with 3 ensemble models, we might want some parallelism.
             # Let's use a smaller lock or just rely on the retry logic.
             client = OpenAI(api_key=self.api_key, base_url=self.base_url)
-            
-            res_text = _call_with_retry(
-                client, 
-                model=model, 
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            return self._parse_verdict(res_text)
+            messages = [{"role": "user", "content": prompt}]
+
+            # Circuit breaker: an open alias has its vote routed to the configured substitute
+            target = self.health.route(model) if get_batch_store() is None else model
+            try:
+                res_text = self._hedged_call(client, target, messages, stage, deadline)
+            except CircuitOpen:
+                substitute = self.health.route(target)
+                if substitute == target:
+                    raise
+                target = substitute
+                res_text = self._hedged_call(client, target, messages, stage, deadline)
+
+            verdict = self._parse_verdict(res_text)
+            if target != model:
+                verdict["rationale"] = f"[SUBSTITUTE {model}->{target}] {verdict['rationale']}"
+            return verdict
+        except (BatchPending, DeadlineExceeded):
+            raise
         except Exception as e:
             print(f"DEBUG: FINAL FAILURE on model {model} after retries: {e}")
             # If it's a FINAL failure, we STILL return consistent to avoid crashing the pipeline,
             # but we mark it clearly in the rationale.
             return {"label": 1, "rationale": f"CRITICAL_FAILURE on {model}: {str(e)}", "score": 0, "evidence": ""}
 
-    def judge_single(self, prompt: str, plot_map: str = "") -> dict:
+    def judge_single(self, prompt: str, plot_map: str = "", deadline=None, jitter: bool = True) -> dict:
         """
         Final ensemble judge with Devil's Advocate intervention.
         V5.0: Incorporates Hierarchical Plot Maps for global context.
+        With a story deadline the jury degrades as the budget runs out: the DA is
+        skipped first, then the ensemble shrinks to a single juror.
+        Callers that already bound concurrency (async UDF capacity) pass jitter=False.
         """
+        level = deadline.level() if deadline is not None else FULL
+
         # Space out stories to prevent LiteLLM saturation/429 crashes
         # With 80 rows, we want to spread out the 'thundering herd'
         import random
-        time.sleep(random.uniform(2.0, 15.0))
+        if jitter and get_batch_store() is None and level == FULL:
+            time.sleep(random.uniform(2.0, 15.0))
         
         # Inject Plot Map into prompt if available
         if plot_map:
@@ -176,21 +309,43 @@ class ConsistencyJudge:
         
         if self.model_name not in ensemble_models:
              ensemble_models[0] = self.model_name
+
+        if level >= REDUCED_JURY:
+            ensemble_models = ensemble_models[:1]
+            deadline.degrade(REDUCED_JURY)
              
-        import concurrent.futures
+        pending = []
+        timed_out = []
         with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-            futures = {executor.submit(self._call_model, m, prompt): m for m in ensemble_models}
+            futures = {executor.submit(self._call_model, m, prompt, "jury", deadline): m for m in ensemble_models}
             for future in concurrent.futures.as_completed(futures):
-                res = future.result()
+                try:
+                    res = future.result()
+                except BatchPending as e:
+                    # Keep collecting so every juror's request is emitted in the same pass
+                    pending.append(e.custom_id)
+                    continue
+                except DeadlineExceeded:
+                    timed_out.append(futures[future])
+                    continue
                 results.append(res)
                 labels.append(res["label"])
+
+        # Batch mode: the DA prompt depends on the jury votes, so defer it to the next pass
+        if pending:
+            raise BatchPending(pending[0], count=len(pending))
+        if not results:
+            raise DeadlineExceeded(f"No juror answered within the story budget ({', '.join(timed_out)})")
+        if timed_out:
+            deadline.degrade(REDUCED_JURY)
         
         ensemble_rationale = " | ".join([f"M{i}: {r['rationale'][:100]}" for i, r in enumerate(results)])
         ensemble_sum = sum(labels)
+        majority = len(labels) // 2 + 1
         
         # Case A: Split Decision (2:1 or 1:2) -> Ask DA to arbitrate
         # Case B: Unanimous -> DA tries to find hidden flaws
-        is_split = (ensemble_sum == 1 or ensemble_sum == 2)
+        is_split = 0 < ensemble_sum < len(labels)
         
         arbitration_instr = ""
         if is_split:
@@ -204,15 +359,31 @@ You MUST provide a DIRECT_QUOTE from the provided evidence excerpts to support a
 {prompt}
 {arbitration_instr}
 """
-        # Intensive pass with high-capacity model
-        da_res = self._call_model(devils_advocate_model, devils_prompt)
+        final_label = 1 if ensemble_sum >= majority else 0
+
+        # Deadline degradation: answer with the ensemble majority and no DA pass
+        da_res = None
+        if deadline is not None and deadline.level() >= NO_DA:
+            deadline.degrade(NO_DA)
+        else:
+            try:
+                # Intensive pass with high-capacity model
+                da_res = self._call_model(devils_advocate_model, devils_prompt, stage="da", deadline=deadline)
+            except DeadlineExceeded:
+                deadline.degrade(NO_DA)
+        if da_res is None:
+            return {
+                "label": final_label,
+                "rationale": f"[DA SKIPPED: deadline] | {ensemble_rationale}",
+                "confidence": "Medium",
+                "da_score": None
+            }
         
         # OVERRIDE LOGIC:
         # 1. If DA finds a contradiction (0) AND provides evidence (quote) AND score is >= 8, we override.
         # 2. If ensemble says 1 (Consist) but DA presents strong proof (score 8+), result = 0.
         # 3. If ensemble says 0 (Contradict) but DA score is <= 3, result = 1.
         
-        final_label = 1 if ensemble_sum >= 2 else 0
         override_msg = ""
         
         # V5.0 CALIBRATED THRESHOLDS: Overwrite if DA is confident (7+) or dismissive (4-)
@@ -0,0 +1,190 @@
+"""
+Per-alias health tracking for the LiteLLM rotator aliases.
+
+Each alias keeps a rolling window of call latencies and outcomes. The tracker
+derives latency percentiles (used as the hedging delay) and error rates, and
+runs a circuit breaker per alias: after repeated failures the alias is opened,
+its votes are routed to a configured substitute, and after a cooldown a single
+probe call is allowed through (half-open) to decide whether to close it again.
+"""
+import os
+import json
+import time
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+# Fallback alias for each jury / DA model while its circuit is open
+DEFAULT_SUBSTITUTES = {
+    "groq-llama": "groq-scout",
+    "or-trinity": "groq-scout",
+    "or-nemotron-9b": "groq-llama",
+    "groq-qwen": "groq-llama",
+    "groq-scout": "groq-llama",
+    "groq-llama-small": "groq-scout",
+}
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised when a call is refused (or abandoned) because the alias circuit is open."""
+    def __init__(self, alias: str):
+        super().__init__(f"Circuit open for {alias}")
+        self.alias = alias
+
+
+class AliasHealth:
+    def __init__(self, window: int):
+        self.samples = deque(maxlen=window)  # (latency_seconds, ok)
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.calls = 0
+        self.errors = 0
+        self.hedges = 0
+        self.substituted = 0
+
+
+class ModelHealthTracker:
+    def __init__(self, window: int = 50, failure_threshold: int = 3, error_rate_threshold: float = 0.5,
+                 min_samples: int = 5, cooldown_seconds: float = 60.0, hedge_percentile: float = 95.0,
+                 substitutes: Optional[Dict[str, str]] = None):
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = min_samples
+        self.cooldown_seconds = cooldown_seconds
+        self.hedge_percentile = hedge_percentile
+        self.substitutes = dict(DEFAULT_SUBSTITUTES if substitutes is None else substitutes)
+        self.aliases: Dict[str, AliasHealth] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, alias: str) -> AliasHealth:
+        if alias not in self.aliases:
+            self.aliases[alias] = AliasHealth(self.window)
+        return self.aliases[alias]
+
+    # --- Recording -------------------------------------------------------
+    def record(self, alias: str, latency: float, ok: bool):
+        with self._lock:
+            h = self._get(alias)
+            h.samples.append((latency, ok))
+            h.calls += 1
+            if h.state == HALF_OPEN:
+                h.probe_in_flight = False
+            if ok:
+                h.consecutive_failures = 0
+                h.state = CLOSED
+                return
+            h.errors += 1
+            h.consecutive_failures += 1
+            if h.state == HALF_OPEN or self._should_open(h):
+                h.state = OPEN
+                h.opened_at = time.time()
+
+    def _should_open(self, h: AliasHealth) -> bool:
+        if h.consecutive_failures >= self.failure_threshold:
+            return True
+        if len(h.samples) >= self.min_samples:
+            return self._error_rate(h) >= self.error_rate_threshold
+        return False
+
+    def note_hedge(self, alias: str):
+        with self._lock:
+            self._get(alias).hedges += 1
+
+    # --- Breaker ---------------------------------------------------------
+    def allow(self, alias: str) -> bool:
+        """Whether a call to `alias` may be attempted now (admits one half-open probe)."""
+        with self._lock:
+            h = self._get(alias)
+            if h.state == CLOSED:
+                return True
+            if h.state == OPEN and time.time() - h.opened_at >= self.cooldown_seconds:
+                h.state = HALF_OPEN
+                h.probe_in_flight = False
+            if h.state == HALF_OPEN and not h.probe_in_flight:
+                h.probe_in_flight = True
+                return True
+            return False
+
+    def available(self, alias: str) -> bool:
+        """Like allow(), but without consuming the half-open probe slot."""
+        with self._lock:
+            h = self._get(alias)
+            if h.state == CLOSED:
+                return True
+            if h.state == OPEN:
+                return time.time() - h.opened_at >= self.cooldown_seconds
+            return not h.probe_in_flight
+
+    def is_open(self, alias: str) -> bool:
+        with self._lock:
+            return self._get(alias).state == OPEN
+
+    def route(self, alias: str) -> str:
+        """Return `alias`, or its substitute while the alias is refusing calls."""
+        if self.available(alias):
+            return alias
+        substitute = self.substitutes.get(alias)
+        if substitute and substitute != alias and self.available(substitute):
+            with self._lock:
+                self._get(alias).substituted += 1
+            print(f"[HEALTH] Circuit open for {alias}; routing vote to {substitute}", flush=True)
+            return substitute
+        # Nothing healthier available: let the caller try the primary anyway
+        return alias
+
+    # --- Statistics ------------------------------------------------------
+    @staticmethod
+    def _error_rate(h: AliasHealth) -> float:
+        if not h.samples:
+            return 0.0
+        return sum(1 for _, ok in h.samples if not ok) / len(h.samples)
+
+    def error_rate(self, alias: str) -> float:
+        with self._lock:
+            return self._error_rate(self._get(alias))
+
+    def percentile(self, alias: str, pct: float) -> Optional[float]:
+        """Nearest-rank latency percentile over successful calls in the window."""
+        with self._lock:
+            latencies = sorted(lat for lat, ok in self._get(alias).samples if ok)
+        if len(latencies) < self.min_samples:
+            return None
+        rank = max(0, min(len(latencies) - 1, int(round(pct / 100.0 * len(latencies))) - 1))
+        return latencies[rank]
+
+    def hedge_delay(self, alias: str) -> Optional[float]:
+        return self.percentile(alias, self.hedge_percentile)
+
+    def report(self) -> str:
+        lines = [f"{'Alias':<18} {'State':<10} {'Calls':>6} {'Err%':>6} {'p50 s':>7} {'p95 s':>7} {'Hedges':>7} {'Subs':>5}"]
+        for alias in sorted(self.aliases):
+            h = self.aliases[alias]
+            p50 = self.percentile(alias, 50)
+            p95 = self.percentile(alias, 95)
+            lines.append(f"{alias:<18} {h.state:<10} {h.calls:>6} {100 * self.error_rate(alias):>5.0f}% "
+                         f"{(p50 or 0):>7.1f} {(p95 or 0):>7.1f} {h.hedges:>7} {h.substituted:>5}")
+        return "\n".join(lines)
+
+
+# Global instance shared by all jury threads in the process
+_health_tracker = None
+
+
+def get_health_tracker() -> ModelHealthTracker:
+    global _health_tracker
+    if _health_tracker is None:
+        substitutes = None
+        if os.getenv("JURY_SUBSTITUTES"):
+            substitutes = {**DEFAULT_SUBSTITUTES, **json.loads(os.environ["JURY_SUBSTITUTES"])}
+        _health_tracker = ModelHealthTracker(
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3")),
+            cooldown_seconds=float(os.getenv("CIRCUIT_COOLDOWN_SECONDS", "60")),
+            hedge_percentile=float(os.getenv("HEDGE_PERCENTILE", "95")),
+            substitutes=substitutes,
+        )
+    return _health_tracker
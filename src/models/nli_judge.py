@@ -2,7 +2,9 @@ import logging
 import torch
 import torch.nn.functional as F
 import spacy
+import os
 import re
+import threading
 from typing import List, Dict, Tuple
 
 logger = logging.getLogger(__name__)
@@ -12,8 +14,22 @@ _model_instance = None
 _bi_encoder_instance = None
 _spacy_instance = None
 _reranker_instance = None
+# Async UDFs evaluate several stories in worker threads; load each model only once
+_models_lock = threading.Lock()
+# Singletons belong to the process that built them; a forked worker builds its own
+_models_pid = None
 
 def get_models():
+    global _model_instance, _bi_encoder_instance, _spacy_instance, _reranker_instance, _models_pid
+    with _models_lock:
+        if _models_pid != os.getpid():
+            from src.models.workers import configure_torch_threads
+            configure_torch_threads()
+            _model_instance = _bi_encoder_instance = _spacy_instance = _reranker_instance = None
+            _models_pid = os.getpid()
+        return _load_models()
+
+def _load_models():
     global _model_instance, _bi_encoder_instance, _spacy_instance, _reranker_instance
     if _model_instance is None:
         from sentence_transformers import CrossEncoder
@@ -43,15 +59,22 @@ def check_temporal_clash(claim: str, evidence: str) -> bool:
         return not any(y in e_years for y in c_years)
     return False
 
-def evaluate_backstory_nli(backstory: str, retrieved_chunks: list[dict]) -> tuple[int, str, list[dict]]:
+def evaluate_backstory_nli(backstory: str, retrieved_chunks: list[dict], dossier=None, rerank: bool = True) -> tuple[int, str, list[dict]]:
     """
     Evaluates a backstory against chunks using NLI and temporal checks.
     Returns (label, rationale) where label: 0 (contradict), 1 (consistent).
+    With a CharacterDossier, chunk sentence splits and sentence embeddings are
+    reused across stories about the same character. rerank=False keeps the
+    retrieval order and cuts to the same 12 chunks (used by ablation runs).
     """
     cross_enc, bi_enc, nlp, reranker = get_models()
+    if dossier is not None:
+        dossier.add_story()
     
     # 1. Chunk Reranking
-    if len(retrieved_chunks) > 12:
+    if len(retrieved_chunks) > 12 and not rerank:
+        retrieved_chunks = retrieved_chunks[:12]
+    elif len(retrieved_chunks) > 12:
         pairs = [(backstory, c.get("text", "")) for c in retrieved_chunks]
         scores = reranker.predict(pairs)
         ranked = sorted(zip(retrieved_chunks, scores), key=lambda x: x[1], reverse=True)
@@ -68,6 +91,11 @@ def evaluate_backstory_nli(backstory: str, retrieved_chunks: list[dict]) -> tupl
     for chunk in retrieved_chunks:
         c_text = chunk.get("text", "")
         c_source = chunk.get("chapter", "Book")
+        if dossier is not None:
+            for s_text in dossier.split(c_text, nlp):
+                all_evidence_sentences.append(s_text)
+                sentence_to_source[s_text] = c_source
+            continue
         c_doc = nlp(c_text)
         for sent in c_doc.sents:
             s_text = sent.text.strip()
@@ -79,7 +107,11 @@ def evaluate_backstory_nli(backstory: str, retrieved_chunks: list[dict]) -> tupl
          return 1, "Consistent (No evidence found)", retrieved_chunks
 
     from sentence_transformers import util
-    ev_embeddings = bi_enc.encode(all_evidence_sentences, convert_to_tensor=True)
+    if dossier is not None:
+        # The cache holds numpy rows; move them to the device claim embeddings are encoded on
+        ev_embeddings = torch.from_numpy(dossier.embed(all_evidence_sentences, bi_enc)).to(bi_enc.device)
+    else:
+        ev_embeddings = bi_enc.encode(all_evidence_sentences, convert_to_tensor=True)
     
     strong_contradictions = []  
     moderate_contradictions = []  
@@ -0,0 +1,189 @@
+"""
+Streaming chat completions with early termination.
+
+The jury only needs the structured fields that `_parse_verdict` reads
+(VERDICT, CONTRADICTION_SCORE, DIRECT_QUOTE). When streaming is enabled the
+response is parsed as tokens arrive and the stream is closed as soon as every
+required field has been seen in full; the rationale received up to
+that point is kept. Per-model savings are collected in a process-wide registry.
+
+The savings come from the devil's-advocate calls, whose fields can appear
+early. The jury prompt asks for numbered reasoning steps and the VERDICT line
+as the last step, so a jury stream stops only a few tokens before it would have
+ended anyway; the reasoning-first order is kept on purpose.
+
+Stream chunks are not tokens (providers batch several per chunk), so received
+tokens are counted on the text: the completion_tokens the stream reports when
+it runs to the end (requested with stream_options.include_usage, which
+LLM_STREAM_USAGE=0 turns off for providers that reject it), otherwise
+cl100k_base via tiktoken when it is installed, else the usual ~4 characters
+per token.
+"""
+import os
+import re
+import time
+import threading
+from typing import Dict, Iterable, List, Optional
+
+JURY_FIELDS = ("VERDICT",)
+DA_FIELDS = ("VERDICT", "CONTRADICTION_SCORE", "DIRECT_QUOTE")
+CHARS_PER_TOKEN = 4
+_encoding = None
+
+FIELD_PATTERNS = {
+    # A field counts as seen once its value can no longer grow
+    "VERDICT": re.compile(r'VERDICT:\s*(CONSISTENT|CONTRADICTORY|CONTRADICT|INCONSISTENT)(?=[^A-Z])', re.IGNORECASE),
+    "CONTRADICTION_SCORE": re.compile(r'CONTRADICTION_SCORE:\s*\d+(?=\D)', re.IGNORECASE),
+    # _parse_verdict keeps the rest of the quote line, so wait for its newline
+    "DIRECT_QUOTE": re.compile(r'DIRECT_QUOTE:[^\n]*\S[^\n]*\n', re.IGNORECASE),
+}
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in `text`: cl100k_base when tiktoken is installed, else a characters-per-token estimate."""
+    global _encoding
+    if not text:
+        return 0
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except ImportError:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return max(1, round(len(text) / CHARS_PER_TOKEN))
+
+
+class VerdictFieldWatcher:
+    """Accumulates streamed text and reports when all required fields are complete."""
+
+    def __init__(self, required_fields: Iterable[str] = JURY_FIELDS):
+        self.required = [f for f in required_fields if f in FIELD_PATTERNS]
+        self.seen: set = set()
+        self.parts: List[str] = []
+        self._scan_from = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def feed(self, delta: str) -> bool:
+        if delta:
+            self.parts.append(delta)
+        if not self.required:
+            return False
+        text = self.text
+        # Only rescan the tail that may contain a newly finished line
+        window = text[max(0, self._scan_from - 200):]
+        for field in self.required:
+            if field not in self.seen and FIELD_PATTERNS[field].search(window):
+                self.seen.add(field)
+        self._scan_from = len(text)
+        return self.complete
+
+    @property
+    def complete(self) -> bool:
+        return bool(self.required) and len(self.seen) == len(self.required)
+
+
+class StreamStats:
+    """Per-model record of streamed calls, received tokens and estimated savings."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.models: Dict[str, Dict[str, float]] = {}
+
+    def _entry(self, model: str) -> Dict[str, float]:
+        return self.models.setdefault(model, {
+            "calls": 0, "early_stops": 0, "tokens_received": 0,
+            "full_tokens": 0, "full_calls": 0, "stream_seconds": 0.0,
+            "saved_tokens": 0.0, "saved_seconds": 0.0,
+        })
+
+    def record(self, model: str, tokens: int, elapsed: float, early_stop: bool, max_tokens: int):
+        with self._lock:
+            e = self._entry(model)
+            e["calls"] += 1
+            e["tokens_received"] += tokens
+            e["stream_seconds"] += elapsed
+            if not early_stop:
+                e["full_tokens"] += tokens
+                e["full_calls"] += 1
+                return
+            e["early_stops"] += 1
+            # Baseline: average length of this model's un-truncated answers, else the max_tokens cap
+            baseline = e["full_tokens"] / e["full_calls"] if e["full_calls"] else max_tokens
+            saved = max(0.0, baseline - tokens)
+            rate = tokens / elapsed if elapsed > 0 else 0.0
+            e["saved_tokens"] += saved
+            e["saved_seconds"] += saved / rate if rate > 0 else 0.0
+
+    def report(self) -> str:
+        lines = [f"{'Model':<20} {'Calls':>6} {'Early':>6} {'Tokens':>8} {'Saved tok':>10} {'Saved s':>8}"]
+        with self._lock:
+            for model, e in sorted(self.models.items()):
+                lines.append(f"{model:<20} {int(e['calls']):>6} {int(e['early_stops']):>6} "
+                             f"{int(e['tokens_received']):>8} {int(e['saved_tokens']):>10} {e['saved_seconds']:>8.1f}")
+        return "\n".join(lines)
+
+
+# Global instance shared by all jury threads in the process
+STREAM_STATS = StreamStats()
+
+
+def stream_completion(client, model: str, messages: list, required_fields: Iterable[str] = JURY_FIELDS,
+                      max_tokens: int = 800, stats: Optional[StreamStats] = None,
+                      timeout: Optional[float] = None, cancel: Optional[threading.Event] = None,
+                      include_usage: Optional[bool] = None) -> str:
+    """Stream a chat completion and stop once every required verdict field is present.
+
+    Setting `cancel` (e.g. when a hedged duplicate has already won) closes the stream
+    at the next chunk; a cancelled stream is not recorded in the stats.
+    """
+    stats = stats or STREAM_STATS
+    if include_usage is None:
+        include_usage = os.getenv("LLM_STREAM_USAGE", "1").lower() in ("1", "true", "yes")
+    watcher = VerdictFieldWatcher(required_fields)
+    start = time.time()
+    usage_tokens = None
+    early_stop = False
+    cancelled = False
+
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=0.0,
+        max_tokens=max_tokens,
+        stream=True,
+        **({"stream_options": {"include_usage": True}} if include_usage else {}),
+        **({"timeout": timeout} if timeout is not None else {})
+    )
+    try:
+        for chunk in stream:
+            if cancel is not None and cancel.is_set():
+                cancelled = True
+                break
+            usage = getattr(chunk, "usage", None)
+            if usage is not None and getattr(usage, "completion_tokens", None) is not None:
+                usage_tokens = usage.completion_tokens
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content or ""
+            if not delta:
+                continue
+            if watcher.feed(delta):
+                early_stop = True
+                break
+    finally:
+        if (early_stop or cancelled) and hasattr(stream, "close"):
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    if cancelled:
+        return watcher.text
+    tokens = usage_tokens if usage_tokens is not None and not early_stop else count_tokens(watcher.text)
+    stats.record(model, tokens, time.time() - start, early_stop, max_tokens)
+    return watcher.text
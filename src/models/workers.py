@@ -0,0 +1,54 @@
+"""
+Pathway worker topology and per-process resource setup.
+
+`pathway spawn --processes P --threads T python main.py` (or PATHWAY_THREADS
+for a single process) runs T worker threads in each of P processes. Each
+process builds its own model singletons; worker threads within a process
+share them. Torch's intra-op pool is sized so that all workers on the machine
+together use about one thread per core instead of each grabbing every core.
+"""
+import os
+import threading
+from typing import Tuple
+
+_configured_pid = None
+_configure_lock = threading.Lock()
+
+
+def pathway_topology() -> Tuple[int, int, int]:
+    """(processes, threads per process, this process id) from the Pathway env."""
+    processes = max(1, int(os.getenv("PATHWAY_PROCESSES", "1")))
+    threads = max(1, int(os.getenv("PATHWAY_THREADS", "1")))
+    process_id = int(os.getenv("PATHWAY_PROCESS_ID", "0"))
+    return processes, threads, process_id
+
+
+def is_primary_process() -> bool:
+    """Process 0 owns shared files (results, lifecycle cleanup, reports)."""
+    return pathway_topology()[2] == 0
+
+
+def torch_threads_per_process() -> int:
+    if os.getenv("TORCH_NUM_THREADS"):
+        return max(1, int(os.environ["TORCH_NUM_THREADS"]))
+    processes, threads, _ = pathway_topology()
+    return max(1, (os.cpu_count() or 1) // (processes * threads))
+
+
+def configure_torch_threads() -> int:
+    """Set torch intra-/inter-op threads once per process; returns the intra-op count."""
+    global _configured_pid
+    n = torch_threads_per_process()
+    with _configure_lock:
+        if _configured_pid == os.getpid():
+            return n
+        import torch
+        torch.set_num_threads(n)
+        try:
+            torch.set_num_interop_threads(max(1, min(n, 4)))
+        except RuntimeError:
+            pass  # inter-op pool already started in this process
+        _configured_pid = os.getpid()
+    processes, threads, process_id = pathway_topology()
+    print(f"[WORKERS] process {process_id}/{processes}, {threads} worker thread(s), torch threads={n}", flush=True)
+    return n
@@ -0,0 +1,260 @@
+"""
+In-process whole-book chunk index for targeted (DA-guided) re-retrieval.
+
+The Pathway VectorStoreServer answers the per-claim queries inside the
+dataflow, but a UDF cannot issue new queries against it. This index covers
+the same novels with the same embedding model: each book is split on the
+chapter heuristic shared with NarrativeRetriever, cut into overlapping windows,
+and encoded once with the cached bi-encoder from nli_judge. Embeddings are
+cached on disk keyed by book content, model and chunking parameters, so a
+re-retrieval costs one query encoding and one matrix-vector product.
+
+The same book texts also give every retrieved chunk its typed location
+(book, chapter, progress, character offsets), see `chunk_refs`.
+"""
+import os
+import re
+import bisect
+import hashlib
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.pathway_pipeline.fusion import chunk_id, chunk_text_of
+
+# Same heuristic as NarrativeRetriever: CHAPTER/PART/BOOK with Roman/Arabic numerals
+CHAPTER_PATTERN = re.compile(r"(?i)^\s*(CHAPTER|PART|BOOK|Chapter|Part|Book)\s+([IVXLCDM\d]+|[A-Z]+).*$", re.MULTILINE)
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+DEFAULT_CACHE_DIR = ".cache/book_index"
+
+# Typed per-chunk retrieval fields, in the order of a chunk ref tuple
+RETRIEVAL_FIELDS = ("chunk_id", "book", "chapter", "progress_pct", "start", "end", "score")
+
+
+def split_chapters(text: str) -> List[Tuple[str, int, int]]:
+    """Return (chapter_title, start, end) spans, including a substantial preamble."""
+    matches = list(CHAPTER_PATTERN.finditer(text))
+    if not matches:
+        return [("Full Text", 0, len(text))]
+    spans = []
+    if matches[0].start() > 0 and len(text[:matches[0].start()].strip()) > 100:
+        spans.append(("Preamble", 0, matches[0].start()))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        spans.append((match.group(0).strip(), match.start(), end))
+    return spans
+
+
+def window_chunks(text: str, chunk_size: int = 1500, overlap: int = 200) -> List[Tuple[str, int, int]]:
+    """Chapter-aware sliding windows as (chunk_text, start, end) offsets into `text`."""
+    chunks = []
+    step = max(1, chunk_size - overlap)
+    for chapter, c_start, c_end in split_chapters(text):
+        start = c_start
+        while start < c_end:
+            end = min(start + chunk_size, c_end)
+            if text[start:end].strip():
+                chunks.append((chapter, start, end))
+            if end == c_end:
+                break
+            start += step
+    return chunks
+
+
+def normalize_book_key(name: str) -> str:
+    base = str(name or "").split("/")[-1]
+    return base.lower().replace(".txt", "").strip().strip('"').strip("'").strip()
+
+
+class BookChunkIndex:
+    """
+    Lazily built per-book embedding index. `encoder` is any object with a
+    SentenceTransformer-style `encode(texts, normalize_embeddings=True)`; by
+    default the shared bi-encoder from nli_judge.get_models() is used.
+    """
+
+    def __init__(self, books_dir: str, encoder=None, model_name: str = DEFAULT_MODEL,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR, chunk_size: int = 1500, overlap: int = 200):
+        self.books_dir = books_dir
+        self.model_name = model_name
+        self.cache_dir = cache_dir
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self._encoder = encoder
+        self._books: Dict[str, dict] = {}
+        self._texts: Dict[str, dict] = {}
+        self._located: Dict[int, Optional[tuple]] = {}
+        self._files: Optional[Dict[str, str]] = None
+        # Re-entrant: building a book's embeddings loads its text under the same lock
+        self._lock = threading.RLock()
+
+    @property
+    def encoder(self):
+        if self._encoder is None:
+            from src.models.nli_judge import get_models
+            _, self._encoder, _, _ = get_models()
+        return self._encoder
+
+    def book_files(self) -> Dict[str, str]:
+        if self._files is None:
+            if not os.path.isdir(self.books_dir):
+                return {}
+            self._files = {normalize_book_key(f): os.path.join(self.books_dir, f)
+                           for f in sorted(os.listdir(self.books_dir)) if f.endswith(".txt")}
+        return self._files
+
+    def resolve_book(self, book: str) -> Optional[str]:
+        """Map a CSV book name (any casing, with or without .txt) to an index key."""
+        files = self.book_files()
+        key = normalize_book_key(book)
+        if key in files:
+            return key
+        for candidate in files:
+            if key and (key in candidate or candidate in key):
+                return candidate
+        return None
+
+    def _cache_path(self, key: str, text: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        digest = hashlib.sha256(
+            f"{self.model_name}\n{self.chunk_size}\n{self.overlap}\n".encode("utf-8") + text.encode("utf-8")
+        ).hexdigest()[:16]
+        safe = re.sub(r"[^a-z0-9]+", "_", key).strip("_")
+        return os.path.join(self.cache_dir, f"{safe}-{digest}.npy")
+
+    def book_text(self, key: str) -> dict:
+        """Book text and its chapter spans (no embeddings), loaded once."""
+        with self._lock:
+            if key not in self._texts:
+                with open(self.book_files()[key], "r", encoding="utf-8", errors="ignore") as f:
+                    text = f.read()
+                chapters = split_chapters(text)
+                self._texts[key] = {"text": text, "chapters": chapters, "starts": [s for _, s, _ in chapters]}
+            return self._texts[key]
+
+    def _build(self, key: str) -> dict:
+        import numpy as np
+        text = self.book_text(key)["text"]
+        spans = window_chunks(text, self.chunk_size, self.overlap)
+        cache_path = self._cache_path(key, text)
+        if cache_path and os.path.exists(cache_path):
+            embeddings = np.load(cache_path)
+            print(f"[BOOK-INDEX] Loaded {len(spans)} cached chunk embeddings for '{key}'", flush=True)
+        else:
+            print(f"[BOOK-INDEX] Encoding {len(spans)} chunks for '{key}'...", flush=True)
+            embeddings = np.asarray(self.encoder.encode([text[s:e] for _, s, e in spans],
+                                                        normalize_embeddings=True), dtype=np.float32)
+            if cache_path:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                tmp_path = f"{cache_path}.tmp.npy"
+                np.save(tmp_path, embeddings)
+                os.replace(tmp_path, cache_path)
+        return {"text": text, "spans": spans, "embeddings": embeddings}
+
+    def book(self, key: str) -> dict:
+        # Built under the lock so concurrent stories encode each book only once
+        with self._lock:
+            if key not in self._books:
+                self._books[key] = self._build(key)
+            return self._books[key]
+
+    def search(self, query: str, k: int = 5, book: Optional[str] = None, min_score: float = 0.0) -> List[dict]:
+        """Top-k chunks for `query` over a whole book (or every book when `book` is None)."""
+        import numpy as np
+        if book is not None:
+            key = self.resolve_book(book)
+            keys = [key] if key else []
+        else:
+            keys = list(self.book_files())
+        if not keys or not query:
+            return []
+        query_emb = np.asarray(self.encoder.encode([query], normalize_embeddings=True), dtype=np.float32)[0]
+
+        hits = []
+        for key in keys:
+            entry = self.book(key)
+            scores = entry["embeddings"] @ query_emb
+            top = np.argsort(-scores)[:k]
+            total = max(len(entry["text"]), 1)
+            for i in top:
+                score = float(scores[i])
+                if score < min_score:
+                    continue
+                chapter, start, end = entry["spans"][i]
+                hits.append({
+                    "text": entry["text"][start:end], "chapter": chapter, "book": key,
+                    "progress_pct": round(start / total * 100, 1), "start": start, "end": end, "score": score,
+                })
+        hits.sort(key=lambda h: h["score"], reverse=True)
+        return hits[:k]
+
+
+    def locate(self, chunk, book: Optional[str] = None) -> Optional[tuple]:
+        """
+        (book, chapter, progress_pct, start, end) of a retrieved chunk, found by
+        its text in the story's book first and then in the others. None if absent.
+        """
+        text = chunk_text_of(chunk).strip()
+        cid = chunk_id(text)
+        with self._lock:
+            if cid in self._located:
+                return self._located[cid]
+        hint = self.resolve_book(book) if book else None
+        keys = ([hint] if hint else []) + [k for k in self.book_files() if k != hint]
+        found = None
+        for key in keys if text else ():
+            entry = self.book_text(key)
+            start = entry["text"].find(text)
+            if start < 0:
+                # Splitters may re-flow a chunk's tail; its opening is still verbatim
+                start = entry["text"].find(text[:120])
+            if start < 0:
+                continue
+            i = max(0, bisect.bisect_right(entry["starts"], start) - 1)
+            total = max(len(entry["text"]), 1)
+            found = (key, entry["chapters"][i][0], round(start / total * 100, 1), start, start + len(text))
+            break
+        with self._lock:
+            self._located[cid] = found
+        return found
+
+
+def chunk_refs(chunks: Optional[Sequence], scores: Optional[Sequence] = None, book: Optional[str] = None,
+               index: Optional[BookChunkIndex] = None) -> Tuple[tuple, ...]:
+    """
+    Typed retrieval columns for one query's matches: one tuple per RETRIEVAL_FIELDS
+    entry, row-aligned with `chunks`. Unlocated chunks get book "" and chapter "Unknown".
+    """
+    rows = []
+    for rank, chunk in enumerate(chunks or ()):
+        where = index.locate(chunk, book) if index is not None else None
+        book_key, chapter, progress, start, end = where or ("", "Unknown", 0.0, -1, -1)
+        score = scores[rank] if scores is not None and rank < len(scores) and scores[rank] is not None else None
+        rows.append((chunk_id(chunk), book_key, chapter, progress, start, end,
+                     float(score) if score is not None else None))
+    return tuple(tuple(r[f] for r in rows) for f in range(len(RETRIEVAL_FIELDS)))
+
+
+def ref_field(ref, name: str, default=None):
+    """A field of a chunk ref tuple (or of a legacy metadata dict from older checkpoints)."""
+    if isinstance(ref, dict):
+        return ref.get(name, default)
+    try:
+        value = ref[RETRIEVAL_FIELDS.index(name)]
+    except (TypeError, IndexError, ValueError):
+        return default
+    return default if value is None else value
+
+
+# Process-wide instance, shared by every story's re-retrieval
+_book_index = None
+_book_index_lock = threading.Lock()
+
+
+def get_book_index(books_dir: str = "Dataset/Books/") -> BookChunkIndex:
+    global _book_index
+    with _book_index_lock:
+        if _book_index is None or _book_index.books_dir != books_dir:
+            _book_index = BookChunkIndex(books_dir, cache_dir=os.getenv("BOOK_INDEX_CACHE", DEFAULT_CACHE_DIR))
+        return _book_index
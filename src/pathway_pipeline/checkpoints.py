@@ -0,0 +1,127 @@
+"""
+Per-story, per-stage checkpoints for crash-safe resume.
+
+Every expensive stage of a story (identity, claims, retrieval hits, NLI
+result, jury votes, final verdict) is written to a local SQLite database as
+soon as it completes. Each entry carries a fingerprint of the stage inputs, so
+a checkpoint is only reused while the story text (and, for the jury, the
+prompt) is unchanged. A restarted run skips stories whose verdict is stored
+and resumes the others from their last completed stage.
+
+Enabled by default; CHECKPOINTS=0 disables it and CHECKPOINT_DB moves the file.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+STAGES = ("identity", "claims", "retrieval", "nli", "jury", "jury_reretrieval", "verdict")
+
+DEFAULT_DB_PATH = "checkpoints/pipeline.sqlite"
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable digest of a stage's inputs."""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class CheckpointStore:
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # One connection per process, shared by its UDF threads under the lock; other
+        # Pathway processes may hold the write lock briefly, so wait instead of failing
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " story_id TEXT NOT NULL, stage TEXT NOT NULL, fingerprint TEXT NOT NULL,"
+            " value TEXT NOT NULL, updated_at REAL NOT NULL,"
+            " PRIMARY KEY (story_id, stage))"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {}
+        self.writes: Dict[str, int] = {}
+
+    def get(self, story_id, stage: str, fp: str) -> Optional[Any]:
+        """Stored value for the stage, or None if missing or computed from other inputs."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, value FROM checkpoints WHERE story_id = ? AND stage = ?",
+                (str(story_id), stage)
+            ).fetchone()
+            if row is None or row[0] != fp:
+                return None
+            self.hits[stage] = self.hits.get(stage, 0) + 1
+        return json.loads(row[1])
+
+    def put(self, story_id, stage: str, fp: str, value: Any):
+        data = json.dumps(value, default=str, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (story_id, stage, fingerprint, value, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (str(story_id), stage, fp, data, time.time())
+            )
+            # Commit per stage: a crash loses at most the stage in flight
+            self._conn.commit()
+            self.writes[stage] = self.writes.get(stage, 0) + 1
+
+    def completed_stages(self, story_id) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage FROM checkpoints WHERE story_id = ?", (str(story_id),)
+            ).fetchall()
+        done = {r[0] for r in rows}
+        return [s for s in STAGES if s in done]
+
+    def count(self, stage: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM checkpoints WHERE stage = ?", (stage,)).fetchone()[0]
+
+    def clear(self, story_id=None):
+        with self._lock:
+            if story_id is None:
+                self._conn.execute("DELETE FROM checkpoints")
+            else:
+                self._conn.execute("DELETE FROM checkpoints WHERE story_id = ?", (str(story_id),))
+            self._conn.commit()
+
+    def summary(self) -> str:
+        lines = [f"{'Stage':<18} {'Reused':>7} {'Written':>8}"]
+        for stage in STAGES:
+            lines.append(f"{stage:<18} {self.hits.get(stage, 0):>7} {self.writes.get(stage, 0):>8}")
+        return "\n".join(lines)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def checkpoints_enabled() -> bool:
+    return os.getenv("CHECKPOINTS", "1").lower() not in ("0", "false", "no", "off")
+
+
+# Global instance shared by all UDFs in the process (SQLite connections are not fork-safe)
+_checkpoint_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> Optional[CheckpointStore]:
+    """Return the process-wide store, or None when checkpointing is disabled."""
+    global _checkpoint_store, _store_pid
+    if not checkpoints_enabled():
+        return None
+    with _store_lock:
+        if _checkpoint_store is None or _store_pid != os.getpid():
+            _checkpoint_store = CheckpointStore(os.getenv("CHECKPOINT_DB", DEFAULT_DB_PATH))
+            _store_pid = os.getpid()
+        return _checkpoint_store
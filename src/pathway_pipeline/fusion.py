@@ -0,0 +1,84 @@
+"""
+Cross-claim fusion of per-claim retrieval results.
+
+Each decomposed claim is retrieved separately (k matches per claim). Instead
+of concatenating and de-duplicating every claim's matches by their text, each
+chunk gets a stable integer id (a hash of its text) and the per-claim ranked
+lists are fused into one bounded, ranked evidence set per story:
+
+  rrf  reciprocal-rank fusion, sum over claims of 1 / (k + rank)
+  max  max-score fusion, best similarity over claims (needs scores)
+
+Top-N selection uses a heap, so the cost is O(M log N) for M claim hits.
+"""
+import os
+import heapq
+import hashlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+RRF_K = 60
+FUSION_METHOD = os.getenv("FUSION_METHOD", "rrf")
+FUSION_TOP_N = int(os.getenv("FUSION_TOP_N", "40"))
+
+# (chunk_id, rank, score-or-None)
+Hit = Tuple[int, int, Optional[float]]
+
+
+def chunk_text_of(chunk) -> str:
+    return chunk.decode("utf-8", errors="ignore") if isinstance(chunk, bytes) else str(chunk)
+
+
+def chunk_id(chunk) -> int:
+    """Stable 63-bit id of a chunk's text (same text -> same id, in every run and process)."""
+    digest = hashlib.blake2b(chunk_text_of(chunk).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & (2 ** 63 - 1)
+
+
+def ranked_ids(ids: Optional[Sequence[int]], scores: Optional[Sequence] = None) -> List[Hit]:
+    """One claim's matches in index order, as (chunk_id, rank, score)."""
+    hits = []
+    for rank, cid in enumerate(ids or ()):
+        score = float(scores[rank]) if scores is not None and rank < len(scores) and scores[rank] is not None else None
+        hits.append((int(cid), rank, score))
+    return hits
+
+
+def ranked_hits(chunks: Optional[Sequence], scores: Optional[Sequence] = None) -> List[Hit]:
+    """Same as ranked_ids, for chunk texts."""
+    return ranked_ids([chunk_id(c) for c in chunks or ()], scores)
+
+
+def reciprocal_rank_fusion(claim_hits: Iterable[Sequence[Hit]], top_n: int, k: int = RRF_K) -> List[Tuple[int, float]]:
+    fused: Dict[int, float] = {}
+    best_rank: Dict[int, int] = {}
+    for hits in claim_hits:
+        for cid, rank, _ in hits or ():
+            fused[cid] = fused.get(cid, 0.0) + 1.0 / (k + rank + 1)
+            best_rank[cid] = min(best_rank.get(cid, rank), rank)
+    # Ties: better single-claim rank first, then id, so the order is deterministic
+    top = heapq.nsmallest(top_n, fused, key=lambda cid: (-fused[cid], best_rank[cid], cid))
+    return [(cid, fused[cid]) for cid in top]
+
+
+def max_score_fusion(claim_hits: Iterable[Sequence[Hit]], top_n: int) -> List[Tuple[int, float]]:
+    best: Dict[int, float] = {}
+    for hits in claim_hits:
+        for cid, rank, score in hits or ():
+            if score is None:
+                raise ValueError("max-score fusion needs similarity scores from the retriever")
+            if score > best.get(cid, float("-inf")):
+                best[cid] = score
+    top = heapq.nsmallest(top_n, best, key=lambda cid: (-best[cid], cid))
+    return [(cid, best[cid]) for cid in top]
+
+
+def fuse(claim_hits: Iterable[Sequence[Hit]], method: str = FUSION_METHOD, top_n: int = FUSION_TOP_N) -> List[Tuple[int, float]]:
+    """Fused (chunk_id, fused_score) list, best first, at most top_n long."""
+    claim_hits = [h for h in claim_hits if h]
+    if method == "max":
+        if all(score is not None for hits in claim_hits for _, _, score in hits):
+            return max_score_fusion(claim_hits, top_n)
+        # The retriever returned no scores: rank fusion is the only option
+    elif method != "rrf":
+        raise ValueError(f"Unknown fusion method '{method}' (expected 'rrf' or 'max')")
+    return reciprocal_rank_fusion(claim_hits, top_n)
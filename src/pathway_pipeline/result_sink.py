@@ -0,0 +1,129 @@
+"""
+Idempotent, incremental result sink keyed by story id.
+
+Replaces `pw.io.csv.write` + pandas post-processing for the final results.
+Every row change from Pathway is appended to a JSONL log as soon as the story
+finishes, and the final CSV is compacted to exactly one row per story id with
+only the result columns (no time/diff). The CSV is rewritten atomically
+(temp file + rename), so a reader never sees a half-written file and partial
+results are readable at any point during a run.
+"""
+import os
+import csv
+import json
+import threading
+from typing import Dict, Iterable, List, Optional
+
+RESULT_COLUMNS = ["Story ID", "Prediction", "Rationale", "Confidence", "Degradation"]
+
+
+def _sort_key(story_id: str):
+    return (0, int(story_id), "") if story_id.lstrip("-").isdigit() else (1, 0, story_id)
+
+
+class ResultSink:
+    def __init__(self, csv_path: str, columns: Iterable[str] = RESULT_COLUMNS, key_column: str = "Story ID",
+                 log_path: Optional[str] = None, resume: bool = False):
+        self.csv_path = csv_path
+        self.columns = list(columns)
+        self.key_column = key_column
+        self.log_path = log_path or f"{csv_path}.log.jsonl"
+        self.rows: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if os.path.dirname(self.log_path):
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        if resume and os.path.exists(self.log_path):
+            self.rows = self.replay(self.log_path)
+        else:
+            open(self.log_path, "w").close()
+        self._log = open(self.log_path, "a", encoding="utf-8")
+        if self._log.tell() > 0:
+            # Terminate a line torn by a crash so the next entry starts cleanly
+            with open(self.log_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._log.write("\n")
+
+    @staticmethod
+    def replay(log_path: str) -> Dict[str, dict]:
+        """Fold a sink log into the current row per story id (tolerates a torn last line)."""
+        rows: Dict[str, dict] = {}
+        with open(log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get("op") == "upsert":
+                    rows[entry["key"]] = entry["row"]
+                elif entry.get("op") == "delete" and rows.get(entry["key"]) == entry["row"]:
+                    rows.pop(entry["key"], None)
+        return rows
+
+    def _append(self, op: str, key: str, row: dict):
+        if self._log.closed:
+            self._log = open(self.log_path, "a", encoding="utf-8")
+        self._log.write(json.dumps({"op": op, "key": key, "row": row}, default=str, ensure_ascii=False) + "\n")
+        self._log.flush()
+        os.fsync(self._log.fileno())
+
+    def upsert(self, row: dict):
+        clean = {c: row.get(c) for c in self.columns}
+        key = str(clean[self.key_column])
+        with self._lock:
+            if self.rows.get(key) == clean:
+                return  # idempotent: replays of the same result change nothing
+            self._append("upsert", key, clean)
+            self.rows[key] = clean
+            self._compact()
+
+    def delete(self, row: dict):
+        clean = {c: row.get(c) for c in self.columns}
+        key = str(clean[self.key_column])
+        with self._lock:
+            # A retraction only removes the row it refers to; an update's new value may already be stored
+            if self.rows.get(key) != clean:
+                return
+            self._append("delete", key, clean)
+            del self.rows[key]
+            self._compact()
+
+    def on_change(self, key, row: dict, time: int, is_addition: bool):
+        """pw.io.subscribe callback."""
+        if is_addition:
+            self.upsert(row)
+        else:
+            self.delete(row)
+
+    def on_end(self):
+        with self._lock:
+            self._compact()
+            self._log.close()
+
+    def _compact(self):
+        tmp_path = f"{self.csv_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=self.columns)
+            writer.writeheader()
+            for key in sorted(self.rows, key=_sort_key):
+                writer.writerow(self.rows[key])
+        os.replace(tmp_path, self.csv_path)
+
+    def absorb(self, log_path: str) -> int:
+        """Upsert the current rows of another sink's log (e.g. a worker process); returns the row count."""
+        if not os.path.exists(log_path):
+            return 0
+        rows = self.replay(log_path)
+        for row in rows.values():
+            self.upsert(row)
+        return len(rows)
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            return [dict(self.rows[k]) for k in sorted(self.rows, key=_sort_key)]
+
+    def attach(self, table):
+        """Subscribe the sink to a Pathway table whose columns include `self.columns`."""
+        import pathway as pw
+        pw.io.subscribe(table, on_change=self.on_change, on_end=self.on_end)
+        return self
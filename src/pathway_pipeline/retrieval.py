@@ -7,15 +7,21 @@ from pathway.xpacks.llm.vector_store import VectorStoreServer
 from pathway.xpacks.llm.embedders import SentenceTransformerEmbedder
 from pathway.xpacks.llm.splitters import TokenCountSplitter
 from pathway.xpacks.llm.parsers import ParseUtf8
+from src.pathway_pipeline.book_index import get_book_index, split_chapters, chunk_refs, RETRIEVAL_FIELDS
 
 # Configuration (could be moved to a separate config file)
 BOOKS_DIR = "Dataset/Books/"
+SCORE_COLUMN = "_pw_index_reply_score"
+EMBEDDER_MODEL = "all-MiniLM-L6-v2"
+SPLITTER_MIN_TOKENS, SPLITTER_MAX_TOKENS, SPLITTER_ENCODING = 200, 800, "cl100k_base"
+# Everything besides the query that decides which chunks a search returns (part of the retrieval checkpoint fingerprint)
+RETRIEVAL_SETTINGS = {"embedder": EMBEDDER_MODEL, "splitter": [SPLITTER_MIN_TOKENS, SPLITTER_MAX_TOKENS, SPLITTER_ENCODING]}
 
 class NarrativeRetriever:
     """
     Handles book ingestion, splitting, and retrieval.
     """
-    def __init__(self, books_dir: str, embedder_model: str = "all-MiniLM-L6-v2"):
+    def __init__(self, books_dir: str, embedder_model: str = EMBEDDER_MODEL):
         self.books_dir = books_dir
 
         # 1. Ingest novels
@@ -42,24 +48,17 @@ class NarrativeRetriever:
             except:
                 path = "Unknown"
             
-            # Simple heuristic chapter splitting (Standard in Gutenberg/Novel formats)
-            # Improved to handle CRLF (\r\n) and optional formatting
-            # Enhanced heuristic chapter splitting
+            # Heuristic chapter splitting shared with the in-process BookChunkIndex
             # Handles CHAPTER, Chapter, PART, Part, BOOK, Book with Roman/Arabic numerals
-            chapter_pattern = r"(?i)^\s*(CHAPTER|PART|BOOK|Chapter|Part|Book)\s+([IVXLCDM\d]+|[A-Z]+).*$"
-            matches = list(re.finditer(chapter_pattern, text, re.MULTILINE))
-            
-            if not matches:
+            spans = split_chapters(text)
+            if spans[0][0] == "Full Text":
                 return [(text.encode("utf-8"), {"chapter": "Full Text", "progress_pct": 0.0, "path": path})]
             
             chunks = []
             total_len = len(text)
             
-            for i, match in enumerate(matches):
-                start = match.start()
-                end = matches[i+1].start() if i+1 < len(matches) else len(text)
-                chapter_content = text[start:end].strip()
-                chapter_title = match.group(0).strip()
+            for chapter_title, start, end in spans:
+                chapter_content = text[start:end] if chapter_title == "Preamble" else text[start:end].strip()
                 progress = round((start / total_len) * 100, 1)
                 
                 chunks.append((
@@ -71,11 +70,6 @@ class NarrativeRetriever:
                         "path": path
                     }
                 ))
-            
-            if matches[0].start() > 0:
-                preamble = text[:matches[0].start()]
-                if len(preamble.strip()) > 100:
-                    chunks.insert(0, (preamble.encode("utf-8"), {"chapter": "Preamble", "progress_pct": 0.0, "source_file": path.split("/")[-1], "path": path}))
                     
             return chunks
 
@@ -116,7 +110,8 @@ class NarrativeRetriever:
 
         # 2. Setup Indexing Components
         self.embedder = SentenceTransformerEmbedder(model=embedder_model)
-        self.text_splitter = TokenCountSplitter(min_tokens=200, max_tokens=800, encoding_name="cl100k_base")
+        self.text_splitter = TokenCountSplitter(min_tokens=SPLITTER_MIN_TOKENS, max_tokens=SPLITTER_MAX_TOKENS,
+                                                encoding_name=SPLITTER_ENCODING)
         self.parser = ParseUtf8()
 
         # 3. Create VectorStoreServer (v23 equivalent of DocumentStore)
@@ -134,18 +129,49 @@ class NarrativeRetriever:
         query_as_of_now pattern with collapse_rows=True (default).
         
         With collapse_rows=True, results are already aggregated into tuples
-        per query — no groupby needed.
+        per query — no groupby needed. Besides `retrieved_chunks`, every query
+        row gets the typed columns of RETRIEVAL_FIELDS (chunk_id, book, chapter,
+        progress_pct, start, end, score), each a tuple row-aligned with the chunks.
         """
         # query returns a table matched with queries_table with results
-        joined = queries_table + self.store.query(
+        results = self.store.query(
             queries_table.query,
             number_of_matches=k,
             collapse_rows=True
-        ).select(
+        )
+        has_scores = SCORE_COLUMN in results.column_names()
+        joined = queries_table + results.select(
             retrieved_chunks=pw.this.data,
-            retrieved_metadata=pw.this.data, # VectorStoreServer.query typically packs info into data
+            # Similarity scores, when the index reports them, enable max-score fusion downstream
+            _retrieved_scores=pw.this[SCORE_COLUMN] if has_scores else None
+        )
+
+        index = get_book_index(self.books_dir)
+        has_book = "book_name" in queries_table.column_names()
+
+        @pw.udf
+        def locate_chunks(chunks: tuple, scores: Any = None, book: str = "") -> tuple:
+            # Chapter and offsets come from the book text itself: the VectorStoreServer's
+            # chunk metadata does not survive the splitter in a usable form
+            return chunk_refs(chunks, scores, book or None, index)
+
+        refs = joined.select(
+            *pw.this.without(pw.this._retrieved_scores),
+            _refs=locate_chunks(pw.this.retrieved_chunks, pw.this._retrieved_scores,
+                                pw.this.book_name if has_book else "")
+        )
+        return refs.select(
+            *pw.this.without(pw.this._refs),
+            **{field: pw.this._refs[i] for i, field in enumerate(RETRIEVAL_FIELDS)}
         )
-        return joined
+
+    def search(self, query: str, k: int = 5, book: str = None, min_score: float = 0.0) -> List[dict]:
+        """
+        Ad-hoc top-k query over the whole book, for use inside UDFs (e.g. DA-guided
+        re-retrieval). Served by the shared in-process BookChunkIndex, which uses the
+        same embedding model as the VectorStoreServer and the cached bi-encoder.
+        """
+        return get_book_index(self.books_dir).search(query, k=k, book=book, min_score=min_score)
 
     
 if __name__ == "__main__":
@@ -0,0 +1,160 @@
+"""
+Declarative, cost-ordered verification cascade.
+
+A story is checked by a list of stages sorted by cost (cheapest first). Each
+stage returns a result dict, which is stored in the shared context under the
+stage's name so later stages can use it. After a stage runs, its "decisive"
+condition is evaluated. If the condition holds, the cascade stops and the
+stage's verdict function produces the final (judgment, confidence, rationale).
+A stage can also end the cascade unconditionally by returning {"final": verdict},
+which is used for deadline fallbacks. A stage whose work ran before the cascade
+(in a separate UDF) reports that time as result["upstream_seconds"], and it is
+added to the stage's seconds.
+
+Decisive conditions are referenced by name (see CONDITIONS) so they can be
+changed without code edits:
+
+    CASCADE_DECISIVE='{"nli": "never", "programmatic": "hit"}'
+    CASCADE_COSTS='{"identity": 25}'
+
+Per-stage runs, hits, early exits and seconds are collected in CASCADE_STATS.
+"""
+import os
+import json
+import time
+import threading
+from typing import Callable, Dict, List, Optional
+
+
+def _hit(result: dict, ctx: dict) -> bool:
+    return bool(result.get("hit"))
+
+
+def _strong(result: dict, ctx: dict) -> bool:
+    return bool(result.get("hit")) and result.get("strength") == "strong"
+
+
+def _temporal_clash(result: dict, ctx: dict) -> bool:
+    return bool(result.get("hit")) and bool(result.get("temporal_clash"))
+
+
+CONDITIONS: Dict[str, Callable[[dict, dict], bool]] = {
+    "never": lambda result, ctx: False,
+    "always": lambda result, ctx: True,
+    "hit": _hit,
+    "strong": _strong,
+    "temporal_clash": _temporal_clash,
+}
+
+
+class CascadeStage:
+    def __init__(self, name: str, cost: float, run: Callable[[dict], dict],
+                 verdict: Optional[Callable[[dict, dict], tuple]] = None, decisive: str = "never"):
+        if decisive not in CONDITIONS:
+            raise ValueError(f"Unknown decisive condition '{decisive}' for stage '{name}'")
+        if decisive != "never" and verdict is None:
+            raise ValueError(f"Stage '{name}' can be decisive but has no verdict function")
+        self.name = name
+        self.cost = cost
+        self.run = run
+        self.verdict = verdict
+        self.decisive = decisive
+
+
+class CascadeStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.order: List[str] = []
+
+    def record(self, stage: str, seconds: float, hit: bool, decisive: bool):
+        with self._lock:
+            if stage not in self.stages:
+                self.stages[stage] = {"runs": 0, "hits": 0, "decisive": 0, "seconds": 0.0}
+                self.order.append(stage)
+            e = self.stages[stage]
+            e["runs"] += 1
+            e["hits"] += int(hit)
+            e["decisive"] += int(decisive)
+            e["seconds"] += seconds
+
+    def report(self) -> str:
+        lines = [f"{'Stage':<14} {'Runs':>5} {'Hits':>5} {'Decisive':>9} {'Total s':>9} {'Avg s':>7}"]
+        with self._lock:
+            for stage in self.order:
+                e = self.stages[stage]
+                avg = e["seconds"] / e["runs"] if e["runs"] else 0.0
+                lines.append(f"{stage:<14} {int(e['runs']):>5} {int(e['hits']):>5} {int(e['decisive']):>9} "
+                             f"{e['seconds']:>9.2f} {avg:>7.2f}")
+        return "\n".join(lines)
+
+
+# Global instance shared by all stories in the process
+CASCADE_STATS = CascadeStats()
+
+
+# The story cascade main.py runs: (stage, cost, default decisive condition). Cheap rules
+# first, then NLI, then the small-LLM identity call, then the jury; stories that NLI
+# settles never pay for the identity call.
+STORY_STAGES = (
+    ("year_rules", 1, "never"),
+    # Not decisive until its rules are validated on the labelled train set;
+    # opt in with CASCADE_DECISIVE='{"programmatic": "hit"}'
+    ("programmatic", 2, "never"),
+    ("nli", 10, "temporal_clash"),
+    ("identity", 20, "never"),
+    ("jury", 100, "always"),
+)
+
+
+def build_stages(runs: Dict[str, Callable[[dict], dict]], verdicts: Dict[str, Callable[[dict, dict], tuple]],
+                 spec=STORY_STAGES) -> List[CascadeStage]:
+    """CascadeStages for `spec`, with each stage's run and (optional) verdict function looked up by name."""
+    return [CascadeStage(name, cost, runs[name], verdicts.get(name), decisive=decisive)
+            for name, cost, decisive in spec]
+
+
+def _env_json(name: str) -> dict:
+    raw = os.getenv(name, "")
+    return json.loads(raw) if raw else {}
+
+
+class VerificationCascade:
+    def __init__(self, stages: List[CascadeStage], stats: Optional[CascadeStats] = None,
+                 decisive_overrides: Optional[Dict[str, str]] = None, cost_overrides: Optional[Dict[str, float]] = None):
+        decisive_overrides = _env_json("CASCADE_DECISIVE") if decisive_overrides is None else decisive_overrides
+        cost_overrides = _env_json("CASCADE_COSTS") if cost_overrides is None else cost_overrides
+        for stage in stages:
+            if stage.name in decisive_overrides:
+                condition = decisive_overrides[stage.name]
+                if condition not in CONDITIONS:
+                    raise ValueError(f"Unknown decisive condition '{condition}' for stage '{stage.name}'")
+                if condition != "never" and stage.verdict is None:
+                    raise ValueError(f"Stage '{stage.name}' has no verdict function and cannot be made decisive")
+                stage.decisive = condition
+            if stage.name in cost_overrides:
+                stage.cost = float(cost_overrides[stage.name])
+        # Stable sort: equal costs keep their declared order
+        self.stages = sorted(stages, key=lambda s: s.cost)
+        if not self.stages or self.stages[-1].decisive != "always":
+            raise ValueError("The most expensive cascade stage must always be decisive")
+        self.stats = stats or CASCADE_STATS
+
+    def run(self, ctx: dict) -> tuple:
+        for stage in self.stages:
+            start = time.time()
+            decisive = False
+            result: dict = {}
+            try:
+                result = stage.run(ctx) or {}
+                ctx[stage.name] = result
+                final = result.get("final")
+                decisive = final is not None or CONDITIONS[stage.decisive](result, ctx)
+            finally:
+                seconds = time.time() - start + float(result.get("upstream_seconds") or 0.0)
+                self.stats.record(stage.name, seconds, bool(result.get("hit")), decisive)
+            if final is not None:
+                return final
+            if decisive:
+                return stage.verdict(result, ctx)
+        raise RuntimeError("Cascade ended without a decisive stage")
@@ -1,69 +1,182 @@
-from typing import List, Dict
+"""
+Implicit narrative constraints, run as one compiled pass over the evidence.
+
+Rules are declared with the `@rule` decorator: a name, the keyword groups a
+state must mention for the rule to apply (see narrative_state.KEYWORD_GROUPS),
+and a check that receives one state's precomputed features. A RuleEngine
+compiles the registry into a keyword-group dispatch table, computes each
+state's features (year set, keyword groups, chapter) once, and only
+calls the rules whose groups the state mentions. Per-rule runs, violations and
+seconds are collected in RULE_STATS.
+"""
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+from src.reasoning.narrative_state import KEYWORD_GROUPS
+from src.reasoning.multi_pattern import get_matcher
+
+
+def state_mentions(state: Dict, group: str, keywords) -> bool:
+    """Keyword test on a narrative state: precomputed hits, or a snippet scan for bare states."""
+    if "keywords" in state:
+        return bool(state["keywords"].get(group))
+    return bool(get_matcher(keywords).find_words(state.get("content_snippet", "")))
+
+
+def describe_violation(violation) -> str:
+    """One-line summary of a rule or validator violation, for rationales."""
+    if not isinstance(violation, dict):
+        return str(violation)
+    details = ", ".join(f"{k}={v}" for k, v in violation.items() if k not in ("type", "narrative_context"))
+    return f"{violation.get('type', 'Violation')} ({details})"
+
+
+class Rule:
+    def __init__(self, name: str, check: Callable[[Dict, Dict], Optional[List[Dict]]], requires: Sequence[str] = ()):
+        unknown = [g for g in requires if g not in KEYWORD_GROUPS]
+        if unknown:
+            raise ValueError(f"Rule '{name}' requires unknown keyword groups {unknown}")
+        self.name = name
+        self.check = check
+        self.requires = tuple(requires)
+
+
+# Declaration order is the order violations are reported in
+RULES: List[Rule] = []
+
+
+def rule(name: str, requires: Sequence[str] = ()):
+    """Register `check(features, claims) -> list of violations (or None)` as a constraint rule."""
+    def register(check):
+        RULES.append(Rule(name, check, requires))
+        return check
+    return register
+
+
+def claim_features(backstory_claims: Dict) -> Dict:
+    return {
+        "years": backstory_claims.get("years", []),
+        "year_set": set(backstory_claims.get("years", [])),
+        "locations": backstory_claims.get("locations", []),
+    }
+
+
+def state_features(state: Dict) -> Dict:
+    """Everything the rules read from a state, computed once per state per pass."""
+    groups = {g for g, keywords in KEYWORD_GROUPS.items() if state_mentions(state, g, keywords)}
+    years = state.get("years", [])
+    return {"state": state, "years": years, "year_set": set(years), "groups": groups,
+            "chapter": state.get("chapter", "Unknown")}
+
+
+class RuleStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rules: Dict[str, Dict[str, float]] = {}
+
+    def record(self, name: str, runs: int, violations: int, seconds: float):
+        with self._lock:
+            e = self.rules.setdefault(name, {"runs": 0, "violations": 0, "seconds": 0.0})
+            e["runs"] += runs
+            e["violations"] += violations
+            e["seconds"] += seconds
+
+    def report(self) -> str:
+        lines = [f"{'Rule':<16} {'Runs':>6} {'Violations':>10} {'Total ms':>9}"]
+        with self._lock:
+            for name, e in self.rules.items():
+                lines.append(f"{name:<16} {int(e['runs']):>6} {int(e['violations']):>10} {e['seconds'] * 1000:>9.1f}")
+        return "\n".join(lines)
+
+
+# Global instance shared by all stories in the process
+RULE_STATS = RuleStats()
+
+
+class RuleEngine:
+    def __init__(self, rules: Optional[List[Rule]] = None, stats: Optional[RuleStats] = None):
+        self.rules = list(RULES if rules is None else rules)
+        self.stats = stats or RULE_STATS
+        # Dispatch table: a state only reaches rules whose keyword groups it mentions
+        self._always = [r for r in self.rules if not r.requires]
+        self._keyed = [r for r in self.rules if r.requires]
+
+    def run(self, backstory_claims: Dict, narrative_states: List[Dict]) -> List[Dict]:
+        claims = claim_features(backstory_claims)
+        found: Dict[str, List[Dict]] = {r.name: [] for r in self.rules}
+        runs = {r.name: 0 for r in self.rules}
+        seconds = {r.name: 0.0 for r in self.rules}
+        for state in narrative_states:
+            features = state_features(state)
+            applicable = self._always + [r for r in self._keyed if features["groups"].issuperset(r.requires)]
+            for r in applicable:
+                start = time.perf_counter()
+                violations = r.check(features, claims)
+                seconds[r.name] += time.perf_counter() - start
+                runs[r.name] += 1
+                if violations:
+                    found[r.name].extend(violations)
+        for r in self.rules:
+            self.stats.record(r.name, runs[r.name], len(found[r.name]), seconds[r.name])
+        return [v for r in self.rules for v in found[r.name]]
+
+
+@rule("imprisonment", requires=("imprisonment",))
+def imprisonment_rule(features: Dict, claims: Dict) -> Optional[List[Dict]]:
+    """
+    Rule: If narrative says a character is imprisoned, they cannot travel in the backstory
+    covering the same period.
+    """
+    common_years = claims["year_set"] & features["year_set"]
+    # If backstory claims they were in an external location during a prison year
+    if not common_years or not claims["locations"]:
+        return None
+    # Simple heuristic: if 'jail'/'prison' is in the narrative but not the backstory location
+    return [{
+        "type": "Imprisonment Violation",
+        "year": list(common_years)[0],
+        "backstory_location": loc,
+        "narrative_context": "Character was imprisoned at this time.",
+        "chapter": features["chapter"]
+    } for loc in claims["locations"] if loc.lower() not in ["prison", "jail", "cell", "dungeon"]]
+
+
+@rule("death", requires=("death",))
+def death_rule(features: Dict, claims: Dict) -> Optional[List[Dict]]:
+    """
+    Rule: A character cannot perform actions after they have died in the narrative.
+    """
+    if not features["years"]:
+        return None
+    death_year = max(features["years"])
+    # If backstory mentions ANY year after this death year
+    post_death_years = [y for y in claims["years"] if y > death_year]
+    if not post_death_years:
+        return None
+    return [{
+        "type": "Post-Mortem Activity",
+        "death_year": death_year,
+        "backstory_years": post_death_years,
+        "narrative_context": "Character died in or before this year.",
+        "chapter": features["chapter"]
+    }]
+
 
 class ConstraintRules:
     """
     Defines implicit narrative constraints and rules for consistency.
     """
-    
+
+    @staticmethod
+    def check_all(backstory_claims: Dict, narrative_states: List[Dict]) -> List[Dict]:
+        """Every registered rule in one pass over the states."""
+        return RuleEngine().run(backstory_claims, narrative_states)
+
     @staticmethod
     def check_imprisonment_constraint(backstory_claims: Dict, narrative_states: List[Dict]) -> List[Dict]:
-        """
-        Rule: If narrative says a character is imprisoned, they cannot travel in the backstory
-        covering the same period.
-        """
-        violations = []
-        imprisonment_keywords = ["imprisoned", "prison", "dungeon", "jail", "captive", "cell", "d'if"]
-        
-        b_years = backstory_claims.get("years", [])
-        b_locs = backstory_claims.get("locations", [])
-        
-        for state in narrative_states:
-            snippet = state.get("content_snippet", "").lower()
-            if any(k in snippet for k in imprisonment_keywords):
-                # Narrative says character is in prison.
-                n_years = state.get("years", [])
-                common_years = set(b_years) & set(n_years)
-                
-                # If backstory claims they were in an external location during a prison year
-                if common_years and b_locs:
-                    for loc in b_locs:
-                        # Simple heuristic: if 'jail'/'prison' is in the narrative but not the backstory location
-                        if loc.lower() not in ["prison", "jail", "cell", "dungeon"]:
-                            violations.append({
-                                "type": "Imprisonment Violation",
-                                "year": list(common_years)[0],
-                                "backstory_location": loc,
-                                "narrative_context": "Character was imprisoned at this time.",
-                                "chapter": state["chapter"]
-                            })
-        
-        return violations
+        return RuleEngine([r for r in RULES if r.name == "imprisonment"]).run(backstory_claims, narrative_states)
 
     @staticmethod
     def check_death_constraint(backstory_claims: Dict, narrative_states: List[Dict]) -> List[Dict]:
-        """
-        Rule: A character cannot perform actions after they have died in the narrative.
-        """
-        violations = []
-        death_keywords = ["died", "deceased", "grave", "buried", "death", "killed", "guillotine"]
-        
-        b_years = backstory_claims.get("years", [])
-        
-        for state in narrative_states:
-            snippet = state.get("content_snippet", "").lower()
-            if any(k in snippet for k in death_keywords):
-                n_years = state.get("years", [])
-                if n_years:
-                    death_year = max(n_years)
-                    # If backstory mentions ANY year after this death year
-                    post_death_years = [y for y in b_years if y > death_year]
-                    if post_death_years:
-                        violations.append({
-                            "type": "Post-Mortem Activity",
-                            "death_year": death_year,
-                            "backstory_years": post_death_years,
-                            "narrative_context": "Character died in or before this year.",
-                            "chapter": state["chapter"]
-                        })
-        
-        return violations
+        return RuleEngine([r for r in RULES if r.name == "death"]).run(backstory_claims, narrative_states)
@@ -1,42 +1,145 @@
-import spacy
 import os
 import pickle
+import hashlib
 import logging
-from typing import Set, List, Dict
+import threading
+from collections import defaultdict
+from typing import Set, List, Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+ENTITY_LABELS = ["PERSON", "LOC", "FAC", "GPE"]
+ENTITY_CACHE_VERSION = 2
+BOOKS_DIR = "Dataset/Books/"
+ENTITY_INDEX = os.getenv("ENTITY_INDEX", "1") != "0"
+
+# (book key, slice index, character offset in the book)
+Mention = Tuple[str, int, int]
+
+
+def slice_text(text: str, slice_chars: int = 50000) -> List[Tuple[int, str]]:
+    """(offset, slice) pieces of at most slice_chars, cut at a newline when one is near the end."""
+    pieces = []
+    start = 0
+    while start < len(text):
+        end = min(start + slice_chars, len(text))
+        if end < len(text):
+            cut = text.rfind("\n", start + slice_chars // 2, end)
+            end = cut + 1 if cut >= 0 else end
+        pieces.append((start, text[start:end]))
+        start = end
+    return pieces
+
+
 class GlobalEntityManager:
-    def __init__(self, books_dir: str):
+    """
+    Entity -> mentions index over every book. Books are parsed with nlp.pipe
+    (ENTITY_INDEX_PROCESSES worker processes) and cached per book, keyed by a
+    hash of its content, so only added or edited books are parsed again.
+
+    Mentions are held as entity -> book -> [(book, slice, offset), ...], so
+    "which books mention X" and "X's mentions in this book" are dict lookups.
+    """
+
+    def __init__(self, books_dir: str, nlp=None, cache_file: str = ".entities_cache.pkl",
+                 n_process: Optional[int] = None, slice_chars: int = 50000):
         self.books_dir = books_dir
-        self.nlp = spacy.load("en_core_web_sm", disable=["parser", "attribute_ruler", "lemmatizer"])
-        self.entities = set()
-        self.cache_file = ".entities_cache.pkl"
-        
-    def build_index(self):
-        if os.path.exists(self.cache_file):
+        self._nlp = nlp
+        self.cache_file = cache_file
+        self.n_process = n_process or int(os.getenv("ENTITY_INDEX_PROCESSES", str(min(4, os.cpu_count() or 1))))
+        self.slice_chars = slice_chars
+        self.mentions: Dict[str, Dict[str, List[Mention]]] = {}
+        self.book_hashes: Dict[str, str] = {}
+        self.entities: Set[str] = set()
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            import spacy
+            self._nlp = spacy.load("en_core_web_sm", disable=["parser", "attribute_ruler", "lemmatizer"])
+        return self._nlp
+
+    def _load_cache(self) -> dict:
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
             with open(self.cache_file, "rb") as f:
-                self.entities = pickle.load(f)
-            logger.info(f"Loaded {len(self.entities)} entities from cache.")
-            return
-
-        logger.info("Building Global Entity Index (this may take a minute)...")
-        for filename in os.listdir(self.books_dir):
-            if filename.endswith(".txt"):
-                path = os.path.join(self.books_dir, filename)
-                with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                    text = f.read()
-                    chunk_size = 50000
-                    for i in range(0, len(text), chunk_size):
-                        doc = self.nlp(text[i:i+chunk_size])
-                        for ent in doc.ents:
-                            if ent.label_ in ["PERSON", "LOC", "FAC", "GPE"]:
-                                self.entities.add(ent.text.strip().lower())
-        
-        with open(self.cache_file, "wb") as f:
-            pickle.dump(self.entities, f)
+                cached = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable entity cache {self.cache_file}: {e}")
+            return {}
+        # Version 1 was a bare set with no way to tell which books it covered
+        if not isinstance(cached, dict) or cached.get("version") != ENTITY_CACHE_VERSION:
+            return {}
+        return cached.get("books", {})
 
-    def check_hallucination(self, backstory: str, character: str = "") -> List[str]:
+    def build_index(self):
+        from src.pathway_pipeline.book_index import normalize_book_key
+        cached = self._load_cache()
+        books: Dict[str, dict] = {}
+        pending: List[Tuple[str, str]] = []
+        for filename in sorted(os.listdir(self.books_dir)):
+            if not filename.endswith(".txt"):
+                continue
+            with open(os.path.join(self.books_dir, filename), "r", encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+            key = normalize_book_key(filename)
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            if cached.get(key, {}).get("hash") == digest:
+                books[key] = cached[key]
+            else:
+                books[key] = {"hash": digest, "mentions": defaultdict(list)}
+                pending.append((key, text))
+
+        if pending:
+            logger.info(f"Indexing entities of {len(pending)} book(s) with {self.n_process} process(es)...")
+            slices = [(piece, (key, i, offset))
+                      for key, text in pending
+                      for i, (offset, piece) in enumerate(slice_text(text, self.slice_chars))]
+            for doc, (key, i, offset) in self.nlp.pipe(slices, as_tuples=True, n_process=self.n_process, batch_size=4):
+                for ent in doc.ents:
+                    if ent.label_ in ENTITY_LABELS:
+                        books[key]["mentions"][ent.text.strip().lower()].append((i, offset + ent.start_char))
+            for key, _ in pending:
+                books[key]["mentions"] = dict(books[key]["mentions"])
+            tmp_path = f"{self.cache_file}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump({"version": ENTITY_CACHE_VERSION, "books": books}, f)
+            os.replace(tmp_path, self.cache_file)
+        else:
+            logger.info(f"Loaded entities of {len(books)} book(s) from cache.")
+
+        mentions: Dict[str, Dict[str, List[Mention]]] = defaultdict(dict)
+        for key, entry in books.items():
+            for entity, hits in entry["mentions"].items():
+                mentions[entity][key] = [(key, i, offset) for i, offset in hits]
+        self.mentions = dict(mentions)
+        self.book_hashes = {key: entry["hash"] for key, entry in books.items()}
+        self.entities = set(self.mentions)
+
+    def mentions_of(self, entity: str, book: Optional[str] = None) -> List[Mention]:
+        """Every (book, slice, offset) mention of an entity, optionally within one book."""
+        by_book = self.mentions.get(entity.strip().lower(), {})
+        if book is None:
+            return [h for hits in by_book.values() for h in hits]
+        from src.pathway_pipeline.book_index import normalize_book_key
+        return list(by_book.get(normalize_book_key(book), []))
+
+    def books_mentioning(self, entity: str) -> Set[str]:
+        return set(self.mentions.get(entity.strip().lower(), {}))
+
+    def is_known(self, entity: str, book: Optional[str] = None) -> bool:
+        """Whether any book (or `book`) mentions the entity."""
+        by_book = self.mentions.get(entity.strip().lower())
+        if not by_book:
+            return False
+        if book is None:
+            return True
+        from src.pathway_pipeline.book_index import normalize_book_key
+        return normalize_book_key(book) in by_book
+
+    def check_hallucination(self, backstory: str, character: str = "", book: Optional[str] = None) -> List[str]:
+        """Backstory entities never mentioned in the books (or in `book`, when given)."""
         doc = self.nlp(backstory)
         # Only Title Case entities are likely true names/places
         bs_ents = [ent.text.strip() for ent in doc.ents if ent.label_ in ["PERSON", "LOC", "GPE", "FAC", "ORG"]]
@@ -51,37 +154,68 @@ class GlobalEntityManager:
             # Ignore purely lowercase or single characters
             if not any(c.isupper() for c in ent):
                 continue
-            # Check length and presence in global set
-            if len(ent) > 4 and ent_lower not in self.entities:
+            # Check length and presence in the mention index
+            if len(ent) > 4 and not self.is_known(ent_lower, book):
                 # Basic check for common adjectives flagged as place
                 if ent_lower not in ["hispan", "french", "british", "australian", "spanish", "political"]:
                     unknown.append(ent)
         return unknown
 
+
+_manager: Optional[GlobalEntityManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_entity_manager(books_dir: str = BOOKS_DIR, nlp=None) -> Optional[GlobalEntityManager]:
+    """
+    Process-wide entity index over every book, built (or loaded from its cache)
+    on first use. None when ENTITY_INDEX=0 or the index cannot be built.
+    """
+    global _manager
+    if not ENTITY_INDEX:
+        return None
+    with _manager_lock:
+        if _manager is None:
+            manager = GlobalEntityManager(books_dir, nlp=nlp)
+            try:
+                manager.build_index()
+            except Exception as e:
+                logger.warning(f"Entity index unavailable: {e}")
+                manager.mentions = {}
+            _manager = manager
+        return _manager if _manager.mentions else None
+
+
 class EntityStateTracker:
-    def __init__(self):
-        self.nlp = spacy.load("en_core_web_sm")
+    def __init__(self, nlp=None):
+        # Pass the process-wide pipeline (nli_judge.get_nlp) to avoid a spacy.load per call
+        if nlp is None:
+            import spacy
+            nlp = spacy.load("en_core_web_sm")
+        self.nlp = nlp
         
-    def get_states_from_chunks(self, chunks: list, metadata: list) -> List[Dict]:
-        states = []
-        for i, chunk in enumerate(chunks):
-            text = str(chunk)
-            # Basic years and locations extraction
-            import re
-            years = [int(y) for y in re.findall(r'\b(17|18|19)\d{2}\b', text)]
-            states.append({
-                "content_snippet": text[:500],
-                "years": years,
-                "chapter": metadata[i].get("chapter", "Unknown") if i < len(metadata) else "Unknown"
-            })
-        return states
+    def get_states_from_chunks(self, chunks: list, metadata: list, index=None) -> List[Dict]:
+        """Narrative states by chunk id from the shared NarrativeStateIndex (parsed on first sight)."""
+        from src.pathway_pipeline.book_index import ref_field
+        from src.reasoning.narrative_state import get_state_index
+        metadata = metadata or []
+        refs = [metadata[i] if i < len(metadata) else None for i in range(len(chunks))]
+        ids = [ref_field(r, "chunk_id") for r in refs]
+        index = index if index is not None else get_state_index()
+        return index.states_for(
+            chunks,
+            chapters=[ref_field(r, "chapter", "Unknown") for r in refs],
+            nlp=self.nlp,
+            ids=ids if all(i is not None for i in ids) else None,
+            progress=[ref_field(r, "progress_pct") for r in refs]
+        )
 
     def parse_backstory_claims(self, backstory: str) -> Dict:
-        import re
-        years = [int(y) for y in re.findall(r'\b(17|18|19)\d{2}\b', backstory)]
+        from src.reasoning.narrative_state import extract_years
         doc = self.nlp(backstory)
         locations = [ent.text for ent in doc.ents if ent.label_ in ["GPE", "LOC"]]
-        return {"years": years, "locations": locations}
+        persons = [ent.text for ent in doc.ents if ent.label_ == "PERSON"]
+        return {"years": extract_years(backstory), "locations": locations, "persons": persons}
 
     def extract_basic_entities(self, text: str) -> Dict:
         doc = self.nlp(text)
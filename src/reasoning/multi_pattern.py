@@ -0,0 +1,135 @@
+"""
+Aho-Corasick multi-pattern matcher.
+
+Keyword rules and entity-overlap checks ask "which of these strings occur in
+this text, and where". Instead of one substring scan per pattern, the patterns
+are compiled once into an automaton that reports every occurrence (overlapping
+ones included) in a single left-to-right pass.
+
+Patterns are grouped under labels (e.g. "death", "imprisonment", "entity"),
+and a pattern may belong to several labels. Matching is case-insensitive by
+default and has substring semantics, like `k in text.lower()`; `find_words`
+keeps only whole-word occurrences ("cell" but not "excellency" or "cellar").
+
+    matcher = get_matcher({"death": ("died", "buried"), "prison": ("cell",)})
+    matcher.find_all("He died in his cell")   # [(3, "died", ("death",)), (15, "cell", ("prison",))]
+"""
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Mapping, Set, Tuple, Union
+
+Patterns = Union[Mapping[str, Iterable[str]], Iterable[str]]
+
+
+class MultiPatternMatcher:
+    def __init__(self, patterns: Patterns, case_sensitive: bool = False):
+        self.case_sensitive = case_sensitive
+        groups = patterns.items() if isinstance(patterns, Mapping) else ((p, (p,)) for p in patterns)
+
+        self.patterns: List[str] = []
+        self.labels: List[Tuple[str, ...]] = []
+        index: Dict[str, int] = {}
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+        for label, pats in groups:
+            for pattern in pats:
+                pattern = pattern if case_sensitive else pattern.lower()
+                if not pattern:
+                    continue
+                if pattern in index:
+                    pid = index[pattern]
+                    if label not in self.labels[pid]:
+                        self.labels[pid] += (label,)
+                    continue
+                pid = index[pattern] = len(self.patterns)
+                self.patterns.append(pattern)
+                self.labels.append((label,))
+                state = 0
+                for ch in pattern:
+                    if ch not in goto[state]:
+                        goto[state][ch] = len(goto)
+                        goto.append({})
+                        out.append([])
+                    state = goto[state][ch]
+                out[state].append(pid)
+
+        # Breadth-first: fold failure links into a full transition table (a DFA), so
+        # matching is one dict lookup per character with no failure-chain walking
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [None] * (len(goto) - 1)
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = dict(delta[fail[state]])
+            delta[state].update(goto[state])
+            out[state] = out[state] + out[fail[state]]
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                queue.append(nxt)
+        self._delta = delta
+        self._out = [tuple(o) for o in out]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _scan(self, text: str) -> Iterator[Tuple[int, int]]:
+        """(end offset, pattern id) of every occurrence, in order of end offset."""
+        if not self.patterns or not text:
+            return
+        text = text if self.case_sensitive else text.lower()
+        delta, out = self._delta, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                for pid in out[state]:
+                    yield i + 1, pid
+
+    def find_all(self, text: str) -> List[Tuple[int, str, Tuple[str, ...]]]:
+        """Every occurrence as (start offset, pattern, labels), sorted by start."""
+        hits = [(end - len(self.patterns[pid]), self.patterns[pid], self.labels[pid]) for end, pid in self._scan(text)]
+        hits.sort(key=lambda h: (h[0], -len(h[1])))
+        return hits
+
+    def find_words(self, text: str) -> List[Tuple[int, str, Tuple[str, ...]]]:
+        """find_all, restricted to occurrences with no letter directly before or after them."""
+        return [h for h in self.find_all(text)
+                if (h[0] == 0 or not text[h[0] - 1].isalpha())
+                and (h[0] + len(h[1]) >= len(text) or not text[h[0] + len(h[1])].isalpha())]
+
+    def search(self, text: str) -> bool:
+        """True if any pattern occurs (stops at the first match)."""
+        return next(self._scan(text), None) is not None
+
+    def matched(self, text: str) -> Dict[str, Set[str]]:
+        """Label -> distinct patterns of that label found in the text."""
+        found: Dict[str, Set[str]] = {}
+        for _, pid in self._scan(text):
+            for label in self.labels[pid]:
+                found.setdefault(label, set()).add(self.patterns[pid])
+        return found
+
+    def positions(self, text: str, whole_words: bool = False) -> Dict[str, List[Tuple[str, int]]]:
+        """Label -> [(pattern, start offset), ...] in text order."""
+        grouped: Dict[str, List[Tuple[str, int]]] = {}
+        for start, pattern, labels in (self.find_words(text) if whole_words else self.find_all(text)):
+            for label in labels:
+                grouped.setdefault(label, []).append((pattern, start))
+        return grouped
+
+
+@lru_cache(maxsize=512)
+def _compiled(key: Tuple[Tuple[str, Tuple[str, ...]], ...], case_sensitive: bool) -> MultiPatternMatcher:
+    return MultiPatternMatcher(dict(key), case_sensitive)
+
+
+def get_matcher(patterns: Patterns, case_sensitive: bool = False) -> MultiPatternMatcher:
+    """
+    Shared compiled matcher for a pattern set. Fixed keyword sets compile once per
+    process; dynamic sets (a backstory's entities) are cached, since stories about
+    the same character repeat them.
+    """
+    if not isinstance(patterns, Mapping):
+        patterns = {p: (p,) for p in patterns}
+    key = tuple(sorted((label, tuple(sorted(set(pats)))) for label, pats in patterns.items()))
+    return _compiled(key, case_sensitive)
@@ -0,0 +1,134 @@
+"""
+Per-chunk narrative state, extracted once and shared by every story.
+
+The constraint rules need the same facts about each evidence chunk (years,
+places, people, death / imprisonment wording). Retrieved chunks repeat across
+stories, so each chunk is parsed once per process and its state is stored by
+the stable chunk id used for retrieval fusion. Missing chunks are parsed in a
+single `nlp.pipe` batch. `book_states` parses a whole book's 1500-character
+windows once per process, for the per-character timelines (timeline_store.py).
+
+A state is a plain dict, the shape TimelineValidator and ConstraintRules read:
+
+    {"chunk_id", "chapter", "progress_pct", "content_snippet", "years", "locations", "persons",
+     "keywords": {"death": [(keyword, offset), ...], "imprisonment": [...]},
+     "year_positions": [(year, offset), ...]}
+"""
+import re
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from src.pathway_pipeline.fusion import chunk_id, chunk_text_of
+from src.reasoning.multi_pattern import get_matcher
+
+YEAR_PATTERN = re.compile(r"\b(?:17|18|19)\d{2}\b")
+
+IMPRISONMENT_KEYWORDS = ("imprisoned", "prison", "dungeon", "jail", "captive", "cell", "d'if")
+DEATH_KEYWORDS = ("died", "deceased", "grave", "buried", "death", "killed", "guillotine")
+KEYWORD_GROUPS = {"death": DEATH_KEYWORDS, "imprisonment": IMPRISONMENT_KEYWORDS}
+KEYWORD_MATCHER = get_matcher(KEYWORD_GROUPS)
+
+SNIPPET_CHARS = 500
+BOOKS_DIR = "Dataset/Books/"
+
+
+def extract_years(text: str) -> List[int]:
+    return [int(m.group(0)) for m in YEAR_PATTERN.finditer(text)]
+
+
+def keyword_hits(text: str, keywords: Sequence[str]) -> List[tuple]:
+    """(keyword, offset) of every whole-word occurrence ("cell" is not found in "excellency")."""
+    return [(kw, start) for start, kw, _ in get_matcher(keywords).find_words(text)]
+
+
+def build_state(text: str, doc=None, chapter: str = "Unknown", cid: Optional[int] = None,
+                progress_pct: Optional[float] = None) -> dict:
+    """Narrative state of one chunk; `doc` is its spaCy parse (no entities without one)."""
+    ents = [(e.text.strip(), e.label_) for e in doc.ents] if doc is not None else []
+    snippet = text[:SNIPPET_CHARS]
+    hits = KEYWORD_MATCHER.positions(snippet, whole_words=True)
+    return {
+        "chunk_id": chunk_id(text) if cid is None else cid,
+        "chapter": chapter,
+        "progress_pct": progress_pct,
+        "content_snippet": snippet,
+        "years": extract_years(text),
+        "year_positions": [(int(m.group(0)), m.start()) for m in YEAR_PATTERN.finditer(text)],
+        "locations": [t for t, label in ents if label in ("GPE", "LOC")],
+        "persons": [t for t, label in ents if label == "PERSON"],
+        # Rules look at the snippet, so keyword hits are recorded for the same span (one pass, all groups)
+        "keywords": {group: hits.get(group, []) for group in KEYWORD_GROUPS},
+    }
+
+
+class NarrativeStateIndex:
+    def __init__(self):
+        self.states: Dict[int, dict] = {}
+        self.books: Dict[str, List[int]] = {}
+        self.built = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+        # Serializes whole-book parses so two stories never parse the same book twice
+        self._book_lock = threading.Lock()
+
+    def states_for(self, chunks: Sequence, chapters: Optional[Sequence[str]] = None, nlp=None,
+                   ids: Optional[Sequence[int]] = None, progress: Optional[Sequence[float]] = None) -> List[dict]:
+        """States for `chunks` in order; unseen chunks are parsed together in one nlp.pipe batch."""
+        texts = [chunk_text_of(c) for c in chunks]
+        ids = list(ids) if ids is not None else [chunk_id(t) for t in texts]
+        chapters = list(chapters or [])
+        progress = list(progress or [])
+        with self._lock:
+            missing = {cid: i for i, cid in enumerate(ids) if cid not in self.states}
+            self.reused += len(ids) - len(missing)
+        if missing:
+            order = list(missing.items())
+            docs = nlp.pipe([texts[i] for _, i in order]) if nlp is not None else [None] * len(order)
+            built = {}
+            for (cid, i), doc in zip(order, docs):
+                chapter = chapters[i] if i < len(chapters) and chapters[i] else "Unknown"
+                built[cid] = build_state(texts[i], doc, chapter, cid, progress[i] if i < len(progress) else None)
+            with self._lock:
+                for cid, state in built.items():
+                    self.states.setdefault(cid, state)
+                self.built += len(built)
+        with self._lock:
+            return [self.states[cid] for cid in ids]
+
+    def states_of_book(self, key: str, text: str, nlp=None) -> List[dict]:
+        """States of every window of a book, in book order (parsed on the first call for the book)."""
+        with self._book_lock:
+            if key not in self.books:
+                from src.pathway_pipeline.book_index import window_chunks
+                spans = window_chunks(text)
+                states = self.states_for([text[s:e] for _, s, e in spans], [c for c, _, _ in spans], nlp,
+                                         progress=[round(s / max(len(text), 1) * 100, 1) for _, s, _ in spans])
+                self.books[key] = [state["chunk_id"] for state in states]
+        with self._lock:
+            return [self.states[cid] for cid in self.books[key]]
+
+    def get(self, cid: int) -> Optional[dict]:
+        with self._lock:
+            return self.states.get(cid)
+
+    def report(self) -> str:
+        with self._lock:
+            return f"[STATE-INDEX] {len(self.states)} chunk states, {self.built} built, {self.reused} reused"
+
+
+# Global index shared by all stories in the process
+NARRATIVE_STATES = NarrativeStateIndex()
+
+
+def get_state_index() -> NarrativeStateIndex:
+    return NARRATIVE_STATES
+
+
+def book_states(book_name: str, nlp=None, books_dir: str = BOOKS_DIR) -> List[dict]:
+    """Every window state of a book from the shared index ([] for an unknown book)."""
+    from src.pathway_pipeline.book_index import get_book_index
+    books = get_book_index(books_dir)
+    key = books.resolve_book(book_name)
+    if key is None:
+        return []
+    return NARRATIVE_STATES.states_of_book(key, books.book_text(key)["text"], nlp)
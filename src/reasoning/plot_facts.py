@@ -0,0 +1,305 @@
+"""
+Structured plot facts: the plot map's dated, per-character events as data.
+
+scripts/generate_plot_maps.py writes `<book>_plot_facts.json` next to each
+plot map. Facts are derived from the parsed map (see plot_map_index.py), not
+from another LLM pass:
+
+    {"version": 1, "book": "...",
+     "characters": {"Abbé Faria": {"names": ["abbe faria", "faria"],
+                                   "events": [{"year": 1811, "years": [1811], "date": "1811",
+                                               "status": "imprisoned", "locations": [],
+                                               "section": "timeline", "text": "..."}]}}}
+
+Status changes (death, imprisonment or arrest, escape or release) are only
+taken from the timeline and plot sequence, which narrate events; the character
+list and causal links describe relations ("A fellow prisoner of Dantès", "who
+arrests Dantès") that are not events of the character named. A status keyword
+belongs to the clause's subject: the character mentioned nearest before it in
+the same clause ("After Faria's death, Dantès escapes"), or the object after an
+active "arrests". A keyword with no such character ("his arrest by Villefort"),
+or after a relative ("his father's death"), is dropped. Every character the
+entry mentions gets an event with the entry's years and locations.
+
+The programmatic stage queries the facts for the story's character. When the
+map dates a death or an imprisonment, some backstories contradict it outright:
+years after the death, being arrested again or being seen somewhere else while
+still held. Those are reported as violations without a jury call.
+"""
+import os
+import re
+import json
+import time
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.pathway_pipeline.book_index import normalize_book_key
+from src.reasoning.constraint_rules import RULE_STATS
+from src.reasoning.multi_pattern import get_matcher
+from src.reasoning.narrative_state import DEATH_KEYWORDS, IMPRISONMENT_KEYWORDS, extract_years
+from src.reasoning.plot_map_index import PlotMap, PlotMapIndex, fold, name_parts, resolve_characters, unique_aliases
+
+FACTS_VERSION = 2
+PLOT_MAPS_DIR = "Dataset/PlotMaps/"
+
+RELEASE_KEYWORDS = ("escape", "released", "freed", "liberated", "pardoned")
+STATUS_KEYWORDS = {
+    "dead": DEATH_KEYWORDS + ("dies",),
+    "imprisoned": IMPRISONMENT_KEYWORDS + ("arrest",),
+    "released": RELEASE_KEYWORDS,
+}
+STATUS_MATCHER = get_matcher(STATUS_KEYWORDS)
+# Sections whose entries narrate events (see plot_map_index.SECTIONS)
+STATUS_SECTIONS = ("timeline", "sequence")
+PRISON_WORDS = ("prison", "jail", "cell", "dungeon", "d'if", "fortress", "bagne", "galleys")
+
+MONTHS = {"january", "february", "march", "april", "may", "june", "july", "august", "september",
+          "october", "november", "december"}
+LOCATION_PATTERN = re.compile(
+    r"\b(?:in|at|to|from|near|of|across|through|reaches|leaves)\s+(?:the\s+)?"
+    r"([A-Z][\w'’-]+(?:\s+(?:of\s+|de\s+|d[’']|du\s+)?[A-Z][\w'’-]+)*)")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+")
+RELATIVE_BEFORE = re.compile(r"\b(?:father|mother|wife|husband|son|daughter|brother|sister)'s?\s+$")
+CLAUSE_BREAK = re.compile(r"[,;:.!?()\u2014]|\b(?:who|whom|where|which|while)\b")
+# "Villefort arrests Dantès": after an active verb the character arrested is the object
+ACTIVE_VERB = re.compile(r"arrests\b")
+
+
+def word_hits(text: str) -> List[Tuple[int, str, Tuple[str, ...]]]:
+    """Status keyword hits in folded text that start a word ("cell" but not "excellent")."""
+    return [h for h in STATUS_MATCHER.find_all(text) if h[0] == 0 or not text[h[0] - 1].isalpha()]
+
+
+def extract_locations(text: str, names: Iterable[str] = ()) -> List[str]:
+    """Capitalized place phrases after a preposition, minus months and character names."""
+    names = {fold(n) for n in names}
+    found = []
+    for m in LOCATION_PATTERN.finditer(text.replace("**", "").replace("_", "")):
+        place = re.sub(r"['’]s$", "", m.group(1)).strip(" '’")
+        folded = fold(place)
+        if folded.split()[0] in MONTHS or folded in names or any(folded in n or n in folded for n in names):
+            continue
+        found.append(place)
+    return list(dict.fromkeys(found))
+
+
+def entry_date(entry: str) -> str:
+    """The "February 24, 1815" prefix of a timeline bullet, if it has one."""
+    if ":" not in entry:
+        return ""
+    head = entry.lstrip("-*• ").split(":", 1)[0].replace("*", "").strip()
+    return head if extract_years(head) else ""
+
+
+def status_subject(folded: str, start: int, end: int, mentions: List[Tuple[int, int, str]],
+                   breaks: List[int]) -> Optional[str]:
+    """The character a status keyword at folded[start:end] is about, or None."""
+    if ACTIVE_VERB.match(folded, start):
+        clause_end = min([b for b in breaks if b >= end], default=len(folded))
+        after = [m for m in mentions if end <= m[0] < clause_end]
+        return min(after)[2] if after else None
+    clause_start = max([b + 1 for b in breaks if b < start], default=0)
+    before = [m for m in mentions if clause_start <= m[0] and m[1] <= start]
+    return max(before, key=lambda m: m[1])[2] if before else None
+
+
+def entry_events(section: str, entry: str, matcher, all_names: List[str]) -> List[Tuple[str, dict]]:
+    """(character, event) pairs of one plot-map entry."""
+    folded = fold(entry)
+    mentions = [(start, start + len(pattern), name) for start, pattern, names in matcher.find_all(folded)
+                for name in names]
+    if not mentions:
+        return []
+    years = extract_years(entry)
+    base = {"year": years[0] if years else None, "years": years, "date": entry_date(entry), "status": None,
+            "locations": extract_locations(entry, all_names), "section": section, "text": entry}
+    statuses: Dict[str, List[str]] = {}
+    if section in STATUS_SECTIONS:
+        # Clause boundaries, except the dots inside a name ("M. Morrel")
+        breaks = [m.start() for m in CLAUSE_BREAK.finditer(folded)
+                  if not any(s <= m.start() < e for s, e, _ in mentions)]
+        for start, keyword, groups in word_hits(folded):
+            if RELATIVE_BEFORE.search(folded[max(0, start - 24):start]):
+                # "his father's death" is about someone outside the cast
+                continue
+            name = status_subject(folded, start, start + len(keyword), mentions, breaks)
+            if name is None:
+                continue
+            for status in groups:
+                if status not in statuses.setdefault(name, []):
+                    statuses[name].append(status)
+    events = []
+    for name in dict.fromkeys(m[2] for m in mentions):
+        for status in statuses.get(name) or [None]:
+            events.append((name, dict(base, status=status)))
+    return events
+
+
+def extract_plot_facts(plot_map: str, book: str = "") -> dict:
+    """Per-character events (years, locations, status changes) of a plot map."""
+    parsed = PlotMap(plot_map, book)
+    characters = {name: {"names": parts, "events": []} for name, parts in parsed.characters.items()}
+    matcher = get_matcher(parsed.aliases) if parsed.aliases else None
+    all_names = [part for parts in parsed.aliases.values() for part in parts]
+    if matcher is not None:
+        for section, entries in parsed.sections.items():
+            for entry in entries:
+                for name, event in entry_events(section, entry, matcher, all_names):
+                    characters[name]["events"].append(event)
+    for data in characters.values():
+        # Dated events in year order, undated ones after them in map order
+        data["events"].sort(key=lambda e: (e["year"] is None, e["year"] or 0))
+    return {"version": FACTS_VERSION, "book": book, "characters": characters}
+
+
+def facts_path(plot_maps_dir: str, book_title: str) -> str:
+    return os.path.join(plot_maps_dir, f"{book_title}_plot_facts.json")
+
+
+def write_plot_facts(plot_map: str, book_title: str, plot_maps_dir: str = PLOT_MAPS_DIR) -> str:
+    facts = extract_plot_facts(plot_map, book_title)
+    path = facts_path(plot_maps_dir, book_title)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(facts, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+    return path
+
+
+def sentence_claims(backstory: str) -> List[Tuple[str, List[int]]]:
+    """(folded sentence, its years) for every backstory sentence that has a year."""
+    claims = []
+    for sentence in SENTENCE_SPLIT.split(backstory):
+        years = extract_years(sentence)
+        if years:
+            claims.append((fold(sentence), years))
+    return claims
+
+
+class PlotFacts:
+    def __init__(self, facts: dict):
+        self.book = facts.get("book", "")
+        self.characters: Dict[str, dict] = facts.get("characters", {})
+        self.names = {name: data.get("names") or name_parts(name) for name, data in self.characters.items()}
+        self.aliases = unique_aliases(self.names)
+
+    def resolve(self, character: str) -> List[str]:
+        return resolve_characters(character, self.names, self.aliases)
+
+    def events(self, name: str, status: Optional[str] = None) -> List[dict]:
+        events = self.characters.get(name, {}).get("events", [])
+        return events if status is None else [e for e in events if e.get("status") == status]
+
+    def death_year(self, name: str) -> Optional[int]:
+        years = [e["year"] for e in self.events(name, "dead") if e.get("year") is not None]
+        return min(years) if years else None
+
+    def custody(self, name: str) -> Optional[Tuple[int, Optional[int]]]:
+        """
+        (first dated imprisonment year, release year or None if the map never releases
+        the character). None when there is no dated imprisonment, or when a release is
+        mentioned without a date (the end of the custody is unknown).
+        """
+        starts = [e["year"] for e in self.events(name, "imprisoned") if e.get("year") is not None]
+        if not starts:
+            return None
+        start = min(starts)
+        releases = self.events(name, "released")
+        if not releases:
+            return start, None
+        after = [e["year"] for e in releases if e.get("year") is not None and e["year"] > start]
+        if any(e.get("year") is None for e in releases) and not after:
+            return None
+        return (start, min(after)) if after else (start, None)
+
+    def check(self, character: str, backstory_claims: Dict, backstory: str = "") -> List[Dict]:
+        """Violations of the map's dated deaths and imprisonments by one character's backstory."""
+        started = time.perf_counter()
+        names = self.resolve(character)
+        violations: List[Dict] = []
+        # A shared surname resolving to several characters is too ambiguous to veto on
+        if len(names) == 1:
+            violations = self._check(names[0], backstory_claims, backstory)
+        RULE_STATS.record("plot_facts", 1, len(violations), time.perf_counter() - started)
+        return violations
+
+    def _check(self, name: str, backstory_claims: Dict, backstory: str) -> List[Dict]:
+        violations = []
+        death = self.death_year(name)
+        if death is not None:
+            later = [y for y in backstory_claims.get("years", []) if y > death]
+            if later:
+                violations.append({
+                    "type": "Plot-Map Post-Mortem Activity",
+                    "character": name, "death_year": death, "backstory_years": sorted(set(later)),
+                    "narrative_context": self.events(name, "dead")[0]["text"], "chapter": "Plot map",
+                })
+        custody = self.custody(name)
+        if custody is None:
+            return violations
+        start, end = custody
+        held = self.events(name, "imprisoned")[0]["text"]
+        locations = [fold(loc) for loc in backstory_claims.get("locations", [])
+                     if not any(w in fold(loc) for w in PRISON_WORDS)]
+        for sentence, years in sentence_claims(backstory):
+            inside = [y for y in years if y > start and (end is None or y < end)]
+            if not inside:
+                continue
+            if any("imprisoned" in h[2] for h in word_hits(sentence)):
+                violations.append({
+                    "type": "Plot-Map Arrest While Imprisoned",
+                    "character": name, "year": inside[0], "imprisoned_since": start,
+                    "narrative_context": held, "chapter": "Plot map",
+                })
+                continue
+            elsewhere = [loc for loc in locations if loc in sentence]
+            if elsewhere:
+                violations.append({
+                    "type": "Plot-Map Custody Conflict",
+                    "character": name, "year": inside[0], "imprisoned_since": start,
+                    "backstory_location": elsewhere[0], "narrative_context": held, "chapter": "Plot map",
+                })
+        return violations
+
+
+class PlotFactsStore:
+    """Plot facts per book: the companion JSON if present, else derived from the plot map."""
+
+    def __init__(self, plot_maps_dir: str = PLOT_MAPS_DIR):
+        self.plot_maps_dir = plot_maps_dir
+        self.index = PlotMapIndex(plot_maps_dir).load()
+        self.facts: Dict[str, Optional[PlotFacts]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, key: str) -> Optional[PlotFacts]:
+        if os.path.isdir(self.plot_maps_dir):
+            for name in os.listdir(self.plot_maps_dir):
+                if name.endswith("_plot_facts.json") and normalize_book_key(name[:-len("_plot_facts.json")]) == key:
+                    with open(os.path.join(self.plot_maps_dir, name), "r", encoding="utf-8") as f:
+                        facts = json.load(f)
+                    if facts.get("version") == FACTS_VERSION:
+                        return PlotFacts(facts)
+        text = self.index.maps.get(key)
+        return PlotFacts(extract_plot_facts(text, key)) if text else None
+
+    def get(self, book_name: str) -> Optional[PlotFacts]:
+        key = self.index.key_for(book_name)
+        if not key:
+            return None
+        with self._lock:
+            if key not in self.facts:
+                self.facts[key] = self._load(key)
+            return self.facts[key]
+
+
+_store: Optional[PlotFactsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_plot_facts(book_name: str) -> Optional[PlotFacts]:
+    """Process-wide plot facts for a book (None when the book has no plot map)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PlotFactsStore()
+    return _store.get(book_name)
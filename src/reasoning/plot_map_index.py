@@ -0,0 +1,240 @@
+"""
+Sectioned plot maps, so the jury only sees the part of a map about its story.
+
+scripts/generate_plot_maps.py writes one markdown plot map per book with four
+sections (see its synthesize_plot_map):
+
+    characters  "### Key Characters and Arcs"         numbered "**Name**: arc" entries
+    timeline    "### Timeline Anchors"                 dated bullets
+    causal      "### Central Causal Relationships"     bullets
+    sequence    "### Plot Sequence"                    prose, split into sentences
+
+Each map is parsed once into entries per section, indexed by the characters
+(from the characters section, with their unambiguous name parts as aliases)
+and the years each entry mentions. `context_for(character, years)` keeps the
+resolved character's entries plus every dated entry inside the backstory's
+year span, in map order and under the original headings. Maps that cannot be
+parsed, or characters that do not resolve, get the full text as before.
+"""
+import os
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set
+
+from src.pathway_pipeline.book_index import normalize_book_key
+from src.reasoning.multi_pattern import get_matcher
+from src.reasoning.narrative_state import extract_years
+
+PLOT_MAP_CONTEXT = os.getenv("PLOT_MAP_CONTEXT", "targeted")
+
+SECTIONS = (
+    ("characters", "Key Characters and Arcs"),
+    ("timeline", "Timeline Anchors"),
+    ("causal", "Central Causal Relationships"),
+    ("sequence", "Plot Sequence"),
+)
+
+HEADING_PATTERN = re.compile(r"^#{2,4}\s*(.+?)\s*$", re.MULTILINE)
+CHARACTER_ENTRY = re.compile(r"^\s*(?:\d+\.|[-*])\s*\*\*(.+?)\*\*\s*:?")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+(?=[A-Z*_\"'])")
+
+# Name parts that never identify a character on their own
+TITLE_WORDS = {"m", "mme", "mlle", "mr", "mrs", "miss", "lord", "lady", "sir", "captain", "commander",
+               "abbe", "count", "countess", "baron", "baroness", "major", "dr", "doctor", "la", "le",
+               "de", "du", "the", "of", "and", "madame", "monsieur", "mademoiselle", "father", "old"}
+
+
+def fold(text: str) -> str:
+    """Lowercase without accents or curly apostrophes, so "Dantès’" and "Dantes'" match."""
+    decomposed = unicodedata.normalize("NFKD", str(text or "").replace("’", "'"))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def name_parts(name: str) -> List[str]:
+    """Folded full name, bracketed aliases ("Ayrton (Ben Joyce)") and their non-title words."""
+    names = [n.strip() for n in re.split(r"[()/]|\baka\b", fold(name)) if n.strip()]
+    parts = []
+    for n in names:
+        parts.append(n)
+        parts.extend(w for w in re.findall(r"[a-z][a-z'-]+", n) if len(w) > 2 and w not in TITLE_WORDS)
+    return list(dict.fromkeys(parts))
+
+
+def unique_aliases(characters: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Name -> its name parts, minus parts shared with another character (the full name is always kept)."""
+    owners: Dict[str, Set[str]] = {}
+    for name, parts in characters.items():
+        for part in parts:
+            owners.setdefault(part, set()).add(name)
+    return {name: [p for p in parts if len(owners[p]) == 1 or p == parts[0]] for name, parts in characters.items()}
+
+
+def resolve_characters(character: str, characters: Dict[str, List[str]], aliases: Dict[str, List[str]]) -> List[str]:
+    """Characters named by `character`: full names and unambiguous name parts, else every holder of a shared part."""
+    if not character or not aliases:
+        return []
+    folded = fold(character)
+    found = get_matcher(aliases).matched(folded)
+    if not found:
+        # A shared name part ("Morrel") names every character who has it
+        words = {w for w in re.findall(r"[a-z][a-z'-]+", folded) if len(w) > 2 and w not in TITLE_WORDS}
+        found = {name: parts for name, parts in characters.items() if words & set(parts)}
+    return [name for name in characters if name in found]
+
+
+def section_of(heading: str) -> Optional[str]:
+    heading = fold(heading.replace("*", "")).strip()
+    for key, title in SECTIONS:
+        if fold(title) in heading:
+            return key
+    return None
+
+
+def split_entries(key: str, body: str) -> List[str]:
+    if key == "sequence":
+        return [s.strip() for p in body.split("\n\n") for s in SENTENCE_SPLIT.split(p.strip()) if s.strip()]
+    entries = []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        if entries and not re.match(r"^\s*(?:\d+\.|[-*•])\s", line):
+            # Wrapped continuation of the previous bullet
+            entries[-1] += " " + line.strip()
+        else:
+            entries.append(line.strip())
+    return entries
+
+
+class PlotMap:
+    def __init__(self, text: str, book: str = ""):
+        self.book = book
+        self.text = text
+        self.title = ""
+        self.sections: Dict[str, List[str]] = {}
+        headings = list(HEADING_PATTERN.finditer(text))
+        for i, m in enumerate(headings):
+            key = section_of(m.group(1))
+            if key is None:
+                if not self.sections and not self.title:
+                    self.title = m.group(0).strip()
+                continue
+            end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+            self.sections.setdefault(key, []).extend(split_entries(key, text[m.end():end]))
+
+        # Characters and their aliases; a name part shared by two characters ("Morrel") is dropped
+        self.characters: Dict[str, List[str]] = {}
+        for entry in self.sections.get("characters", []):
+            m = CHARACTER_ENTRY.match(entry)
+            if m:
+                self.characters[m.group(1).strip()] = name_parts(m.group(1))
+        self.aliases = unique_aliases(self.characters)
+
+        # (section, entry index) lists per character and per year
+        self.by_character: Dict[str, Dict[str, List[int]]] = {name: {} for name in self.characters}
+        self.by_year: Dict[int, Dict[str, List[int]]] = {}
+        matcher = get_matcher(self.aliases) if self.aliases else None
+        for key, entries in self.sections.items():
+            for i, entry in enumerate(entries):
+                names = set(matcher.matched(fold(entry))) if matcher is not None else set()
+                if key == "characters":
+                    # An arc entry belongs to its own character, not to everyone its description mentions
+                    m = CHARACTER_ENTRY.match(entry)
+                    names = {m.group(1).strip()} if m else set()
+                for name in names:
+                    self.by_character[name].setdefault(key, []).append(i)
+                for year in set(extract_years(entry)):
+                    self.by_year.setdefault(year, {}).setdefault(key, []).append(i)
+
+    @property
+    def parsed(self) -> bool:
+        return bool(self.sections) and bool(self.characters)
+
+    def resolve(self, character: str) -> List[str]:
+        return resolve_characters(character, self.characters, self.aliases)
+
+    def entries_for(self, characters: Iterable[str] = (), years: Iterable[int] = ()) -> Dict[str, List[int]]:
+        """Section -> sorted entry indexes about any of `characters` or dated inside the span of `years`."""
+        selected: Dict[str, Set[int]] = {}
+        for name in characters:
+            for key, idx in self.by_character.get(name, {}).items():
+                selected.setdefault(key, set()).update(idx)
+        years = list(years)
+        if years:
+            first, last = min(years), max(years)
+            for year, sections in self.by_year.items():
+                if first <= year <= last:
+                    for key, idx in sections.items():
+                        selected.setdefault(key, set()).update(idx)
+        return {key: sorted(idx) for key, idx in selected.items()}
+
+    def render(self, selected: Dict[str, List[int]]) -> str:
+        blocks = [self.title] if self.title else []
+        for key, title in SECTIONS:
+            idx = selected.get(key)
+            if not idx:
+                continue
+            entries = self.sections[key]
+            body = " ".join(entries[i] for i in idx) if key == "sequence" else "\n".join(entries[i] for i in idx)
+            blocks.append(f"### {title}\n\n{body}")
+        return "\n\n".join(blocks)
+
+    def context_for(self, character: str = "", years: Iterable[int] = ()) -> str:
+        """The sections relevant to a character and a backstory's years; the full map if nothing resolves."""
+        if not self.parsed:
+            return self.text
+        characters = self.resolve(character)
+        if not characters:
+            return self.text
+        return self.render(self.entries_for(characters, years))
+
+
+@lru_cache(maxsize=32)
+def parse_plot_map(text: str, book: str = "") -> PlotMap:
+    """Parsed plot map, shared by every story that carries the same map text."""
+    return PlotMap(text, book)
+
+
+def plot_context(plot_map: str, character: str = "", years: Iterable[int] = (), mode: str = PLOT_MAP_CONTEXT) -> str:
+    if not plot_map or mode == "full":
+        return plot_map
+    return parse_plot_map(plot_map).context_for(character, years)
+
+
+class PlotMapIndex:
+    """Plot maps on disk, keyed by normalized book name."""
+
+    def __init__(self, plot_maps_dir: str = "Dataset/PlotMaps/"):
+        self.plot_maps_dir = plot_maps_dir
+        self.maps: Dict[str, str] = {}
+        self._resolved: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> "PlotMapIndex":
+        if os.path.isdir(self.plot_maps_dir):
+            for pm_file in sorted(os.listdir(self.plot_maps_dir)):
+                if pm_file.endswith("_plot_map.txt"):
+                    with open(os.path.join(self.plot_maps_dir, pm_file), "r", encoding="utf-8") as f:
+                        self.maps[normalize_book_key(pm_file[:-len("_plot_map.txt")])] = f.read()
+        return self
+
+    def key_for(self, book_name: str) -> str:
+        """Map key for a book name: exact match, else the (cached) substring match the old lookup used."""
+        norm = normalize_book_key(book_name)
+        if not norm or norm in self.maps:
+            return norm
+        with self._lock:
+            if norm not in self._resolved:
+                self._resolved[norm] = next((k for k in self.maps if norm in k or k in norm), "")
+            return self._resolved[norm]
+
+    def text(self, book_name: str) -> str:
+        return self.maps.get(self.key_for(book_name), "")
+
+    def get(self, book_name: str) -> Optional[PlotMap]:
+        key = self.key_for(book_name)
+        return parse_plot_map(self.maps[key], key) if key in self.maps else None
+
+    def __len__(self) -> int:
+        return len(self.maps)
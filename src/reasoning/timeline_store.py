@@ -0,0 +1,144 @@
+"""
+Per-book, per-character timelines for the temporal rule checks.
+
+A timeline holds the narrative states (see narrative_state.py) of a whole book
+that mention one character, found by the character's name parts among the
+state's persons ("Dantes" and "Edmond Dantès" both mention "Edmond Dantes").
+It is built once per character from the shared state index, which parses each
+book's windows once, and shared by every story about them. Each dated mention
+becomes one event, kept in a sorted array:
+
+    events       [(progress, year, location, status, chunk_key), ...]   by (year, progress)
+    event_years  [1811, 1815, 1815, 1829, ...]                          the same order
+
+`status` is "dead" or "imprisoned" when the state's text has death or
+imprisonment keywords, else None. "What was X doing in 1815" (`at`) and "which
+events fall in 1815-1820" (`events_in`) are a bisect over event_years plus the
+size of the answer; `locations_at` answers "where was X in 1815".
+"""
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from src.models.dossier import normalize_key
+from src.reasoning.plot_map_index import name_parts
+
+# Keyword group of a state -> status of its events, in priority order
+STATUS_GROUPS = (("death", "dead"), ("imprisonment", "imprisoned"))
+
+
+class Event(NamedTuple):
+    progress: Optional[float]
+    year: int
+    location: Optional[str]
+    status: Optional[str]
+    key: object
+
+
+def state_key(state: dict):
+    """Stable key of a narrative state: its chunk id, or the object itself for ad-hoc states."""
+    return state.get("chunk_id", id(state))
+
+
+def state_status(state: dict) -> Optional[str]:
+    keywords = state.get("keywords") or {}
+    return next((status for group, status in STATUS_GROUPS if keywords.get(group)), None)
+
+
+class CharacterTimeline:
+    def __init__(self, book: str = "", character: str = "", names: Optional[Iterable[str]] = None):
+        self.book = book
+        self.character = character
+        # Name parts a state's persons are matched against (default: the character's)
+        self.names: Set[str] = set(names) if names is not None else set(name_parts(character))
+        self.events: List[Event] = []
+        self.event_years: List[int] = []
+        self.states: Dict[object, dict] = {}
+        self.seen: Set = set()
+        self.built = False
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def mentioned_by(self, state: dict) -> List[str]:
+        """The state's persons that name this character."""
+        return [p for p in state.get("persons") or [] if self.names & set(name_parts(p))]
+
+    def build(self, load_states: Callable[[], Iterable[dict]]) -> "CharacterTimeline":
+        """Index `load_states()` (e.g. the book's states) on the first call only."""
+        with self._build_lock:
+            if not self.built:
+                self.add_states(load_states())
+                self.built = True
+        return self
+
+    def add_states(self, states: Iterable[dict]) -> int:
+        """Index the states not seen before that mention the character; returns how many were indexed."""
+        added: List[Event] = []
+        with self._lock:
+            for state in states:
+                key = state_key(state)
+                if key in self.seen:
+                    continue
+                self.seen.add(key)
+                if not self.mentioned_by(state):
+                    continue
+                self.states[key] = state
+                status = state_status(state)
+                for year in sorted(set(state.get("years", []))):
+                    for location in state.get("locations") or [None]:
+                        added.append(Event(state.get("progress_pct"), year, location, status, key))
+            if added:
+                # One sort per batch: a whole book is indexed in a single call
+                self.events = sorted(self.events + added, key=lambda e: (e.year, e.progress or 0.0))
+                self.event_years = [e.year for e in self.events]
+        return len({e.key for e in added})
+
+    def events_in(self, first_year: int, last_year: Optional[int] = None) -> List[Event]:
+        """Events with first_year <= year <= last_year, in (year, progress) order."""
+        last_year = first_year if last_year is None else last_year
+        with self._lock:
+            lo = bisect.bisect_left(self.event_years, first_year)
+            hi = bisect.bisect_right(self.event_years, last_year)
+            return self.events[lo:hi]
+
+    def at(self, year: int) -> List[Event]:
+        """What the narrative says about the character in `year`."""
+        return self.events_in(year)
+
+    def locations_at(self, year: int) -> List[str]:
+        """Where the narrative places the character in `year` (distinct, in book order)."""
+        return list(dict.fromkeys(e.location for e in self.at(year) if e.location))
+
+    def event_count(self) -> int:
+        with self._lock:
+            return len(self.events)
+
+
+class TimelineStore:
+    def __init__(self):
+        self.timelines: Dict[Tuple[str, str], CharacterTimeline] = {}
+        self._lock = threading.Lock()
+
+    def get(self, book: str, character: str) -> CharacterTimeline:
+        key = normalize_key(book, character)
+        with self._lock:
+            if key not in self.timelines:
+                self.timelines[key] = CharacterTimeline(*key)
+            return self.timelines[key]
+
+    def report(self) -> str:
+        lines = [f"{'Book':<28} {'Character':<22} {'States':>7} {'Events':>7}"]
+        with self._lock:
+            for (book, character), t in sorted(self.timelines.items()):
+                lines.append(f"{book[:28]:<28} {character[:22]:<22} {len(t.states):>7} {t.event_count():>7}")
+        return "\n".join(lines)
+
+
+# Global store shared by all stories in the process
+TIMELINES = TimelineStore()
+
+
+def get_timeline(book: str, character: str, nlp=None) -> CharacterTimeline:
+    """The character's timeline over the whole book, built from the shared state index on first use."""
+    from src.reasoning.narrative_state import book_states
+    return TIMELINES.get(book, character).build(lambda: book_states(book, nlp))
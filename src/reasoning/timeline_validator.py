@@ -1,5 +1,12 @@
 import networkx as nx
-from typing import List, Dict, Tuple
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Optional
+from src.reasoning.plot_map_index import name_parts
+from src.reasoning.timeline_store import CharacterTimeline
+
+# Narrative graphs by state-key sequence, shared across calls (treat as read-only)
+_GRAPH_CACHE: "OrderedDict[tuple, nx.DiGraph]" = OrderedDict()
+_GRAPH_CACHE_SIZE = 256
 
 class TimelineValidator:
     """
@@ -7,62 +14,61 @@ class TimelineValidator:
     Focuses on location consistency (a character cannot be in two places at once).
     """
     
-    def validate_location_consistency(self, backstory_claims: Dict, narrative_states: List[Dict]) -> List[Dict]:
+    def validate_location_consistency(self, backstory_claims: Dict, narrative_states: List[Dict],
+                                      timeline: Optional[CharacterTimeline] = None) -> List[Dict]:
         """
         Detects if a character is in two places at once.
         Example: Backstory says Paris in 1815, Narrative says Chateau d'If in 1815.
+
+        `timeline` is the character's whole-book timeline (see timeline_store). Without
+        one, the story's states that mention a backstory person stand in for it. For
+        each backstory year, one point query gives where the narrative places the
+        character; a backstory location that is none of those places is a conflict.
         """
-        violations = []
         b_years = backstory_claims.get("years", [])
         b_locs = backstory_claims.get("locations", [])
-        b_persons = backstory_claims.get("persons", [])
 
         if not b_years or not b_locs:
             return []
 
-        for state in narrative_states:
-            n_years = state.get("years", [])
-            n_locs = state.get("locations", [])
-            n_persons = state.get("persons", [])
-            
-            # Find year overlap
-            common_years = set(b_years) & set(n_years)
-            if common_years:
-                # Fuzzy person matching: Check if any backstory person is a substring 
-                # of a narrative person or vice-versa
-                common_persons = []
-                for bp in b_persons:
-                    for np in n_persons:
-                        if bp.lower() in np.lower() or np.lower() in bp.lower():
-                            common_persons.append(bp)
-                            break
-                
-                if common_persons:
-                    # If they share a person and a year, check for location mismatch.
-                    # We improve this by checking if backlight location is explicitly 
-                    # NOT in the narrative context snippet.
-                    snippet = state.get("content_snippet", "").lower()
-                    for bl in b_locs:
-                        # If the narrative location is explicitly mentioned as something else
-                        # OR if the narrative context doesn't mention the backstory location
-                        # but mentions some other location.
-                        if bl.lower() not in snippet:
-                            # Potential location conflict
-                            violations.append({
-                                "type": "Location Conflict",
-                                "year": list(common_years)[0],
-                                "backstory_location": bl,
-                                "narrative_locations": n_locs,
-                                "persons": common_persons,
-                                "chapter": state["chapter"]
-                            })
-            
+        if timeline is None:
+            names = {p for bp in backstory_claims.get("persons", []) for p in name_parts(bp)}
+            timeline = CharacterTimeline(names=names)
+            timeline.add_states(narrative_states)
+
+        violations = []
+        for year in sorted(set(b_years)):
+            events = [e for e in timeline.at(year) if e.location]
+            if not events:
+                continue
+            places = [e.location.lower() for e in events]
+            for bl in b_locs:
+                folded = bl.lower()
+                if any(folded in place or place in folded for place in places):
+                    continue
+                state = timeline.states[events[0].key]
+                violations.append({
+                    "type": "Location Conflict",
+                    "year": year,
+                    "backstory_location": bl,
+                    "narrative_locations": list(dict.fromkeys(e.location for e in events)),
+                    "persons": timeline.mentioned_by(state),
+                    "chapter": state.get("chapter", "Unknown")
+                })
         return violations
 
     def build_narrative_graph(self, narrative_states: List[Dict]) -> nx.DiGraph:
         """
-        Builds a DAG of events based on progress percentage.
+        Builds a DAG of events based on progress percentage. Graphs are cached by
+        the sequence of states, so repeated evidence lists reuse the same graph.
         """
+        # Only states with chunk ids have stable keys; ad-hoc lists are built fresh
+        cache_key = tuple(s.get("chunk_id") for s in narrative_states)
+        if None in cache_key:
+            cache_key = None
+        elif cache_key in _GRAPH_CACHE:
+            _GRAPH_CACHE.move_to_end(cache_key)
+            return _GRAPH_CACHE[cache_key]
         G = nx.DiGraph()
         
         last_node = None
@@ -72,5 +78,9 @@ class TimelineValidator:
             if last_node:
                 G.add_edge(last_node, node_id)
             last_node = node_id
-            
+
+        if cache_key is not None:
+            _GRAPH_CACHE[cache_key] = G
+            if len(_GRAPH_CACHE) > _GRAPH_CACHE_SIZE:
+                _GRAPH_CACHE.popitem(last=False)
         return G
@@ -0,0 +1,85 @@
+import sys
+import os
+import time
+import tempfile
+import threading
+import unittest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from scripts.ablation_engine import AblationEngine, ArtifactStore, DEFAULT_CONFIG, accuracy, config_from_flags
+
+
+class TestConfigs(unittest.TestCase):
+    def test_legacy_flags(self):
+        baseline = config_from_flags([])
+        self.assertFalse(baseline["expansion"] or baseline["rerank"] or baseline["dual_pass"])
+        # Everything on is what main.py runs
+        self.assertEqual(config_from_flags(["--use-expansion", "--use-rerank", "--use-dual-pass"]), DEFAULT_CONFIG)
+        self.assertEqual(config_from_flags(["--use-rerank"], plot_map="off")["plot_map"], "off")
+        with self.assertRaises(ValueError):
+            config_from_flags(["--use-magic"])
+
+    def test_accuracy_counts_labelled_predictions_only(self):
+        self.assertEqual(accuracy({"1": 0, "2": 1, "3": 1}, {"1": 0, "2": 0}), (50.0, 1, 2))
+        self.assertEqual(accuracy({}, {"1": 0}), (0.0, 0, 0))
+
+    def test_stories_and_labels_from_csv(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8") as f:
+            f.write('id,book_name,char,caption,content,label\n'
+                    '46,In Search of the Castaways,Thalcave,,"He rode the pampas.",consistent\n'
+                    '12,The Count of Monte Cristo,Faria,,"He taught in Rome.",contradict\n')
+        try:
+            engine = AblationEngine(f.name, limit=1)
+            self.assertEqual(len(engine.stories), 1)
+            self.assertEqual(engine.labels, {"46": 1})
+            self.assertEqual(AblationEngine(f.name).labels, {"46": 1, "12": 0})
+        finally:
+            os.remove(f.name)
+
+
+class TestArtifactStore(unittest.TestCase):
+    def test_concurrent_configurations_compute_once(self):
+        store = ArtifactStore()
+        calls = []
+
+        def build():
+            calls.append(1)
+            time.sleep(0.05)
+            return {"chunks": ["a"]}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(store.compute("1", "evidence", "fp", build)))
+                   for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"chunks": ["a"]}] * 4)
+        self.assertEqual((store.writes["evidence"], store.hits["evidence"]), (1, 3))
+        # Other inputs are another entry, not an eviction
+        store.compute("1", "evidence", "fp2", lambda: {"chunks": ["b"]})
+        self.assertEqual(store.get("1", "evidence", "fp"), {"chunks": ["a"]})
+
+    def test_unstored_claims_are_released(self):
+        store = ArtifactStore()
+        with self.assertRaises(RuntimeError):
+            store.compute("1", "nli", "fp", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+        # A result that is never stored (e.g. a failed juror) is released at the end of the story
+        self.assertIsNone(store.get("1", "jury", "fp"))
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(store.get("1", "jury", "fp")))
+        waiter.start()
+        time.sleep(0.05)
+        self.assertTrue(waiter.is_alive())
+        store.release()
+        waiter.join(1)
+        # The waiter now owns the retry
+        self.assertEqual(got, [None])
+        self.assertEqual(store.compute("1", "nli", "fp", lambda: [1, "ok", []]), [1, "ok", []])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.models.batch_jobs import BatchJobStore, BatchPending, make_custom_id
+
+
+class TestBatchJobStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.req_path = os.path.join(self.tmp, "requests.jsonl")
+        self.res_path = os.path.join(self.tmp, "results.jsonl")
+        self.messages = [{"role": "user", "content": "Who is Thalcave?"}]
+
+    def test_custom_id_is_stable(self):
+        a = make_custom_id("identity", "groq-llama-small", self.messages)
+        b = make_custom_id("identity", "groq-llama-small", [dict(m) for m in self.messages])
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, make_custom_id("decompose", "groq-llama-small", self.messages))
+
+    def test_missing_result_is_emitted_once(self):
+        store = BatchJobStore(self.req_path, self.res_path)
+        for _ in range(2):
+            with self.assertRaises(BatchPending):
+                store.resolve("identity", "groq-llama-small", self.messages)
+        with open(self.req_path) as f:
+            lines = [json.loads(l) for l in f]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["url"], "/v1/chat/completions")
+        self.assertEqual(lines[0]["body"]["model"], "groq-llama-small")
+
+    def test_ingested_result_is_served(self):
+        cid = make_custom_id("identity", "groq-llama-small", self.messages)
+        with open(self.res_path, "w") as f:
+            f.write(json.dumps({"custom_id": cid, "response": {"status_code": 200, "body": {
+                "choices": [{"message": {"content": "Thalcave"}}]}}}) + "\n")
+        store = BatchJobStore(self.req_path, self.res_path)
+        self.assertEqual(store.resolve("identity", "groq-llama-small", self.messages), "Thalcave")
+        store.require("identity", "groq-llama-small", self.messages)
+        self.assertFalse(os.path.exists(self.req_path))
+
+    def test_failed_result_raises_plain_error(self):
+        cid = make_custom_id("jury", "groq-llama", self.messages)
+        with open(self.res_path, "w") as f:
+            f.write(json.dumps({"custom_id": cid, "response": {"status_code": 500}, "error": {"message": "boom"}}) + "\n")
+        store = BatchJobStore(self.req_path, self.res_path)
+        with self.assertRaises(Exception) as ctx:
+            store.resolve("jury", "groq-llama", self.messages)
+        self.assertNotIsInstance(ctx.exception, BatchPending)
+
+
+if __name__ == '__main__':
+    unittest.main()
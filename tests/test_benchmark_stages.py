@@ -0,0 +1,64 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from scripts.benchmark_stages import Fixture, compare, run_stage, settings_mismatch, time_stage
+
+
+def ok(median):
+    return {"status": "ok", "median_s": median}
+
+
+class TestRegressionGate(unittest.TestCase):
+    def test_threshold_and_noise_floor(self):
+        baseline = {"chapters": ok(1.0), "nli": ok(0.001)}
+        self.assertEqual(compare({"chapters": ok(1.2)}, baseline, 0.25), [])
+        self.assertEqual(len(compare({"chapters": ok(1.3)}, baseline, 0.25)), 1)
+        # +100%, but only a millisecond
+        self.assertEqual(compare({"nli": ok(0.002)}, baseline, 0.25, min_delta=0.005), [])
+
+    def test_per_stage_threshold(self):
+        baseline = {"jury": ok(1.0), "chapters": ok(1.0)}
+        current = {"jury": ok(1.4), "chapters": ok(1.4)}
+        problems = compare(current, baseline, 0.25, {"jury": 0.5})
+        self.assertEqual(len(problems), 1)
+        self.assertTrue(problems[0].startswith("chapters"))
+
+    def test_skipped_and_failed_stages(self):
+        baseline = {"nli": ok(1.0), "jury": ok(1.0)}
+        current = {"nli": {"status": "skipped", "reason": "missing torch"}, "jury": {"status": "failed", "reason": "boom"},
+                   "index": ok(5.0)}
+        self.assertEqual(compare(current, baseline, 0.25), ["jury: failed (boom)"])
+
+    def test_settings_mismatch(self):
+        settings = {"input": "Dataset/train_fixed.csv", "stories": 8, "repeat": 5, "warmup": 1, "time_scale": 0.1}
+        # Repeat counts change the noise, not the workload
+        self.assertEqual(settings_mismatch(dict(settings, repeat=3), settings), [])
+        problems = settings_mismatch(dict(settings, stories=4), settings)
+        self.assertEqual(len(problems), 1)
+        self.assertTrue(problems[0].startswith("stories"))
+        self.assertEqual(len(settings_mismatch(settings, {})), 3)
+
+
+class TestStageRunner(unittest.TestCase):
+    def test_time_stage_counts_only_timed_runs(self):
+        calls = []
+        seconds = time_stage(lambda: calls.append(1), repeat=3, warmup=2)
+        self.assertEqual(len(calls), 5)
+        self.assertEqual(len(seconds), 3)
+
+    @unittest.skipUnless(os.path.isdir("Dataset/Books") and os.path.exists("Dataset/train_fixed.csv"), "needs Dataset/")
+    def test_fixture_and_chapters_stage(self):
+        fx = Fixture("Dataset/train_fixed.csv", 3)
+        self.assertEqual(len(fx.stories), 3)
+        self.assertTrue(all(s["book"] in fx.books and s["claims"] for s in fx.stories))
+        result = run_stage("chapters", fx, repeat=1, warmup=0)
+        self.assertEqual(result["status"], "ok")
+        self.assertEqual(result["items"], len(fx.books))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+import importlib.util
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.pathway_pipeline.book_index import BookChunkIndex, split_chapters, window_chunks, chunk_refs, ref_field
+from src.pathway_pipeline.fusion import chunk_id
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+BOOK = (
+    "Project preamble text that is long enough to be kept as its own section of the book. " * 2 + "\n"
+    "CHAPTER I\nEdmond Dantes returns to Marseilles aboard the Pharaon.\n"
+    "CHAPTER II\nThe prisoner spends fourteen years in the Chateau d'If.\n"
+)
+
+
+class KeywordEncoder:
+    """Deterministic stand-in for the bi-encoder: one dimension per keyword."""
+    KEYWORDS = ["pharaon", "prisoner", "treasure"]
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, normalize_embeddings=True):
+        import numpy as np
+        self.calls += 1
+        vecs = np.array([[t.lower().count(k) for k in self.KEYWORDS] + [0.01] for t in texts], dtype=np.float32)
+        return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+class TestChunking(unittest.TestCase):
+    def test_split_chapters_keeps_preamble(self):
+        spans = split_chapters(BOOK)
+        self.assertEqual([s[0] for s in spans], ["Preamble", "CHAPTER I", "CHAPTER II"])
+        self.assertEqual(spans[-1][2], len(BOOK))
+
+    def test_no_headings_is_full_text(self):
+        self.assertEqual(split_chapters("just prose"), [("Full Text", 0, 10)])
+
+    def test_windows_stay_inside_chapters(self):
+        spans = split_chapters(BOOK)
+        for chapter, start, end in window_chunks(BOOK, chunk_size=40, overlap=10):
+            c_start, c_end = next((s, e) for c, s, e in spans if c == chapter)
+            self.assertTrue(c_start <= start < end <= c_end)
+
+
+@unittest.skipUnless(HAS_NUMPY, "numpy not installed")
+class TestBookChunkIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.books = os.path.join(self.tmp, "books")
+        os.makedirs(self.books)
+        with open(os.path.join(self.books, "The Count of Monte Cristo.txt"), "w") as f:
+            f.write(BOOK)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_search_whole_book(self):
+        index = BookChunkIndex(self.books, encoder=KeywordEncoder(), cache_dir=None)
+        hits = index.search("the prisoner", k=1, book="the count of monte cristo")
+        self.assertEqual(hits[0]["chapter"], "CHAPTER II")
+        self.assertIn("Chateau", hits[0]["text"])
+
+    def test_embeddings_cached_on_disk(self):
+        cache = os.path.join(self.tmp, "cache")
+        first = KeywordEncoder()
+        BookChunkIndex(self.books, encoder=first, cache_dir=cache).search("pharaon", book="Monte Cristo")
+        second = KeywordEncoder()
+        hits = BookChunkIndex(self.books, encoder=second, cache_dir=cache).search("pharaon", book="Monte Cristo")
+        self.assertEqual(second.calls, 1)  # only the query was encoded
+        self.assertEqual(hits[0]["chapter"], "CHAPTER I")
+
+    def test_unknown_book(self):
+        index = BookChunkIndex(self.books, encoder=KeywordEncoder(), cache_dir=None)
+        self.assertEqual(index.search("pharaon", book="Moby Dick"), [])
+
+
+class TestChunkRefs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        with open(os.path.join(self.tmp, "The Count of Monte Cristo.txt"), "w") as f:
+            f.write(BOOK)
+        self.index = BookChunkIndex(self.tmp, encoder=object(), cache_dir=None)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_locate_gives_chapter_and_offsets(self):
+        chunk = "The prisoner spends fourteen years"
+        book, chapter, progress, start, end = self.index.locate(chunk, "monte cristo")
+        self.assertEqual((book, chapter), ("the count of monte cristo", "CHAPTER II"))
+        self.assertEqual(BOOK[start:end], chunk)
+        self.assertGreater(progress, 50)
+
+    def test_typed_columns_row_aligned(self):
+        chunks = ["Edmond Dantes returns", "not in any book"]
+        ids, books, chapters, progress, starts, ends, scores = chunk_refs(chunks, [0.9, 0.2], "Monte Cristo", self.index)
+        self.assertEqual(ids, (chunk_id(chunks[0]), chunk_id(chunks[1])))
+        self.assertEqual(chapters, ("CHAPTER I", "Unknown"))
+        self.assertEqual(books[1], "")
+        self.assertEqual(scores, (0.9, 0.2))
+
+    def test_ref_field_reads_tuples_and_legacy_dicts(self):
+        ref = (1, "book", "CHAPTER I", 12.5, 10, 20, None)
+        self.assertEqual(ref_field(ref, "chapter"), "CHAPTER I")
+        self.assertEqual(ref_field(ref, "score", 0.0), 0.0)
+        self.assertEqual(ref_field({"chapter": "CHAPTER V"}, "chapter"), "CHAPTER V")
+        self.assertEqual(ref_field(None, "chapter", "Unknown"), "Unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.reasoning.cascade import STORY_STAGES, CascadeStats, VerificationCascade, build_stages
+
+VERDICT_LABELS = {"year_rules": "YEAR", "programmatic": "PROG", "nli": "NLI", "jury": "JURY"}
+
+
+def make_stages(calls, nli_result):
+    """The production stage list (STORY_STAGES) with recorded, canned stage functions."""
+    results = {"year_rules": {"hit": True}, "programmatic": {"hit": False}, "nli": nli_result,
+               "identity": {"identity": "Faria"}, "jury": {"hit": False}}
+
+    def stage(name):
+        def run(ctx):
+            calls.append(name)
+            return dict(results[name])
+        return run
+
+    def verdict(label):
+        return lambda r, c: ("Contradictory", "High", label)
+    return build_stages({name: stage(name) for name, _, _ in STORY_STAGES},
+                        {name: verdict(label) for name, label in VERDICT_LABELS.items()})
+
+
+class TestVerificationCascade(unittest.TestCase):
+    def test_runs_in_cost_order_until_decisive(self):
+        calls = []
+        stats = CascadeStats()
+        cascade = VerificationCascade(make_stages(calls, {"hit": True, "temporal_clash": False}), stats=stats,
+                                      decisive_overrides={}, cost_overrides={})
+        ctx = {}
+        self.assertEqual(cascade.run(ctx)[2], "JURY")
+        self.assertEqual(calls, ["year_rules", "programmatic", "nli", "identity", "jury"])
+        self.assertEqual(ctx["identity"]["identity"], "Faria")
+        self.assertEqual(stats.stages["year_rules"]["hits"], 1)
+        self.assertEqual(stats.stages["year_rules"]["decisive"], 0)
+
+    def test_decisive_stage_skips_expensive_ones(self):
+        calls = []
+        stats = CascadeStats()
+        cascade = VerificationCascade(make_stages(calls, {"hit": True, "temporal_clash": True}), stats=stats,
+                                      decisive_overrides={}, cost_overrides={})
+        self.assertEqual(cascade.run({})[2], "NLI")
+        self.assertEqual(calls, ["year_rules", "programmatic", "nli"])
+        self.assertEqual(stats.stages["nli"]["decisive"], 1)
+        # A temporal clash settles the story before the small-LLM identity call
+        self.assertNotIn("identity", stats.stages)
+        self.assertNotIn("jury", stats.stages)
+
+    def test_overrides_change_conditions_and_order(self):
+        calls = []
+        cascade = VerificationCascade(make_stages(calls, {"hit": True, "temporal_clash": True}), stats=CascadeStats(),
+                                      decisive_overrides={"nli": "never", "year_rules": "hit"},
+                                      cost_overrides={"year_rules": 50})
+        self.assertEqual(cascade.run({})[2], "YEAR")
+        self.assertEqual(calls, ["programmatic", "nli", "identity", "year_rules"])
+
+    def test_override_needs_a_verdict_function(self):
+        with self.assertRaises(ValueError):
+            VerificationCascade(make_stages([], {}), stats=CascadeStats(), decisive_overrides={"identity": "always"},
+                                cost_overrides={})
+        # "never" needs no verdict
+        VerificationCascade(make_stages([], {}), stats=CascadeStats(), decisive_overrides={"identity": "never"},
+                            cost_overrides={})
+
+    def test_upstream_seconds_are_charged_to_the_stage(self):
+        stats = CascadeStats()
+        stages = make_stages([], {"hit": False, "upstream_seconds": 2.5})
+        VerificationCascade(stages, stats=stats, decisive_overrides={}, cost_overrides={}).run({})
+        self.assertGreaterEqual(stats.stages["nli"]["seconds"], 2.5)
+        self.assertLess(stats.stages["jury"]["seconds"], 2.5)
+
+    def test_final_result_ends_cascade(self):
+        calls = []
+        stages = make_stages(calls, {"final": ("Consistent", "Low", "NLI-ONLY"), "hit": False})
+        cascade = VerificationCascade(stages, stats=CascadeStats(), decisive_overrides={}, cost_overrides={})
+        self.assertEqual(cascade.run({})[2], "NLI-ONLY")
+        self.assertNotIn("jury", calls)
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            VerificationCascade(make_stages([], {}), stats=CascadeStats(), decisive_overrides={"nli": "sometimes"},
+                                cost_overrides={})
+        with self.assertRaises(ValueError):
+            VerificationCascade(make_stages([], {}), stats=CascadeStats(), decisive_overrides={},
+                                cost_overrides={"jury": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
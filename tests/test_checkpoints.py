@@ -0,0 +1,56 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.pathway_pipeline.checkpoints import CheckpointStore, fingerprint
+
+
+class TestCheckpointStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "ckpt", "pipeline.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_survives_restart(self):
+        store = CheckpointStore(self.path)
+        fp = fingerprint("backstory text")
+        store.put(70, "claims", fp, ["claim one", "claim two"])
+        store.put(70, "jury", fp, {"label": 0, "rationale": "VERDICT: CONTRADICTORY", "da_score": None})
+        store.close()
+
+        reopened = CheckpointStore(self.path)
+        self.assertEqual(reopened.get("70", "claims", fp), ["claim one", "claim two"])
+        self.assertEqual(reopened.get(70, "jury", fp)["label"], 0)
+        self.assertEqual(reopened.completed_stages(70), ["claims", "jury"])
+        self.assertEqual(reopened.hits, {"claims": 1, "jury": 1})
+
+    def test_changed_inputs_invalidate(self):
+        store = CheckpointStore(self.path)
+        store.put(1, "identity", fingerprint("old prompt"), "Dantes")
+        self.assertIsNone(store.get(1, "identity", fingerprint("new prompt")))
+        self.assertIsNone(store.get(2, "identity", fingerprint("old prompt")))
+
+    def test_overwrite_and_clear(self):
+        store = CheckpointStore(self.path)
+        store.put(1, "verdict", "a", ["Consistent", "Low", "x", "full"])
+        store.put(1, "verdict", "b", ["Contradictory", "High", "y", "no_da"])
+        self.assertIsNone(store.get(1, "verdict", "a"))
+        self.assertEqual(store.get(1, "verdict", "b")[0], "Contradictory")
+        self.assertEqual(store.count("verdict"), 1)
+        store.clear(1)
+        self.assertEqual(store.completed_stages(1), [])
+
+    def test_fingerprint_is_order_sensitive_and_stable(self):
+        self.assertEqual(fingerprint("a", ["b"]), fingerprint("a", ["b"]))
+        self.assertNotEqual(fingerprint("a", "b"), fingerprint("b", "a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
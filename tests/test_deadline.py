@@ -0,0 +1,48 @@
+import sys
+import os
+import time
+import unittest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.models.deadline import (
+    DeadlineExceeded, StoryDeadline, FULL, NO_RERETRIEVAL, NO_DA, REDUCED_JURY, NLI_ONLY
+)
+
+
+class TestStoryDeadline(unittest.TestCase):
+    def test_only_active_time_counts(self):
+        d = StoryDeadline(10.0)
+        time.sleep(0.05)  # queued behind other stories
+        self.assertEqual(d.elapsed(), 0.0)
+        with d.running():
+            time.sleep(0.05)
+        self.assertGreater(d.elapsed(), 0.04)
+        self.assertLess(d.elapsed(), 1.0)
+
+    def test_degradation_order(self):
+        d = StoryDeadline(100.0)
+        expectations = [(10, FULL), (55, NO_RERETRIEVAL), (75, NO_DA), (85, REDUCED_JURY), (95, NLI_ONLY)]
+        for spent, level in expectations:
+            d.spent = spent
+            self.assertEqual(d.level(), level, f"spent={spent}")
+        self.assertFalse(d.allows(NLI_ONLY))
+
+    def test_clamp_and_exhaustion(self):
+        d = StoryDeadline(5.0)
+        d.spent = 4.0
+        self.assertAlmostEqual(d.clamp(60), 1.0, places=2)
+        d.spent = 5.0
+        with self.assertRaises(DeadlineExceeded):
+            d.clamp(60)
+
+    def test_applied_level_is_sticky(self):
+        d = StoryDeadline(5.0)
+        d.degrade(NO_DA)
+        d.degrade(NO_RERETRIEVAL)
+        self.assertEqual(d.applied_name, "no_da")
+
+
+if __name__ == '__main__':
+    unittest.main()
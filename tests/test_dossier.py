@@ -0,0 +1,71 @@
+import sys
+import os
+import unittest
+import importlib.util
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.models.dossier import DossierRegistry
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+
+class FakeSpan:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeNLP:
+    """Splits on '. '."""
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        doc = type("Doc", (), {})()
+        doc.sents = [FakeSpan(s) for s in text.split(". ")]
+        return doc
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, sentences):
+        import numpy as np
+        self.encoded += len(sentences)
+        return np.array([[len(s), s.count("a")] for s in sentences], dtype=np.float32)
+
+
+class TestDossier(unittest.TestCase):
+    def test_keyed_by_book_and_identity(self):
+        registry = DossierRegistry()
+        a = registry.get("The Count of Monte Cristo.txt", "Abbé  Faria")
+        b = registry.get("the count of monte cristo", "abbé faria")
+        self.assertIs(a, b)
+        self.assertIsNot(a, registry.get("the count of monte cristo", "Noirtier"))
+
+    def test_split_reused_across_stories(self):
+        dossier = DossierRegistry().get("castaways", "Thalcave")
+        nlp = FakeNLP()
+        chunk = "The guide rode with Glenarvan across the pampas. Thalcave never spoke of his past."
+        first = dossier.split(chunk, nlp)
+        second = dossier.split(chunk, nlp)
+        self.assertEqual(first, second)
+        self.assertEqual(nlp.calls, 1)
+        self.assertEqual((dossier.stats["split_hits"], dossier.stats["split_misses"]), (1, 1))
+
+    @unittest.skipUnless(HAS_NUMPY, "numpy not installed")
+    def test_only_new_sentences_are_encoded(self):
+        dossier = DossierRegistry().get("castaways", "Thalcave")
+        encoder = CountingEncoder()
+        m1 = dossier.embed(["alpha sentence here", "beta sentence"], encoder)
+        m2 = dossier.embed(["beta sentence", "gamma sentence", "alpha sentence here"], encoder)
+        self.assertEqual(encoder.encoded, 3)
+        self.assertEqual(m2.shape, (3, 2))
+        self.assertEqual(m2[2].tolist(), m1[0].tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
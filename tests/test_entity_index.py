@@ -0,0 +1,99 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.reasoning.entity_tracker import GlobalEntityManager, slice_text
+
+
+class Ent:
+    def __init__(self, text, label, start_char):
+        self.text, self.label_, self.start_char = text, label, start_char
+
+
+class Doc:
+    def __init__(self, ents):
+        self.ents = ents
+
+
+class GazetteerNLP:
+    """Stand-in for spaCy: tags known names; records how many slices were parsed."""
+    NAMES = {"Dantes": "PERSON", "Marseilles": "GPE", "Fogg": "PERSON", "Paris": "GPE"}
+
+    def __init__(self):
+        self.parsed = 0
+
+    def _doc(self, text):
+        return Doc([Ent(n, label, text.find(n)) for n, label in self.NAMES.items() if n in text])
+
+    def __call__(self, text):
+        return self._doc(text)
+
+    def pipe(self, items, as_tuples=False, n_process=1, batch_size=1):
+        for text, ctx in items:
+            self.parsed += 1
+            yield self._doc(text), ctx
+
+
+class TestGlobalEntityManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.books = os.path.join(self.tmp, "books")
+        os.makedirs(self.books)
+        self.cache = os.path.join(self.tmp, "entities.pkl")
+        self._write("The Count of Monte Cristo.txt", "Intro line.\nDantes sailed to Marseilles.\n")
+        self._write("Around the World.txt", "Fogg left London.\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _write(self, name, text):
+        with open(os.path.join(self.books, name), "w") as f:
+            f.write(text)
+
+    def _manager(self, nlp):
+        manager = GlobalEntityManager(self.books, nlp=nlp, cache_file=self.cache, n_process=1, slice_chars=40)
+        manager.build_index()
+        return manager
+
+    def test_mentions_with_book_offsets(self):
+        manager = self._manager(GazetteerNLP())
+        (book, _, offset), = manager.mentions_of("dantes")
+        self.assertEqual(book, "the count of monte cristo")
+        self.assertEqual(offset, len("Intro line.\n"))
+        self.assertEqual(manager.books_mentioning("Fogg"), {"around the world"})
+        self.assertEqual(manager.mentions_of("Dantes", book="Around the World"), [])
+        self.assertTrue(manager.is_known("Marseilles", book="The Count of Monte Cristo.txt"))
+        self.assertFalse(manager.is_known("Marseilles", book="Around the World"))
+        self.assertFalse(manager.is_known("Villefort"))
+
+    def test_cache_reparses_only_changed_books(self):
+        self._manager(GazetteerNLP())
+        nlp = GazetteerNLP()
+        self.assertEqual(self._manager(nlp).entities, {"dantes", "marseilles", "fogg"})
+        self.assertEqual(nlp.parsed, 0)
+        self._write("Around the World.txt", "Fogg left Paris.\n")
+        manager = self._manager(nlp)
+        self.assertEqual(nlp.parsed, 1)
+        self.assertIn("paris", manager.entities)
+
+    def test_hallucination_check_per_book(self):
+        manager = self._manager(GazetteerNLP())
+        backstory = "He met Fogg in Marseilles."
+        self.assertEqual(manager.check_hallucination(backstory), [])
+        self.assertEqual(manager.check_hallucination(backstory, book="Around the World"), ["Marseilles"])
+
+    def test_slices_cut_at_newlines(self):
+        text = "line one\nline two\nline three\n" * 3
+        pieces = slice_text(text, 20)
+        self.assertEqual("".join(p for _, p in pieces), text)
+        self.assertTrue(all(p.endswith("\n") for _, p in pieces[:-1]))
+        self.assertEqual([o for o, _ in pieces], [sum(len(p) for _, p in pieces[:i]) for i in range(len(pieces))])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.pathway_pipeline.fusion import chunk_id, ranked_hits, reciprocal_rank_fusion, max_score_fusion, fuse
+
+
+class TestChunkIds(unittest.TestCase):
+    def test_stable_and_text_based(self):
+        self.assertEqual(chunk_id("The ship sailed."), chunk_id(b"The ship sailed."))
+        self.assertNotEqual(chunk_id("The ship sailed."), chunk_id("The ship sank."))
+        self.assertLess(chunk_id("x"), 2 ** 63)
+
+    def test_ranked_hits(self):
+        hits = ranked_hits(["a", "b"], [0.9, 0.4])
+        self.assertEqual(hits, [(chunk_id("a"), 0, 0.9), (chunk_id("b"), 1, 0.4)])
+        self.assertEqual(ranked_hits(None), [])
+        self.assertIsNone(ranked_hits(["a"])[0][2])
+
+
+class TestFusion(unittest.TestCase):
+    def test_rrf_rewards_chunks_shared_across_claims(self):
+        claim_a = ranked_hits(["x", "shared", "y"])
+        claim_b = ranked_hits(["z", "shared"])
+        fused = reciprocal_rank_fusion([claim_a, claim_b], top_n=10)
+        self.assertEqual(fused[0][0], chunk_id("shared"))
+        self.assertEqual(len(fused), 4)  # duplicates collapse to one entry
+
+    def test_top_n_bound(self):
+        claims = [ranked_hits([f"c{i}_{j}" for j in range(20)]) for i in range(5)]
+        self.assertEqual(len(fuse(claims, method="rrf", top_n=7)), 7)
+
+    def test_max_score(self):
+        claim_a = ranked_hits(["x", "y"], [0.5, 0.3])
+        claim_b = ranked_hits(["y"], [0.8])
+        fused = max_score_fusion([claim_a, claim_b], top_n=10)
+        self.assertEqual(fused, [(chunk_id("y"), 0.8), (chunk_id("x"), 0.5)])
+
+    def test_max_falls_back_to_rrf_without_scores(self):
+        claims = [ranked_hits(["x", "y"]), ranked_hits(["y"])]
+        self.assertEqual(fuse(claims, method="max", top_n=5), fuse(claims, method="rrf", top_n=5))
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            fuse([ranked_hits(["x"])], method="borda")
+
+    def test_deterministic_tie_order(self):
+        claims = [ranked_hits(["a"]), ranked_hits(["b"])]
+        self.assertEqual(fuse(claims, top_n=2), fuse(list(reversed(claims)), top_n=2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import sys
+import os
+import json
+import threading
+import unittest
+import urllib.request
+import urllib.error
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from scripts.mock_llm_server import serve
+
+JURY_PROMPT = """2. Hypothetical Backstory: In 1790 he sailed to Lima.
+3. Evidence Excerpts (with temporal metadata):
+- [Chapter 1] It was 1815 in Marseilles.
+VERDICT: CONSISTENT"""
+
+
+class TestMockLLMServer(unittest.TestCase):
+    def start(self, config_path="", verdict="rule"):
+        httpd = serve(0, config_path, verdict, seed=3, time_scale=0.0)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        self.addCleanup(httpd.server_close)
+        self.addCleanup(httpd.shutdown)
+        return f"http://127.0.0.1:{httpd.server_address[1]}/v1"
+
+    def post(self, base, model, prompt):
+        body = json.dumps({"model": model, "messages": [{"role": "user", "content": prompt}]}).encode()
+        req = urllib.request.Request(f"{base}/chat/completions", data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req) as res:
+            return json.loads(res.read())["choices"][0]["message"]["content"]
+
+    def test_rule_based_year_clash_is_contradictory(self):
+        base = self.start()
+        self.assertIn("VERDICT: CONTRADICTORY", self.post(base, "groq-llama", JURY_PROMPT))
+
+    def test_identity_echoes_original_label(self):
+        base = self.start()
+        prompt = "Identify the central character described in this backstory.\nOriginal Label: Faria\nBackstory: ..."
+        self.assertEqual(self.post(base, "groq-llama-small", prompt), "Faria")
+
+    def test_same_seed_is_deterministic(self):
+        first = self.post(self.start(), "groq-qwen", "DEVIL'S ADVOCATE\n" + JURY_PROMPT)
+        second = self.post(self.start(), "groq-qwen", "DEVIL'S ADVOCATE\n" + JURY_PROMPT)
+        self.assertEqual(first, second)
+
+    def test_injected_rate_limit(self):
+        import tempfile
+        cfg = os.path.join(tempfile.mkdtemp(), "mock.json")
+        with open(cfg, "w") as f:
+            json.dump({"groq-llama": {"rate_429": 1.0}}, f)
+        base = self.start(cfg)
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            self.post(base, "groq-llama", JURY_PROMPT)
+        self.assertEqual(ctx.exception.code, 429)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import sys
+import os
+import time
+import unittest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.models.model_health import ModelHealthTracker
+
+
+class TestModelHealthTracker(unittest.TestCase):
+    def test_percentiles_need_min_samples(self):
+        tracker = ModelHealthTracker(min_samples=5)
+        for lat in [1.0, 2.0, 3.0, 4.0]:
+            tracker.record("groq-llama", lat, ok=True)
+        self.assertIsNone(tracker.hedge_delay("groq-llama"))
+        for lat in [5.0] + [1.0] * 15:
+            tracker.record("groq-llama", lat, ok=True)
+        self.assertEqual(tracker.percentile("groq-llama", 95), 4.0)
+        self.assertEqual(tracker.percentile("groq-llama", 100), 5.0)
+
+    def test_consecutive_failures_open_circuit_and_route_to_substitute(self):
+        tracker = ModelHealthTracker(failure_threshold=3, cooldown_seconds=60, substitutes={"or-trinity": "groq-scout"})
+        for _ in range(3):
+            tracker.record("or-trinity", 0.5, ok=False)
+        self.assertTrue(tracker.is_open("or-trinity"))
+        self.assertFalse(tracker.allow("or-trinity"))
+        self.assertEqual(tracker.route("or-trinity"), "groq-scout")
+        self.assertEqual(tracker.aliases["or-trinity"].substituted, 1)
+
+    def test_half_open_probe_closes_on_success(self):
+        tracker = ModelHealthTracker(failure_threshold=1, cooldown_seconds=0.01)
+        tracker.record("groq-qwen", 0.5, ok=False)
+        time.sleep(0.02)
+        self.assertEqual(tracker.route("groq-qwen"), "groq-qwen")
+        self.assertTrue(tracker.allow("groq-qwen"))
+        # Only one probe at a time
+        self.assertFalse(tracker.allow("groq-qwen"))
+        tracker.record("groq-qwen", 0.4, ok=True)
+        self.assertTrue(tracker.allow("groq-qwen"))
+
+    def test_error_rate_threshold(self):
+        tracker = ModelHealthTracker(failure_threshold=10, min_samples=4, error_rate_threshold=0.5)
+        for ok in [True, False, True, False]:
+            tracker.record("or-nemotron-9b", 1.0, ok=ok)
+        self.assertAlmostEqual(tracker.error_rate("or-nemotron-9b"), 0.5)
+        self.assertTrue(tracker.is_open("or-nemotron-9b"))
+
+
+if __name__ == '__main__':
+    unittest.main()
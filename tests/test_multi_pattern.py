@@ -0,0 +1,55 @@
+import sys
+import os
+import random
+import unittest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.reasoning.multi_pattern import MultiPatternMatcher, get_matcher
+
+
+class TestMultiPatternMatcher(unittest.TestCase):
+    def test_positions_and_labels(self):
+        matcher = get_matcher({"death": ("died", "buried"), "prison": ("cell",)})
+        self.assertEqual(matcher.find_all("He DIED in his cell"),
+                         [(3, "died", ("death",)), (15, "cell", ("prison",))])
+
+    def test_overlapping_and_nested_patterns(self):
+        matcher = MultiPatternMatcher(["prison", "imprisoned", "son"])
+        self.assertEqual([(s, p) for s, p, _ in matcher.find_all("imprisoned")],
+                         [(0, "imprisoned"), (2, "prison"), (5, "son")])
+
+    def test_pattern_in_several_labels(self):
+        matcher = get_matcher({"keyword": ("never",), "conflict": ("never", "not")})
+        self.assertEqual(matcher.matched("never again, not once"),
+                         {"keyword": {"never"}, "conflict": {"never", "not"}})
+
+    def test_search_and_empty_inputs(self):
+        self.assertTrue(get_matcher(["paris"]).search("Off to Paris"))
+        self.assertFalse(get_matcher(["paris"]).search("Off to Rome"))
+        self.assertFalse(get_matcher([]).search("anything"))
+        self.assertEqual(get_matcher(["", "x"]).find_all(""), [])
+
+    def test_whole_words(self):
+        matcher = get_matcher({"imprisonment": ["cell", "d'if"]})
+        self.assertEqual(matcher.find_words("Your excellency, the cellar of the cell."),
+                         [(35, "cell", ("imprisonment",))])
+        self.assertEqual([h[1] for h in matcher.find_words("cell at the Château d'If")], ["cell", "d'if"])
+        self.assertEqual(matcher.positions("excellency", whole_words=True), {})
+
+    def test_matches_naive_substring_scan(self):
+        rng = random.Random(7)
+        for _ in range(300):
+            pats = {"".join(rng.choice("ab") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 5))}
+            text = "".join(rng.choice("abc") for _ in range(rng.randint(0, 25)))
+            expected = sorted((i, p) for p in pats for i in range(len(text)) if text.startswith(p, i))
+            got = sorted((s, p) for s, p, _ in MultiPatternMatcher(pats).find_all(text))
+            self.assertEqual(got, expected)
+
+    def test_compiled_matchers_are_shared(self):
+        self.assertIs(get_matcher({"e": ["dantes", "paris"]}), get_matcher({"e": ["paris", "dantes"]}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import sys
+import os
+import unittest
+import importlib.util
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.reasoning.narrative_state import NarrativeStateIndex, build_state, extract_years, keyword_hits
+from src.reasoning.constraint_rules import ConstraintRules, describe_violation
+from src.pathway_pipeline.fusion import chunk_id
+
+HAS_NETWORKX = importlib.util.find_spec("networkx") is not None
+
+
+class Ent:
+    def __init__(self, text, label):
+        self.text, self.label_ = text, label
+
+
+class Doc:
+    def __init__(self, ents):
+        self.ents = ents
+
+
+class GazetteerNLP:
+    """Stand-in for spaCy: tags known names, counts how many texts were parsed."""
+    NAMES = {"Dantes": "PERSON", "Paris": "GPE", "Marseilles": "GPE", "Chateau d'If": "LOC"}
+
+    def __init__(self):
+        self.parsed = 0
+
+    def pipe(self, texts):
+        for text in texts:
+            self.parsed += 1
+            yield Doc([Ent(n, label) for n, label in self.NAMES.items() if n in text])
+
+
+class TestNarrativeState(unittest.TestCase):
+    def test_full_years_and_keyword_positions(self):
+        self.assertEqual(extract_years("From 1815 to 1829, not 2001."), [1815, 1829])
+        self.assertEqual(keyword_hits("He died; his death was quiet.", ["death", "died"]), [("died", 3), ("death", 13)])
+        self.assertEqual(keyword_hits("His excellency left the cellar.", ["cell"]), [])
+
+    def test_state_fields(self):
+        text = "In 1815 Dantes was thrown into the dungeon in Marseilles."
+        state = build_state(text, Doc([Ent("Dantes", "PERSON"), Ent("Marseilles", "GPE")]), "CHAPTER 8")
+        self.assertEqual(state["chunk_id"], chunk_id(text))
+        self.assertEqual(state["years"], [1815])
+        self.assertEqual(state["persons"], ["Dantes"])
+        self.assertEqual(state["locations"], ["Marseilles"])
+        self.assertEqual(state["keywords"]["imprisonment"], [("dungeon", 35)])
+        self.assertEqual(state["keywords"]["death"], [])
+
+    def test_chunks_parsed_once_across_stories(self):
+        index, nlp = NarrativeStateIndex(), GazetteerNLP()
+        chunks = ["Dantes sailed in 1815.", "Paris in 1830."]
+        index.states_for(chunks, ["I", "II"], nlp)
+        states = index.states_for(chunks[::-1], nlp=nlp)
+        self.assertEqual(nlp.parsed, 2)
+        self.assertEqual([s["chapter"] for s in states], ["II", "I"])
+        self.assertEqual(index.reused, 2)
+
+
+class TestRulesOnStates(unittest.TestCase):
+    def setUp(self):
+        self.nlp = GazetteerNLP()
+        self.index = NarrativeStateIndex()
+
+    @unittest.skipUnless(HAS_NETWORKX, "networkx not installed")
+    def test_location_conflict(self):
+        from src.reasoning.timeline_validator import TimelineValidator
+        states = self.index.states_for(["In 1815, Dantes was thrown into the dungeon of the Chateau d'If."], ["Chapter 8"], self.nlp)
+        claims = {"years": [1815], "locations": ["Paris"], "persons": ["Edmond Dantes"]}
+        conflicts = TimelineValidator().validate_location_consistency(claims, states)
+        self.assertEqual(conflicts[0]["type"], "Location Conflict")
+        self.assertIn("Location Conflict", describe_violation(conflicts[0]))
+
+    def test_death_and_imprisonment(self):
+        states = self.index.states_for(["The poor man died in the year 1820, in prison."], ["Postscript"], self.nlp)
+        claims = {"years": [1820, 1845], "locations": ["London"]}
+        self.assertEqual(ConstraintRules.check_death_constraint(claims, states)[0]["backstory_years"], [1845])
+        self.assertEqual(ConstraintRules.check_imprisonment_constraint(claims, states)[0]["year"], 1820)
+
+    def test_bare_states_still_scanned(self):
+        states = [{"content_snippet": "he was buried", "years": [1800], "chapter": "X"}]
+        self.assertTrue(ConstraintRules.check_death_constraint({"years": [1810]}, states))
+
+
+if __name__ == "__main__":
+    unittest.main()
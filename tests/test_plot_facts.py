@@ -0,0 +1,145 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.reasoning.plot_facts import PlotFacts, PlotFactsStore, extract_plot_facts, extract_locations, write_plot_facts
+from src.reasoning.constraint_rules import RULE_STATS
+
+PLOT_MAP = """## **The Count of Monte Cristo: Comprehensive Plot Map**
+
+### **Key Characters and Arcs**
+
+1. **Edmond Dantès**: A young sailor wrongly accused of treason.
+2. **Abbé Faria**: A fellow prisoner who helps Dantès plan his escape.
+3. **M. Morrel**: A kind and honest merchant.
+4. **Maximilian Morrel**: M. Morrel's son.
+
+### **Timeline Anchors**
+
+* March 1815: Dantès is imprisoned in the Château d'If.
+* 1811: Abbé Faria was imprisoned.
+* 1833: M. Morrel died in Marseilles.
+
+### **Central Causal Relationships**
+
+* Faria's help enables the escape of Dantès.
+
+### **Plot Sequence**
+
+Dantès learns of his father's death. After Faria's death, Dantès escapes from the Château d'If.
+"""
+
+
+class TestExtractPlotFacts(unittest.TestCase):
+    def setUp(self):
+        self.facts = PlotFacts(extract_plot_facts(PLOT_MAP, "The Count of Monte Cristo"))
+
+    def test_status_goes_to_subject(self):
+        statuses = {n: {(e["year"], e["status"]) for e in self.facts.events(n) if e["status"]}
+                    for n in self.facts.characters}
+        self.assertIn((1811, "imprisoned"), statuses["Abbé Faria"])
+        self.assertIn((None, "dead"), statuses["Abbé Faria"])
+        self.assertIn((None, "released"), statuses["Edmond Dantès"])
+        self.assertNotIn((None, "released"), statuses["Abbé Faria"])
+        # "his father's death" is not Dantès' death
+        self.assertNotIn("dead", {s for _, s in statuses["Edmond Dantès"]})
+
+    def test_relations_are_not_status_events(self):
+        plot_map = PLOT_MAP.replace(
+            "4. **Maximilian Morrel**: M. Morrel's son.",
+            "4. **Maximilian Morrel**: M. Morrel's son.\n5. **Villefort**: A deputy procureur who arrests Dantès."
+        ).replace("* 1833: M. Morrel died in Marseilles.",
+                  "* 1833: M. Morrel died in Marseilles.\n* 1815: Villefort arrests Dantès.") \
+         + "Fernand conspires against Dantès, leading to his arrest by Villefort.\n"
+        facts = PlotFacts(extract_plot_facts(plot_map))
+        # "A fellow prisoner of Dantès" and "who arrests Dantès" are relations, not events
+        held = facts.events("Edmond Dantès", "imprisoned")
+        self.assertNotIn("characters", {e["section"] for e in held})
+        self.assertIn("* 1815: Villefort arrests Dantès.", [e["text"] for e in held])
+        self.assertEqual(facts.events("Villefort", "imprisoned"), [])
+        self.assertEqual(facts.events("Abbé Faria", "released"), [])
+        self.assertTrue(all(e["section"] in ("timeline", "sequence") for e in facts.events("Abbé Faria") if e["status"]))
+
+    def test_dates_locations_and_order(self):
+        events = self.facts.events("Edmond Dantès")
+        self.assertEqual(events[0]["year"], 1815)
+        self.assertEqual(events[0]["date"], "March 1815")
+        self.assertEqual(events[0]["locations"], ["Château d'If"])
+        self.assertTrue(all(e["year"] is None for e in events[1:]))
+        self.assertEqual(extract_locations("They sail in March to Marseilles with Dantès.", ["dantes"]), ["Marseilles"])
+
+    def test_custody_and_death(self):
+        self.assertEqual(self.facts.custody("Abbé Faria"), (1811, None))
+        # Escapes without a date: the end of the custody is unknown
+        self.assertIsNone(self.facts.custody("Edmond Dantès"))
+        self.assertEqual(self.facts.death_year("M. Morrel"), 1833)
+        self.assertIsNone(self.facts.death_year("Abbé Faria"))
+
+
+class TestPlotFactsCheck(unittest.TestCase):
+    def setUp(self):
+        self.facts = PlotFacts(extract_plot_facts(PLOT_MAP))
+
+    def check(self, character, backstory, years, locations=()):
+        return self.facts.check(character, {"years": years, "locations": list(locations)}, backstory)
+
+    def test_arrest_while_imprisoned(self):
+        found = self.check("Faria", "Suspected again in 1815, he was re-arrested and shipped to the Château d’If.",
+                           [1815], ["Château d’If"])
+        self.assertEqual([v["type"] for v in found], ["Plot-Map Arrest While Imprisoned"])
+        self.assertEqual(found[0]["imprisoned_since"], 1811)
+
+    def test_custody_conflict_needs_year_and_place_in_one_sentence(self):
+        found = self.check("Abbe Faria", "In 1813 he taught in Rome.", [1813], ["Rome"])
+        self.assertEqual([v["type"] for v in found], ["Plot-Map Custody Conflict"])
+        self.assertEqual(self.check("Faria", "In 1805 he taught in Rome.", [1805], ["Rome"]), [])
+        self.assertEqual(self.check("Faria", "He taught in Rome. In 1813 he fell ill.", [1813], ["Rome"]), [])
+
+    def test_post_mortem(self):
+        found = self.check("M. Morrel", "In 1840 he sold his ships.", [1840])
+        self.assertEqual(found[0]["type"], "Plot-Map Post-Mortem Activity")
+        self.assertEqual(found[0]["death_year"], 1833)
+
+    def test_ambiguous_or_unknown_character_is_not_checked(self):
+        self.assertEqual(self.check("Morrel", "In 1840 he sold his ships.", [1840]), [])
+        self.assertEqual(self.check("Villefort", "In 1840 he sold his ships.", [1840]), [])
+
+    def test_checks_are_recorded(self):
+        before = RULE_STATS.rules.get("plot_facts", {}).get("runs", 0)
+        self.check("Faria", "In 1813 he taught in Rome.", [1813], ["Rome"])
+        self.assertEqual(RULE_STATS.rules["plot_facts"]["runs"], before + 1)
+
+
+class TestPlotFactsStore(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        with open(os.path.join(self.dir, "The Count of Monte Cristo_plot_map.txt"), "w", encoding="utf-8") as f:
+            f.write(PLOT_MAP)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_derived_without_companion_file(self):
+        facts = PlotFactsStore(self.dir).get("The Count of Monte Cristo.txt")
+        self.assertEqual(facts.custody("Abbé Faria"), (1811, None))
+        self.assertIsNone(PlotFactsStore(self.dir).get("Unknown Book"))
+
+    def test_companion_file_is_preferred(self):
+        path = write_plot_facts(PLOT_MAP, "The Count of Monte Cristo", self.dir)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        data["characters"]["Abbé Faria"]["events"] = []
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        facts = PlotFactsStore(self.dir).get("the count of monte cristo")
+        self.assertIsNone(facts.custody("Abbé Faria"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import sys
+import os
+import time
+import random
+import shutil
+import tempfile
+import unittest
+import importlib.util
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+HAS_DEPS = all(importlib.util.find_spec(m) is not None for m in ("requests", "tqdm", "dotenv"))
+
+
+@unittest.skipUnless(HAS_DEPS, "requests/tqdm/python-dotenv not installed")
+class TestConcurrentPlotMaps(unittest.TestCase):
+    def test_results_reassembled_in_order(self):
+        from scripts.generate_plot_maps import run_ordered
+
+        def slow_echo(i, item):
+            time.sleep(random.random() * 0.02)
+            return f"{i}:{item}"
+
+        items = [f"w{i}" for i in range(30)]
+        self.assertEqual(run_ordered(slow_echo, items, desc="test"), [f"{i}:w{i}" for i in range(30)])
+
+    def test_rate_limiter_spaces_requests(self):
+        from scripts.generate_plot_maps import RateLimiter
+        limiter = RateLimiter(rpm=1200)  # one slot every 50ms
+        start = time.monotonic()
+        for _ in range(4):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.14)
+
+    def test_back_off_delays_next_slot(self):
+        from scripts.generate_plot_maps import RateLimiter
+        limiter = RateLimiter(rpm=0)
+        limiter.back_off(0.1)
+        start = time.monotonic()
+        limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+
+
+@unittest.skipUnless(HAS_DEPS, "requests/tqdm/python-dotenv not installed")
+class TestSummaryCache(unittest.TestCase):
+    def setUp(self):
+        import scripts.generate_plot_maps as gen
+        self.gen = gen
+        self.tmp = tempfile.mkdtemp()
+        self.calls = []
+        self.patches = [
+            mock.patch.object(gen, "summary_cache", gen.SummaryCache(self.tmp)),
+            mock.patch.object(gen, "llm_call", side_effect=lambda prompt, **kw: self.calls.append(prompt) or f"summary {len(self.calls)}"),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.tmp)
+
+    def test_window_reused_when_its_position_changes(self):
+        first = self.gen.summarize_window("Dantes sails to Marseilles.", 0, 10)
+        again = self.gen.summarize_window("Dantes sails to Marseilles.", 4, 12)
+        self.assertEqual(first, again)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_edited_window_and_prompt_change_miss(self):
+        self.gen.summarize_window("Dantes sails.", 0, 1)
+        self.gen.summarize_window("Dantes sails away.", 0, 1)
+        with mock.patch.object(self.gen, "WINDOW_PROMPT", self.gen.WINDOW_PROMPT + "\nBe brief."):
+            self.gen.summarize_window("Dantes sails.", 0, 1)
+        self.assertEqual(len(self.calls), 3)
+
+    def test_clusters_cached_and_failures_not_stored(self):
+        self.gen.summarize_cluster(["a", "b"], 0)
+        self.gen.summarize_cluster(["a", "b"], 3)
+        self.assertEqual(len(self.calls), 1)
+        with mock.patch.object(self.gen, "llm_call", return_value=""):
+            self.gen.summarize_cluster(["c"], 0)
+        self.assertIsNone(self.gen.summary_cache.get("cluster", self.gen.SummaryCache.key(
+            self.gen.CLUSTER_PROMPT, self.gen.CLUSTER_MODEL, 300, "- c")))
+
+
+if __name__ == "__main__":
+    unittest.main()
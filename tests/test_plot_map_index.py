@@ -0,0 +1,96 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.reasoning.plot_map_index import PlotMap, PlotMapIndex, plot_context
+
+PLOT_MAP = """## **The Count of Monte Cristo: Comprehensive Plot Map**
+
+### **Key Characters and Arcs**
+
+1. **Edmond Dantès**: A young sailor wrongly accused of treason.
+2. **Abbé Faria**: A fellow prisoner of Dantès.
+3. **M. Morrel**: A kind and honest merchant.
+4. **Maximilian Morrel**: M. Morrel's son.
+
+### **Timeline Anchors**
+
+* February 24, 1815: The Pharaon arrives in Marseilles.
+* 1811: Abbé Faria was imprisoned.
+* September 1829: M. Morrel faces financial difficulties.
+
+### **Central Causal Relationships**
+
+* Dantès' arrest sets off his imprisonment.
+* Faria's help enables the escape.
+
+### **Plot Sequence**
+
+Dantès is arrested in Marseilles. In prison he meets Faria, who teaches him.
+
+Years later Morrel is saved from ruin. Dantès takes his revenge.
+"""
+
+
+class TestPlotMap(unittest.TestCase):
+    def setUp(self):
+        self.map = PlotMap(PLOT_MAP)
+
+    def test_sections_and_characters(self):
+        self.assertEqual(set(self.map.sections), {"characters", "timeline", "causal", "sequence"})
+        self.assertEqual(len(self.map.sections["sequence"]), 4)
+        self.assertEqual(list(self.map.characters), ["Edmond Dantès", "Abbé Faria", "M. Morrel", "Maximilian Morrel"])
+        # "morrel" is shared, so it is not an alias of either Morrel
+        self.assertNotIn("morrel", self.map.aliases["M. Morrel"])
+
+    def test_resolve(self):
+        self.assertEqual(self.map.resolve("Edmond Dantes"), ["Edmond Dantès"])
+        self.assertEqual(self.map.resolve("Abbe Faria"), ["Abbé Faria"])
+        self.assertEqual(self.map.resolve("Morrel"), ["M. Morrel", "Maximilian Morrel"])
+        self.assertEqual(self.map.resolve("Villefort"), [])
+
+    def test_context_for_character_and_years(self):
+        context = self.map.context_for("Abbe Faria", [1829])
+        self.assertIn("**Abbé Faria**", context)
+        self.assertNotIn("**Edmond Dantès**", context)
+        self.assertIn("1811: Abbé Faria", context)
+        self.assertIn("September 1829", context)
+        self.assertNotIn("February 24, 1815", context)
+        self.assertIn("In prison he meets Faria", context)
+        self.assertNotIn("Years later Morrel", context)
+        # Sections keep map order
+        self.assertLess(context.index("### Timeline Anchors"), context.index("### Plot Sequence"))
+        self.assertLess(len(context), len(PLOT_MAP))
+
+    def test_unresolved_or_unparsed_gets_full_map(self):
+        self.assertEqual(self.map.context_for("Villefort", [1815]), PLOT_MAP)
+        self.assertEqual(plot_context("Just a paragraph of plot.", "Dantès"), "Just a paragraph of plot.")
+        self.assertEqual(plot_context(PLOT_MAP, "Edmond Dantès", mode="full"), PLOT_MAP)
+
+
+class TestPlotMapIndex(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        with open(os.path.join(self.dir, "The Count of Monte Cristo_plot_map.txt"), "w", encoding="utf-8") as f:
+            f.write(PLOT_MAP)
+        self.index = PlotMapIndex(self.dir).load()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_lookup(self):
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual(self.index.text("The Count of Monte Cristo.txt"), PLOT_MAP)
+        self.assertEqual(self.index.text("/books/Count of Monte Cristo"), PLOT_MAP)
+        self.assertEqual(self.index.text("Unknown Book"), "")
+        self.assertEqual(self.index.text(""), "")
+        self.assertEqual(self.index.get("the count of monte cristo").resolve("Dantès"), ["Edmond Dantès"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import sys
+import os
+import csv
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.pathway_pipeline.result_sink import ResultSink, RESULT_COLUMNS
+
+
+def row(story_id, prediction=1, rationale="ok"):
+    return {"Story ID": story_id, "Prediction": prediction, "Rationale": rationale,
+            "Confidence": "High", "Degradation": "full", "time": 2, "diff": 1}
+
+
+class TestResultSink(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmp, "results.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def read_csv(self):
+        with open(self.csv_path, newline="") as f:
+            return list(csv.DictReader(f))
+
+    def test_partial_results_readable_and_compacted(self):
+        sink = ResultSink(self.csv_path, RESULT_COLUMNS)
+        sink.on_change(None, row(10), 2, True)
+        sink.on_change(None, row(2), 2, True)
+        rows = self.read_csv()
+        self.assertEqual([r["Story ID"] for r in rows], ["2", "10"])
+        self.assertEqual(list(rows[0].keys()), RESULT_COLUMNS)  # no time/diff columns
+
+    def test_upsert_is_idempotent_and_keyed(self):
+        sink = ResultSink(self.csv_path, RESULT_COLUMNS)
+        sink.upsert(row(1, 1, "first"))
+        sink.upsert(row(1, 1, "first"))
+        # Pathway update: the new value may arrive before the retraction of the old one
+        sink.on_change(None, row(1, 0, "second"), 4, True)
+        sink.on_change(None, row(1, 1, "first"), 4, False)
+        sink.on_end()
+        rows = self.read_csv()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["Rationale"], "second")
+        with open(sink.log_path) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_replay_log(self):
+        sink = ResultSink(self.csv_path, RESULT_COLUMNS)
+        sink.upsert(row(1))
+        sink.upsert(row(2))
+        sink.delete(row(2))
+        with open(sink.log_path, "a") as f:
+            f.write('{"op": "upsert", "key": "3", "ro')  # torn write from a crash
+        self.assertEqual(list(ResultSink.replay(sink.log_path)), ["1"])
+        resumed = ResultSink(self.csv_path, RESULT_COLUMNS, resume=True)
+        self.assertEqual([r["Story ID"] for r in resumed.snapshot()], [1])
+
+    def test_absorb_worker_log_after_end(self):
+        worker = ResultSink(os.path.join(self.tmp, "results.csv.part1"), RESULT_COLUMNS)
+        worker.upsert(row(5))
+        worker.on_end()
+        sink = ResultSink(self.csv_path, RESULT_COLUMNS)
+        sink.upsert(row(1))
+        sink.on_end()
+        self.assertEqual(sink.absorb(worker.log_path), 1)
+        self.assertEqual([r["Story ID"] for r in self.read_csv()], ["1", "5"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.reasoning.constraint_rules import ConstraintRules, Rule, RuleEngine, RuleStats, RULES
+
+
+def state(chapter, years, keywords=None, snippet=""):
+    return {"chapter": chapter, "years": years, "keywords": keywords or {}, "content_snippet": snippet}
+
+
+DEATH = {"death": [("died", 0)]}
+PRISON = {"imprisonment": [("cell", 0)]}
+
+
+class TestRuleEngine(unittest.TestCase):
+    def test_single_pass_matches_individual_rules(self):
+        states = [state("A", [1820], DEATH), state("B", [1815], PRISON), state("C", [1815, 1850], {**DEATH, **PRISON})]
+        claims = {"years": [1815, 1845], "locations": ["Paris"]}
+        combined = ConstraintRules.check_all(claims, states)
+        separate = (ConstraintRules.check_imprisonment_constraint(claims, states)
+                    + ConstraintRules.check_death_constraint(claims, states))
+        self.assertEqual(combined, separate)
+        self.assertEqual([v["chapter"] for v in combined], ["B", "C", "A"])
+
+    def test_rules_only_see_states_with_their_keywords(self):
+        seen = []
+        probe = Rule("probe", lambda f, c: seen.append(f["chapter"]), requires=("death",))
+        stats = RuleStats()
+        RuleEngine([probe], stats).run({"years": []}, [state("A", [], DEATH), state("B", [], PRISON)])
+        self.assertEqual(seen, ["A"])
+        self.assertEqual(stats.rules["probe"]["runs"], 1)
+
+    def test_stats_per_rule(self):
+        stats = RuleStats()
+        RuleEngine(stats=stats).run({"years": [1900]}, [state("A", [1820], DEATH)])
+        self.assertEqual(stats.rules["death"]["violations"], 1)
+        self.assertEqual(stats.rules["imprisonment"]["runs"], 0)
+        self.assertIn("death", stats.report())
+
+    def test_bare_states_use_snippet(self):
+        self.assertTrue(ConstraintRules.check_death_constraint({"years": [1900]}, [{"content_snippet": "He died.", "years": [1800], "chapter": "X"}]))
+
+    def test_unknown_keyword_group(self):
+        with self.assertRaises(ValueError):
+            Rule("bad", lambda f, c: None, requires=("marriage",))
+
+    def test_registry_order(self):
+        self.assertEqual([r.name for r in RULES][:2], ["imprisonment", "death"])
+
+
+if __name__ == "__main__":
+    unittest.main()
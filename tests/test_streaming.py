@@ -0,0 +1,121 @@
+import sys
+import os
+import threading
+import unittest
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.models.streaming import DA_FIELDS, StreamStats, VerdictFieldWatcher, count_tokens, stream_completion
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeStream:
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.consumed = 0
+        self.closed = False
+
+    def __iter__(self):
+        for p in self.pieces:
+            self.consumed += 1
+            yield _chunk(p)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    def __init__(self, stream):
+        create = lambda **kwargs: stream
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+
+class TestVerdictFieldWatcher(unittest.TestCase):
+    def test_verdict_needs_terminated_word(self):
+        w = VerdictFieldWatcher()
+        self.assertFalse(w.feed("Step 5 - VERDICT: CONTRADICT"))
+        self.assertTrue(w.feed("ORY\n"))
+
+    def test_da_fields_in_any_order(self):
+        w = VerdictFieldWatcher(DA_FIELDS)
+        self.assertFalse(w.feed("CONTRADICTION_SCORE: 8\n"))
+        self.assertFalse(w.feed("DIRECT_QUOTE: \"he died in 1820"))
+        self.assertFalse(w.feed("\"\n"))
+        self.assertTrue(w.feed("VERDICT: CONTRADICTORY\n"))
+
+
+class TestStreamCompletion(unittest.TestCase):
+    def test_early_stop_keeps_rationale_and_records_savings(self):
+        pieces = ["Step 1 - dates clash.\n", "VERDICT: ", "CONSISTENT", "\n", "Extra ", "commentary ", "never read."]
+        stream = FakeStream(pieces)
+        stats = StreamStats()
+        text = stream_completion(FakeClient(stream), "groq-llama", [], max_tokens=20, stats=stats)
+        self.assertIn("Step 1 - dates clash.", text)
+        self.assertNotIn("commentary", text)
+        self.assertTrue(stream.closed)
+        entry = stats.models["groq-llama"]
+        self.assertEqual(entry["early_stops"], 1)
+        self.assertEqual(entry["tokens_received"], count_tokens(text))
+        self.assertEqual(entry["saved_tokens"], 20 - count_tokens(text))
+
+    def test_tokens_are_counted_on_text_not_chunks(self):
+        answer = "Step 1 - the backstory dates the voyage to 1864, which the chapter confirms at length."
+        stats = StreamStats()
+        stream_completion(FakeClient(FakeStream([answer])), "groq-llama", [], stats=stats)
+        self.assertGreater(stats.models["groq-llama"]["tokens_received"], 1)
+        self.assertEqual(stats.models["groq-llama"]["tokens_received"], count_tokens(answer))
+        # A stream that runs to the end and reports its usage is counted exactly
+        final = SimpleNamespace(choices=[], usage=SimpleNamespace(completion_tokens=42))
+        stats = StreamStats()
+        stream_completion(FakeClient(iter([_chunk(answer), final])), "groq-llama", [], stats=stats)
+        self.assertEqual(stats.models["groq-llama"]["tokens_received"], 42)
+
+    def test_requests_usage_unless_disabled(self):
+        requests = []
+
+        def create(**kwargs):
+            requests.append(kwargs)
+            return FakeStream(["VERDICT: CONSISTENT\n"])
+
+        client = FakeClient(None)
+        client.chat.completions.create = create
+        stream_completion(client, "groq-llama", [], stats=StreamStats())
+        stream_completion(client, "groq-llama", [], stats=StreamStats(), include_usage=False)
+        self.assertEqual(requests[0]["stream_options"], {"include_usage": True})
+        self.assertNotIn("stream_options", requests[1])
+
+    def test_full_stream_without_verdict(self):
+        stream = FakeStream(["no ", "verdict ", "here"])
+        stats = StreamStats()
+        text = stream_completion(FakeClient(stream), "or-trinity", [], stats=stats)
+        self.assertEqual(text, "no verdict here")
+        self.assertFalse(stream.closed)
+        self.assertEqual(stats.models["or-trinity"]["full_calls"], 1)
+
+    def test_cancel_closes_stream_without_recording(self):
+        cancel = threading.Event()
+        stream = FakeStream(["Step 1 - ", "dates ", "clash."])
+        chunks = iter(stream)
+
+        class CancelledStream(FakeStream):
+            # The hedge winner returns while the first chunk is being read
+            def __iter__(self):
+                yield next(chunks)
+                cancel.set()
+                yield from chunks
+
+        cancelled = CancelledStream([])
+        stats = StreamStats()
+        text = stream_completion(FakeClient(cancelled), "groq-llama", [], stats=stats, cancel=cancel)
+        self.assertEqual(text, "Step 1 - ")
+        self.assertTrue(cancelled.closed)
+        self.assertEqual(stream.consumed, 2)
+        self.assertNotIn("groq-llama", stats.models)
+
+if __name__ == '__main__':
+    unittest.main()
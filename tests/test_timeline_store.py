@@ -0,0 +1,113 @@
+import sys
+import os
+import unittest
+import importlib.util
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.reasoning.narrative_state import NarrativeStateIndex
+from src.reasoning.timeline_store import CharacterTimeline, Event, TimelineStore
+
+HAS_NETWORKX = importlib.util.find_spec("networkx") is not None
+
+
+def state(cid, years, locations=(), persons=(), keywords=None, progress=0.0, snippet=""):
+    return {"chunk_id": cid, "years": list(years), "locations": list(locations), "persons": list(persons),
+            "keywords": keywords or {}, "progress_pct": progress, "chapter": f"Ch {cid}", "content_snippet": snippet}
+
+
+class TestCharacterTimeline(unittest.TestCase):
+    def setUp(self):
+        self.timeline = CharacterTimeline("monte cristo", "Edmond Dantès")
+        self.timeline.add_states([
+            state(1, [1829], ["Paris"], ["Dantes"], progress=80.0),
+            state(2, [1815, 1816], ["Marseilles"], ["Edmond Dantes", "Morrel"], progress=5.0),
+            state(3, [1815], ["Chateau d'If"], ["Faria"], progress=20.0),
+            state(4, [1815], ["Rome"]),
+            state(5, [1815], ["Chateau d'If"], ["Dantes"], {"imprisonment": [("dungeon", 4)]}, progress=12.0),
+        ])
+
+    def test_only_states_mentioning_the_character(self):
+        self.assertEqual(set(self.timeline.states), {1, 2, 5})
+        self.assertEqual(self.timeline.event_years, [1815, 1815, 1816, 1829])
+        self.assertEqual(self.timeline.mentioned_by(state(6, [], persons=["Morrel", "Dantès"])), ["Dantès"])
+
+    def test_events_carry_progress_and_status(self):
+        self.assertEqual(self.timeline.at(1815), [
+            Event(5.0, 1815, "Marseilles", None, 2),
+            Event(12.0, 1815, "Chateau d'If", "imprisoned", 5),
+        ])
+        self.assertEqual(self.timeline.locations_at(1815), ["Marseilles", "Chateau d'If"])
+        self.assertEqual(self.timeline.locations_at(1900), [])
+
+    def test_year_range_queries(self):
+        self.assertEqual({e.key for e in self.timeline.events_in(1816, 1829)}, {1, 2})
+        self.assertEqual(self.timeline.events_in(1900), [])
+
+    def test_states_added_once(self):
+        self.assertEqual(self.timeline.add_states([state(1, [1829], ["Paris"], ["Dantes"]), state(3, [1815])]), 0)
+        self.assertEqual(self.timeline.event_count(), 4)
+        self.assertEqual(self.timeline.add_states([state(7, [1811], ["Marseilles"], ["Dantes"])]), 1)
+        self.assertEqual(self.timeline.event_years, [1811, 1815, 1815, 1816, 1829])
+
+    def test_built_once(self):
+        timeline = CharacterTimeline("monte cristo", "Faria")
+        loads = []
+
+        def load():
+            loads.append(1)
+            return [state(3, [1815], ["Chateau d'If"], ["Faria"])]
+        timeline.build(load)
+        timeline.build(load)
+        self.assertEqual(len(loads), 1)
+        self.assertEqual(timeline.locations_at(1815), ["Chateau d'If"])
+
+    def test_store_keys_by_book_and_character(self):
+        store = TimelineStore()
+        self.assertIs(store.get("Monte Cristo.txt", "Edmond  Dantes"), store.get("monte cristo", "edmond dantes"))
+
+
+class TestBookStates(unittest.TestCase):
+    def test_whole_book_is_parsed_once(self):
+        index = NarrativeStateIndex()
+        text = "CHAPTER I\n" + "In 1815 Dantes sailed from Marseilles. " * 80
+        states = index.states_of_book("monte cristo", text)
+        self.assertGreater(len(states), 1)
+        self.assertEqual(states[0]["progress_pct"], 0.0)
+        self.assertEqual(index.states_of_book("monte cristo", ""), states)
+        self.assertEqual(index.built, len(states))
+
+
+@unittest.skipUnless(HAS_NETWORKX, "networkx not installed")
+class TestValidatorWithTimeline(unittest.TestCase):
+    def setUp(self):
+        from src.reasoning.timeline_validator import TimelineValidator
+        self.validator = TimelineValidator()
+        self.claims = {"years": [1815], "locations": ["Paris"], "persons": ["Edmond Dantes"]}
+
+    def test_point_query_places_the_character(self):
+        shared = CharacterTimeline("monte cristo", "Edmond Dantes")
+        shared.add_states([state(7, [1815], ["Chateau d'If"], ["Dantes"])])
+        conflicts = self.validator.validate_location_consistency(self.claims, [], shared)
+        self.assertEqual([(c["year"], c["backstory_location"], c["narrative_locations"]) for c in conflicts],
+                         [(1815, "Paris", ["Chateau d'If"])])
+        self.assertEqual(conflicts[0]["persons"], ["Dantes"])
+        # The same place (or one containing it) is no conflict
+        claims = dict(self.claims, locations=["Chateau d'If"])
+        self.assertEqual(self.validator.validate_location_consistency(claims, [], shared), [])
+
+    def test_years_the_narrative_does_not_place_them(self):
+        shared = CharacterTimeline("monte cristo", "Edmond Dantes")
+        shared.add_states([state(8, [1829], ["Rome"], ["Dantes"]), state(9, [1815], ["Rome"], ["Faria"])])
+        self.assertEqual(self.validator.validate_location_consistency(self.claims, [], shared), [])
+
+    def test_backstory_persons_without_a_timeline(self):
+        story = [state(10, [1815], ["Chateau d'If"], ["Dantes"]),
+                 state(11, [1815], ["Rome"], ["Faria"])]
+        conflicts = self.validator.validate_location_consistency(self.claims, story)
+        self.assertEqual([c["chapter"] for c in conflicts], ["Ch 10"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import sys
+import os
+import unittest
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.models.workers import pathway_topology, is_primary_process, torch_threads_per_process
+
+
+class TestWorkerTopology(unittest.TestCase):
+    def test_defaults_to_single_worker(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(pathway_topology(), (1, 1, 0))
+            self.assertTrue(is_primary_process())
+
+    def test_spawned_process(self):
+        env = {"PATHWAY_PROCESSES": "4", "PATHWAY_THREADS": "2", "PATHWAY_PROCESS_ID": "3"}
+        with mock.patch.dict(os.environ, env, clear=True):
+            self.assertEqual(pathway_topology(), (4, 2, 3))
+            self.assertFalse(is_primary_process())
+
+    def test_torch_threads_split_across_workers(self):
+        env = {"PATHWAY_PROCESSES": "2", "PATHWAY_THREADS": "2"}
+        with mock.patch.dict(os.environ, env, clear=True), mock.patch("os.cpu_count", return_value=16):
+            self.assertEqual(torch_threads_per_process(), 4)
+        with mock.patch.dict(os.environ, {"PATHWAY_THREADS": "8"}, clear=True), mock.patch("os.cpu_count", return_value=4):
+            self.assertEqual(torch_threads_per_process(), 1)
+        with mock.patch.dict(os.environ, {"TORCH_NUM_THREADS": "3"}, clear=True):
+            self.assertEqual(torch_threads_per_process(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()